@@ -0,0 +1,81 @@
+"""Concurrent load test for the read endpoints, simulating slow mobile clients.
+
+Each simulated client opens a connection, trickles its request headers over
+``--client-delay`` seconds (as a slow mobile link would) and reads the full
+response. This ties up a sync WSGI worker for the whole exchange while an ASGI
+server keeps serving other connections.
+
+Run the same load against both deployments, for example:
+
+    gunicorn linkedin.wsgi -w 4 -b 127.0.0.1:8001
+    uvicorn linkedin.asgi:application --workers 1 --port 8002
+
+    python benchmarks/async_load.py http://127.0.0.1:8001/feeds-app/posts/
+    python benchmarks/async_load.py http://127.0.0.1:8002/feeds-app/async/posts/
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from urllib.parse import urlsplit
+
+
+async def fetch(url, client_delay, token):
+    """Issue one GET request with slowly sent headers, returning status and latency."""
+    parts = urlsplit(url)
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+
+    lines = [f"GET {parts.path or '/'}{'?' + parts.query if parts.query else ''} HTTP/1.1", f"Host: {parts.netloc}"]
+    if token:
+        lines.append(f"Authorization: Bearer {token}")
+    lines.append("Connection: close")
+
+    for line in lines:
+        writer.write(f"{line}\r\n".encode())
+        await writer.drain()
+        await asyncio.sleep(client_delay / len(lines))
+    writer.write(b"\r\n")
+    await writer.drain()
+
+    response = await reader.read()
+    writer.close()
+    status = int(response.split(b" ", 2)[1]) if response else 0
+    return status, time.perf_counter() - started
+
+
+async def run(url, total, concurrency, client_delay, token):
+    """Run `total` requests with at most `concurrency` in flight."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded():
+        async with semaphore:
+            return await fetch(url, client_delay, token)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(bounded() for _ in range(total)))
+    return results, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('url')
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--client-delay', type=float, default=0.2, help="Seconds spent sending request headers.")
+    parser.add_argument('--token', default='', help="Access token sent as a Bearer header.")
+    args = parser.parse_args()
+
+    results, elapsed = asyncio.run(run(args.url, args.requests, args.concurrency, args.client_delay, args.token))
+    latencies = sorted(latency for _, latency in results)
+    errors = sum(1 for status, _ in results if status != 200)
+
+    print(f"{args.url}")
+    print(f"  {args.requests} requests, concurrency {args.concurrency}, client delay {args.client_delay}s")
+    print(f"  throughput {args.requests / elapsed:8.1f} req/s, errors {errors}")
+    print(f"  p50 {statistics.median(latencies) * 1000:8.1f} ms  "
+          f"p99 {latencies[int(len(latencies) * 0.99) - 1] * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
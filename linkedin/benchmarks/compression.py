@@ -0,0 +1,87 @@
+"""Bytes on the wire and CPU cost of each response compression encoding and level.
+
+Seeds a temporary SQLite database with ``seed_scale``, fetches a feed page and a
+notification page through Django's test client, then compresses each body with
+every available encoding at several levels. Reports the compressed size, the
+ratio to the raw body and the CPU time per compression, the best of ``--repeat``.
+brotli and zstd are only measured when their packages are installed.
+
+Usage: python benchmarks/compression.py [--posts 200] [--repeat 20]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEVELS = {'gzip': [1, 4, 6, 9], 'br': [1, 4, 6, 9, 11], 'zstd': [1, 3, 6, 12, 19]}
+
+
+def best_of(repeat, fn):
+    """Shortest CPU time in seconds of `repeat` calls of `fn`, with the last result."""
+    timings = []
+    for _ in range(repeat):
+        started = time.process_time()
+        result = fn()
+        timings.append(time.process_time() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['SQLITE_PATH'] = os.path.join(directory, 'compression.sqlite3')
+        os.environ['PASSWORD_HASHING_WORKERS'] = '0'
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'linkedin.settings')
+        sys.path.insert(0, BASE_DIR)
+
+        import django
+        django.setup()
+        import logging
+        from django.core.management import call_command
+        from django.test.utils import setup_test_environment
+        from django.urls import reverse
+        from rest_framework.test import APIClient
+        from core.compression import CODECS
+        from core.models import CustomUser
+        from feed.models import Notification
+
+        setup_test_environment()
+        logging.getLogger('core').setLevel(logging.ERROR)
+        call_command('migrate', verbosity=0)
+        call_command(
+            'seed_scale', users=500, follows=20, posts=args.posts, reactions=10, comments=args.posts * 2, jobs=0,
+            workers=0, seed=0, stdout=open(os.devnull, 'w')
+        )
+        user = CustomUser.objects.order_by('pk').first()
+        Notification.objects.bulk_create([
+            Notification(recipient=user.user_profile, post_id=post_id, message=f"user{post_id} created a new post.")
+            for post_id in range(1, args.posts + 1)
+        ])
+        client = APIClient()
+        client.force_authenticate(user)
+        pages = {
+            'feed': client.get(reverse('feed:post-list')).content,
+            'notifications': client.get(reverse('feed:notification')).content,
+        }
+
+    missing = sorted(set(LEVELS) - set(CODECS))
+    if missing:
+        print(f"not installed: {', '.join(missing)}")
+    print(f"{'page':<15}{'encoding':<10}{'level':>6}{'bytes':>10}{'ratio':>8}{'cpu ms':>9}")
+    for page, body in pages.items():
+        print(f"{page:<15}{'identity':<10}{'':>6}{len(body):>10}{1:>8.2f}{0:>9.2f}")
+        for name, codec in CODECS.items():
+            for level in LEVELS[name]:
+                seconds, compressed = best_of(args.repeat, lambda: codec.compress(body, level))
+                print(f"{page:<15}{name:<10}{level:>6}{len(compressed):>10}{len(compressed) / len(body):>8.2f}"
+                      f"{seconds * 1000:>9.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,389 @@
+"""End to end latency and query count benchmark of every URL in the core, feed and job apps.
+
+Seeds a temporary SQLite database with ``seed_scale``, then requests every URL
+through Django's test client as an authenticated user, so it runs offline. Read
+URLs are requested with GET, batch URLs with the ids of the first objects, and
+write URLs with the scenarios in `WRITES`, which prepare their own rows so every
+iteration does the same work. URLs in `ADMIN_URLS` are requested as an admin.
+URLs without a GET handler or a scenario are listed as not measured.
+
+Results are compared to the baselines stored in ``benchmarks/baselines/endpoints.json``.
+A URL regresses when it runs more queries, answers with another status, or its
+p50 latency grows by more than ``--threshold``. Regressions make the script exit
+with status 1. Pass ``--update`` to store the current results as the new baselines.
+
+Usage: python benchmarks/endpoints.py [--repeat 20] [--threshold 0.5] [--update]
+"""
+import argparse
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from importlib import import_module
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines', 'endpoints.json')
+APPS = ['core', 'feed', 'job']
+ROOT_URLS = ['metrics']
+SEED = {'users': 2000, 'follows': 20, 'posts': 2000, 'reactions': 10, 'comments': 4000, 'jobs': 200}
+
+
+def iter_endpoints():
+    """Yield the name and keyword argument names of every URL of the benchmarked apps and `ROOT_URLS`."""
+    def walk(patterns):
+        for pattern in patterns:
+            if hasattr(pattern, 'url_patterns'):
+                yield from walk(pattern.url_patterns)
+            else:
+                yield pattern
+
+    seen = set()
+    for app in APPS:
+        for pattern in walk(import_module(f'{app}.urls').urlpatterns):
+            kwargs = list(pattern.pattern.regex.groupindex)
+            name = f'{app}:{pattern.name}'
+            if pattern.name in (None, 'api-root') or 'format' in kwargs or name in seen:
+                continue
+            seen.add(name)
+            yield name, kwargs
+    for name in ROOT_URLS:
+        yield name, []
+
+
+class Context:
+    """Seeded rows the requests are made against, owned by the most followed profile."""
+
+    def __init__(self):
+        from core.constants import ADMIN
+        from core.models import CustomUser, UserProfile, Experience, Education, Certification, Course
+        from feed.models import Post, ReactionType, Comment, CommentReply, PostReaction
+        from job.models import JobPost, JobApplication
+
+        self.profile = UserProfile.objects.select_related('user').order_by('pk').first()
+        self.user = self.profile.user
+        self.others = list(UserProfile.objects.order_by('-pk').values_list('pk', flat=True)[:50])
+        self.reaction_type = ReactionType.objects.order_by('pk').first()
+        self.post = Post.objects.order_by('pk').first()
+        self.comment = Comment.objects.create(post=self.post, comment_owner=self.profile, text='Benchmark comment')
+        self.reply = CommentReply.objects.create(comment=self.comment, reply_owner=self.profile, text='Benchmark reply')
+        self.reaction = PostReaction.objects.filter(post=self.post).first()
+        self.job = JobPost.objects.order_by('pk').first()
+        self.application = JobApplication.objects.order_by('pk').first()
+        self.sections = [
+            Experience.objects.create(person=self.profile, title='Engineer', company_name='Acme', location='Remote'),
+            Education.objects.create(
+                person=self.profile, school='School', degree='BSc', field_of_study='CS', grade='A'
+            ),
+            Certification.objects.create(person=self.profile, name='Certificate', issuing_organization='Acme'),
+            Course.objects.create(person=self.profile, course_name='Course'),
+        ]
+        self.objects = {
+            'post_id': self.post, 'comment_id': self.comment, 'reply_comment_id': self.reply,
+            'profile_id': UserProfile.objects.get(pk=self.others[0]),
+        }
+        self.admin = CustomUser.objects.create_user(
+            email='bench-admin@example.com', username='benchadmin', password='password', user_type=ADMIN
+        )
+
+    @staticmethod
+    def model_for(view_class):
+        """Model listed by a view."""
+        queryset = getattr(view_class, 'queryset', None)
+        return (queryset if queryset is not None else view_class().get_queryset()).model
+
+    def object_for(self, view_class):
+        """Object whose primary key fills the ``pk`` argument of a URL."""
+        model = self.model_for(view_class)
+        for candidate in (self.profile, self.user, self.post, self.comment, self.reply, self.reaction, self.job,
+                          self.application, *self.sections):
+            if isinstance(candidate, model):
+                return candidate
+        return model.objects.order_by('pk').first()
+
+
+def register(ctx, i):
+    """Register a new user."""
+    password = 'Bench-pass-123'
+    return 'post', {}, {
+        'username': f'bench{i}', 'email': f'bench{i}@example.com', 'password': password,
+        'confirmed_password': password, 'first_name': 'Bench', 'last_name': 'User', 'user_type': 'employee',
+    }
+
+
+def login(ctx, i):
+    """Obtain a token pair."""
+    return 'post', {}, {'email': ctx.user.email, 'password': 'password'}
+
+
+def refresh(ctx, i):
+    """Refresh an access token."""
+    from rest_framework_simplejwt.tokens import RefreshToken
+    return 'post', {}, {'refresh': str(RefreshToken.for_user(ctx.user))}
+
+
+def follow(ctx, i):
+    """Follow a profile, unfollowed first."""
+    from core.models import Follow
+    following = ctx.others[i % len(ctx.others)]
+    Follow.objects.filter(follower=ctx.profile, following=following).delete()
+    return 'post', {}, {'following': following}
+
+
+def react_post(ctx, i):
+    """React on the most popular post."""
+    return 'post', {}, {'post': ctx.post.pk, 'reaction_type': ctx.reaction_type.pk}
+
+
+def remove_post_reaction(ctx, i):
+    """Remove a freshly created post reaction."""
+    from feed.models import PostReaction
+    PostReaction.objects.filter(post=ctx.post, reaction_by=ctx.profile).delete()
+    reaction = PostReaction.objects.create(post=ctx.post, reaction_by=ctx.profile, reaction_type=ctx.reaction_type)
+    return 'delete', {'pk': reaction.pk}, None
+
+
+def comment(ctx, i):
+    """Comment on the most popular post."""
+    return 'post', {}, {'post': ctx.post.pk, 'text': f'Comment {i}'}
+
+
+def update_comment(ctx, i):
+    """Edit a comment of the user."""
+    return 'put', {'pk': ctx.comment.pk}, {'post': ctx.post.pk, 'text': f'Edited {i}'}
+
+
+def remove_comment(ctx, i):
+    """Remove a freshly created comment."""
+    from feed.models import Comment
+    comment = Comment.objects.create(post=ctx.post, comment_owner=ctx.profile, text='To remove')
+    return 'delete', {'pk': comment.pk}, None
+
+
+def react_comment(ctx, i):
+    """React on a comment."""
+    return 'post', {}, {'comment': ctx.comment.pk, 'reaction_type': ctx.reaction_type.pk}
+
+
+def remove_comment_reaction(ctx, i):
+    """Remove a freshly created comment reaction."""
+    from feed.models import CommentReaction
+    CommentReaction.objects.filter(comment=ctx.comment, reaction_owner=ctx.profile).delete()
+    reaction = CommentReaction.objects.create(
+        comment=ctx.comment, reaction_owner=ctx.profile, reaction_type=ctx.reaction_type
+    )
+    return 'delete', {'pk': reaction.pk}, None
+
+
+def reply(ctx, i):
+    """Reply to a comment."""
+    return 'post', {}, {'comment': ctx.comment.pk, 'text': f'Reply {i}'}
+
+
+def update_reply(ctx, i):
+    """Edit a reply of the user."""
+    return 'put', {'pk': ctx.reply.pk}, {'comment': ctx.comment.pk, 'text': f'Edited {i}'}
+
+
+def remove_reply(ctx, i):
+    """Remove a freshly created reply."""
+    from feed.models import CommentReply
+    reply = CommentReply.objects.create(comment=ctx.comment, reply_owner=ctx.profile, text='To remove')
+    return 'delete', {'pk': reply.pk}, None
+
+
+def react_reply(ctx, i):
+    """React on a reply."""
+    return 'post', {}, {'comment_reply': ctx.reply.pk, 'reaction_type': ctx.reaction_type.pk}
+
+
+def remove_reply_reaction(ctx, i):
+    """Remove a freshly created reply reaction."""
+    from feed.models import ReplyReaction
+    ReplyReaction.objects.filter(comment_reply=ctx.reply, reaction_owner=ctx.profile).delete()
+    reaction = ReplyReaction.objects.create(
+        comment_reply=ctx.reply, reaction_owner=ctx.profile, reaction_type=ctx.reaction_type
+    )
+    return 'delete', {'pk': reaction.pk}, None
+
+
+# Write URLs, each scenario prepares its rows and returns the method, URL arguments and body of one request.
+WRITES = {
+    'core:register': register,
+    'core:token_obtain_pair': login,
+    'core:token_refresh': refresh,
+    'core:follow-create': follow,
+    'feed:create-update-reaction': react_post,
+    'feed:remove-reaction': remove_post_reaction,
+    'feed:create-comment': comment,
+    'feed:update-comment': update_comment,
+    'feed:remove-comment': remove_comment,
+    'feed:create-update-comment-reaction': react_comment,
+    'feed:remove-comment-reaction': remove_comment_reaction,
+    'feed:create_comment_reply': reply,
+    'feed:update-reply-comment': update_reply,
+    'feed:remove-reply-comment': remove_reply,
+    'feed:create-update-comment-reply-reaction': react_reply,
+    'feed:remove-comment-reply-reaction': remove_reply_reaction,
+}
+
+# Read URLs limited to admins.
+ADMIN_URLS = {'feed:reactiontype-list', 'feed:reactiontype-detail', 'core:profiling-flamegraph'}
+
+
+def read(ctx, name, kwargs):
+    """Return a GET scenario filling the URL arguments from the context, or None if the URL has no GET."""
+    from django.urls import resolve, reverse
+
+    values = {key: ctx.objects[key].pk for key in kwargs if key != 'pk'}
+    view = resolve(reverse(name, kwargs={**values, 'pk': 1} if 'pk' in kwargs else values)).func
+    view_class = getattr(view, 'cls', None) or view.view_class
+    actions = getattr(view, 'actions', None)
+    if 'get' not in actions if actions is not None else not hasattr(view_class, 'get'):
+        return None
+    if 'pk' in kwargs:
+        values['pk'] = ctx.object_for(view_class).pk
+    params = None
+    if actions == {'get': 'batch'}:
+        model = ctx.model_for(view_class)
+        pks = model.objects.order_by('pk').values_list('pk', flat=True)[:view_class.batch_max_ids]
+        params = {'ids': ','.join(map(str, pks))}
+
+    def scenario(ctx, i):
+        return 'get', values, params
+    return scenario
+
+
+def measure(client, ctx, name, scenario, repeat):
+    """Run a scenario `repeat` times after a warm up request.
+
+    :return: latency percentiles, and query count and status of the last request.
+    """
+    from django.db import connection
+    from django.urls import reverse
+
+    queries = []
+
+    def count(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    latencies = []
+    for i in range(repeat + 1):
+        method, kwargs, data = scenario(ctx, i)
+        path = reverse(name, kwargs=kwargs)
+        queries.clear()
+        with connection.execute_wrapper(count):
+            started = time.perf_counter()
+            response = getattr(client, method)(path, data, format='json')
+            elapsed = time.perf_counter() - started
+        if i:
+            latencies.append(elapsed * 1000)
+
+    latencies.sort()
+    return {
+        'status': response.status_code,
+        'queries': len(queries),
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))], 3),
+    }
+
+
+def compare(name, result, baseline, threshold):
+    """Return the regressions of a result against its baseline."""
+    if baseline is None:
+        return []
+    problems = []
+    if result['status'] != baseline['status']:
+        problems.append(f"status {baseline['status']} -> {result['status']}")
+    if result['queries'] > baseline['queries']:
+        problems.append(f"queries {baseline['queries']} -> {result['queries']}")
+    if result['p50_ms'] > baseline['p50_ms'] * (1 + threshold):
+        problems.append(f"p50 {baseline['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms")
+    return problems
+
+
+def main():
+    """Seed, measure every URL, print a table and compare with or update the baselines."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20, help="Timed requests per URL.")
+    parser.add_argument('--threshold', type=float, default=0.5, help="Allowed relative p50 growth.")
+    parser.add_argument('--baseline', default=BASELINES)
+    parser.add_argument('--update', action='store_true', help="Store the results as the new baselines.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['SQLITE_PATH'] = os.path.join(directory, 'endpoints.sqlite3')
+        os.environ['PASSWORD_HASHING_WORKERS'] = '0'
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'linkedin.settings')
+        sys.path.insert(0, BASE_DIR)
+
+        import django
+        django.setup()
+        from django.conf import settings
+        from django.core.cache import cache
+        from django.core.management import call_command
+        from django.db import connection
+        from django.test.utils import setup_test_environment
+        from rest_framework.test import APIClient
+        from core.serializers import CustomTokenObtainPairSerializer
+
+        setup_test_environment()
+        logging.getLogger('core').setLevel(logging.ERROR)
+        logging.getLogger('django.request').setLevel(logging.CRITICAL)
+        call_command('migrate', verbosity=0)
+        call_command('seed_scale', workers=0, seed=0, stdout=open(os.devnull, 'w'), **SEED)
+        # Seeded profiles are bulk created, build their documents as the periodic job would.
+        call_command('rebuild_profile_documents', stdout=open(os.devnull, 'w'))
+        cache.clear()
+
+        ctx = Context()
+        client, admin_client = APIClient(), APIClient()
+        access_token = CustomTokenObtainPairSerializer.get_token(ctx.user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access_token}")
+        admin_client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {CustomTokenObtainPairSerializer.get_token(ctx.admin).access_token}"
+        )
+        # The metrics endpoint expects its own bearer token, the one the client already sends.
+        settings.METRICS_TOKEN = str(access_token)
+
+        # Reads run first so the rows created by the write scenarios do not change what they return.
+        endpoints = list(iter_endpoints())
+        scenarios = {name: read(ctx, name, kwargs) for name, kwargs in endpoints if name not in WRITES}
+        scenarios.update((name, WRITES[name]) for name, _ in endpoints if name in WRITES)
+
+        results = {name: measure(admin_client if name in ADMIN_URLS else client, ctx, name, scenario, args.repeat)
+                   for name, scenario in scenarios.items() if scenario is not None}
+        skipped = [name for name, scenario in scenarios.items() if scenario is None]
+        connection.close()
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baselines = json.load(baseline_file)
+
+    regressions = 0
+    print(f"{'url':<52}{'status':>7}{'queries':>9}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, result in results.items():
+        problems = compare(name, result, baselines.get(name), args.threshold)
+        regressions += bool(problems)
+        print(f"{name:<52}{result['status']:>7}{result['queries']:>9}{result['p50_ms']:>10.2f}{result['p99_ms']:>10.2f}"
+              + (f"  REGRESSION: {', '.join(problems)}" if problems else ""))
+    if skipped:
+        print(f"Not measured, no GET handler or write scenario: {', '.join(skipped)}")
+
+    if args.update:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+        print(f"Baselines written to {args.baseline}")
+    elif regressions:
+        print(f"{regressions} regressions beyond the {args.threshold:.0%} threshold")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
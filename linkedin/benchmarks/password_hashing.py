@@ -0,0 +1,67 @@
+"""Benchmark login password verification inline versus in the hashing pool.
+
+Simulates a number of sync request workers (threads) verifying passwords
+concurrently and reports logins per second per core.
+
+Usage: python benchmarks/password_hashing.py [--logins 32] [--threads 8]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'linkedin.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.contrib.auth import hashers  # noqa: E402
+
+from core import hashing  # noqa: E402
+
+
+def run_threads(check, logins, threads, encoded):
+    """Verify `logins` passwords from `threads` threads, returning elapsed seconds."""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda _: check('secret', encoded), range(logins)))
+    return time.perf_counter() - started
+
+
+async def run_async(logins, encoded):
+    """Verify `logins` passwords concurrently from one event loop, returning elapsed seconds."""
+    started = time.perf_counter()
+    await asyncio.gather(*(hashing.acheck_password('secret', encoded) for _ in range(logins)))
+    return time.perf_counter() - started
+
+
+def report(label, logins, elapsed, cores):
+    """Print one result line."""
+    rate = logins / elapsed
+    print(f"{label:<28} {rate:8.2f} logins/s {rate / cores:8.2f} logins/s/core")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--logins', type=int, default=32)
+    parser.add_argument('--threads', type=int, default=8)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    encoded = hashers.make_password('secret')
+    hashing.check_password('secret', encoded)  # start the pool outside the timing
+
+    print(f"{args.logins} logins, {args.threads} request threads, {cores} cores, "
+          f"{hashing.settings.PASSWORD_HASHING_WORKERS} pool workers")
+    report("inline (before)", args.logins, run_threads(hashers.check_password, args.logins, args.threads, encoded), cores)
+    report("process pool (after)", args.logins, run_threads(hashing.check_password, args.logins, args.threads, encoded), cores)
+    report("process pool, async view", args.logins, asyncio.run(run_async(args.logins, encoded)), cores)
+    hashing.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+"""Show query plans and timings of the hot view queries before and after the hot path indexes.
+
+Seeds a temporary SQLite database at the migrations preceding the indexes,
+captures ``EXPLAIN QUERY PLAN`` and the mean time of each query, then applies
+the index migrations and measures again.
+
+Usage: python benchmarks/query_plans.py [--scale 1.0] [--repeat 50]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BEFORE = [('core', '0002_customuser_token_version'), ('feed', '0001_initial'), ('job', '0001_initial')]
+
+
+def seed(scale):
+    """Bulk create a dataset shaped like production, sized by `scale`."""
+    from core.models import CustomUser, UserProfile, Follow
+    from feed.models import Post, ReactionType, PostReaction, Comment, Notification
+    from job.models import JobPost, JobApplication
+
+    def count(n):
+        return max(1, int(n * scale))
+
+    CustomUser.objects.bulk_create(
+        [CustomUser(email=f'u{i}@example.com', username=f'u{i}') for i in range(count(5000))], batch_size=1000
+    )
+    UserProfile.objects.bulk_create([UserProfile(user=user) for user in CustomUser.objects.all()], batch_size=1000)
+    profiles = list(UserProfile.objects.values_list('id', flat=True))
+
+    follows = {(random.choice(profiles), random.choice(profiles)) for _ in range(count(50000))}
+    Follow.objects.bulk_create(
+        [Follow(follower_id=a, following_id=b) for a, b in follows if a != b], batch_size=1000
+    )
+    Post.objects.bulk_create(
+        [Post(post_owner_id=random.choice(profiles), text_body='post') for _ in range(count(20000))], batch_size=1000
+    )
+    posts = list(Post.objects.values_list('id', flat=True))
+    like = ReactionType.objects.create(type='like')
+    PostReaction.objects.bulk_create([
+        PostReaction(post_id=random.choice(posts), reaction_by_id=random.choice(profiles), reaction_type=like)
+        for _ in range(count(100000))
+    ], batch_size=1000)
+    Comment.objects.bulk_create([
+        Comment(post_id=random.choice(posts), comment_owner_id=random.choice(profiles), text='comment')
+        for _ in range(count(50000))
+    ], batch_size=1000)
+    Notification.objects.bulk_create([
+        Notification(recipient_id=random.choice(profiles), post_id=random.choice(posts), message='new post')
+        for _ in range(count(100000))
+    ], batch_size=1000)
+    JobPost.objects.bulk_create([
+        JobPost(title='job', description='job', recruiter_id=random.choice(profiles)) for _ in range(count(500))
+    ])
+    jobs = list(JobPost.objects.values_list('id', flat=True))
+    JobApplication.objects.bulk_create([
+        JobApplication(job_id=random.choice(jobs), applicant_id=random.choice(profiles))
+        for _ in range(count(20000))
+    ], batch_size=1000)
+    return profiles, posts, jobs
+
+
+def hot_queries(profiles, posts, jobs):
+    """Queries issued by the list and create views, keyed by a label."""
+    from core.models import CustomUser, Follow
+    from feed.models import Post, PostReaction, Comment, Notification
+    from job.models import JobApplication
+
+    post, profile, job = random.choice(posts), random.choice(profiles), random.choice(jobs)
+    return {
+        'reaction lookup (CreatePostReactionView)': PostReaction.objects.filter(
+            post_id=post, reaction_by_id=profile
+        ).order_by('pk')[:1],
+        'comments of post by time': Comment.objects.filter(post=post).order_by('created_at'),
+        'notifications of recipient': Notification.objects.filter(recipient=profile).order_by('-created_at')[:50],
+        'followers by time': Follow.objects.filter(following=profile).order_by('-created_at'),
+        'following by time': Follow.objects.filter(follower=profile).order_by('-created_at'),
+        'applications of job': JobApplication.objects.filter(job=job),
+        'users by date joined': CustomUser.objects.all()[:50],
+        'latest posts': Post.objects.all()[:50],
+    }
+
+
+def measure(queries, repeat):
+    """Return plan and mean milliseconds of each query."""
+    from django.db import connection
+
+    results = {}
+    for label, queryset in queries.items():
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+            plan = '; '.join(row[-1] for row in cursor.fetchall())
+            started = time.perf_counter()
+            for _ in range(repeat):
+                cursor.execute(sql, params)
+                cursor.fetchall()
+        results[label] = (plan, (time.perf_counter() - started) / repeat * 1000)
+    return results
+
+
+def main():
+    """Seed, measure, apply the index migrations and measure again."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--scale', type=float, default=1.0)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    random.seed(0)
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['SQLITE_PATH'] = os.path.join(directory, 'plans.sqlite3')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'linkedin.settings')
+        sys.path.insert(0, BASE_DIR)
+
+        import django
+        django.setup()
+        from django.core.management import call_command
+        from django.db import connection
+
+        for app, migration in BEFORE:
+            call_command('migrate', app, migration, verbosity=0)
+        queries = hot_queries(*seed(args.scale))
+        connection.cursor().execute('ANALYZE')
+        before = measure(queries, args.repeat)
+
+        call_command('migrate', verbosity=0)
+        connection.cursor().execute('ANALYZE')
+        after = measure(queries, args.repeat)
+        connection.close()
+
+    for label in queries:
+        print(label)
+        print(f"  before {before[label][1]:8.3f} ms  {before[label][0]}")
+        print(f"  after  {after[label][1]:8.3f} ms  {after[label][0]}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""Compare the JSON renderers and the streamed list on a large user list.
+
+Seeds a temporary SQLite database with ``seed_scale`` and requests the user
+list through Django's test client with DRF's ``JSONRenderer``, with
+`FastJSONRenderer` on each encoder, and streamed with ``?stream=true``. Reports
+the time to the first byte, the total time and the peak Python memory of each
+request. Memory is traced in a separate run, so it does not slow down the timings.
+
+Usage: python benchmarks/renderers.py [--users 50000] [--repeat 3]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def request(client, url, params):
+    """Request a URL and read its whole body, returning seconds to first byte, total seconds and bytes."""
+    started = time.perf_counter()
+    response = client.get(url, params)
+    if response.streaming:
+        chunks = iter(response.streaming_content)
+        first = next(chunks)
+        first_byte = time.perf_counter() - started
+        size = len(first) + sum(len(chunk) for chunk in chunks)
+    else:
+        first_byte = time.perf_counter() - started
+        size = len(response.content)
+    response.close()
+    return first_byte, time.perf_counter() - started, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=50000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['SQLITE_PATH'] = os.path.join(directory, 'renderers.sqlite3')
+        os.environ['PASSWORD_HASHING_WORKERS'] = '0'
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'linkedin.settings')
+        sys.path.insert(0, BASE_DIR)
+
+        import django
+        django.setup()
+        import logging
+        from unittest import mock
+        from django.core.management import call_command
+        from django.test.utils import override_settings, setup_test_environment
+        from django.urls import reverse
+        from rest_framework.renderers import JSONRenderer
+        from rest_framework.test import APIClient
+        from core.models import CustomUser
+        from core.views import UserListView
+
+        setup_test_environment()
+        logging.getLogger('core').setLevel(logging.ERROR)
+        call_command('migrate', verbosity=0)
+        call_command(
+            'seed_scale', users=args.users, follows=0, posts=0, comments=0, jobs=0, workers=0, seed=0,
+            stdout=open(os.devnull, 'w')
+        )
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.first())
+        url = reverse('core:user-list')
+
+        modes = [
+            ("JSONRenderer (before)", [JSONRenderer], 'json', {}),
+            ("FastJSONRenderer json", None, 'json', {}),
+            ("FastJSONRenderer orjson", None, 'orjson', {}),
+            ("streamed orjson", None, 'orjson', {'stream': 'true'}),
+        ]
+        print(f"{args.users} users")
+        print(f"{'renderer':<26}{'first byte ms':>15}{'total ms':>10}{'peak MiB':>10}{'MiB':>8}")
+        for label, renderer_classes, encoder, params in modes:
+            renderer_classes = renderer_classes or UserListView.renderer_classes
+            with mock.patch.object(UserListView, 'renderer_classes', renderer_classes), \
+                    override_settings(JSON_ENCODER=encoder):
+                timings = [request(client, url, params) for _ in range(args.repeat)]
+                first_byte, total, size = min(timings, key=lambda timing: timing[1])
+
+                tracemalloc.start()
+                request(client, url, params)
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+            print(f"{label:<26}{first_byte * 1000:>15.1f}{total * 1000:>10.1f}{peak / 2 ** 20:>10.1f}"
+                  f"{size / 2 ** 20:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,75 @@
+"""Benchmark the projection serializer against ModelSerializer on large lists.
+
+Seeds a temporary SQLite database with ``seed_scale``, then serializes the rows
+behind the user list and the post reaction list with the ``Get*`` serializer and
+with `ProjectionSerializer`, checking both produce the same output. Reports the
+best time out of ``--repeat`` runs, queries included.
+
+Usage: python benchmarks/serializers.py [--rows 10000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def best_of(repeat, fn):
+    """Run `fn` `repeat` times, returning the shortest time in seconds and the last result."""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000, help="Rows serialized per list.")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ['SQLITE_PATH'] = os.path.join(directory, 'serializers.sqlite3')
+        os.environ['PASSWORD_HASHING_WORKERS'] = '0'
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'linkedin.settings')
+        sys.path.insert(0, BASE_DIR)
+
+        import django
+        django.setup()
+        from django.core.management import call_command
+        from django.test import RequestFactory
+        from core.models import CustomUser
+        from core.projection import ProjectionSerializer
+        from core.serializers import CustomUserSerializer
+        from feed.models import PostReaction
+        from feed.serializers import GetPostReactionSerializer
+
+        call_command('migrate', verbosity=0)
+        call_command(
+            'seed_scale', users=args.rows, follows=0, posts=max(1, args.rows // 100), reactions=100, comments=0,
+            jobs=0, workers=0, seed=0, stdout=open(os.devnull, 'w')
+        )
+        context = {'request': RequestFactory().get('/')}
+
+        print(f"{'list':<16}{'rows':>8}{'ModelSerializer ms':>20}{'projection ms':>16}{'speedup':>9}")
+        for label, serializer_class, queryset in [
+            ('users', CustomUserSerializer, CustomUser.objects.order_by('pk')[:args.rows]),
+            ('post reactions', GetPostReactionSerializer, PostReaction.objects.order_by('pk')[:args.rows]),
+        ]:
+            model_time, expected = best_of(
+                args.repeat, lambda: serializer_class(queryset.all(), many=True, context=context).data
+            )
+            projection_time, projected = best_of(
+                args.repeat, lambda: ProjectionSerializer(queryset.all(), serializer_class, context=context).data
+            )
+            assert projected == [dict(item) for item in expected], f"{label}: outputs differ"
+            print(f"{label:<16}{len(projected):>8}{model_time * 1000:>20.1f}{projection_time * 1000:>16.1f}"
+                  f"{model_time / projection_time:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""Benchmark concurrent SQLite reads and writes, stock settings versus the sqlite-wal options.
+
+Writer processes upsert post reactions in a transaction the way
+`CreatePostReactionView` does, wrapped in `retry_on_busy` under the tuned options,
+while reader processes list posts with their reaction counts. Both profiles
+run against a fresh temporary database file.
+
+Usage: python benchmarks/sqlite_concurrency.py [--writers 4] [--readers 4] [--seconds 5]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILES = {'sqlite': "stock sqlite3 (before)", 'sqlite-wal': "sqlite-wal options (after)"}
+
+
+def setup_django():
+    """Configure Django with the profile selected through the environment."""
+    sys.path.insert(0, BASE_DIR)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'linkedin.settings')
+    import django
+    django.setup()
+
+
+def seed(users, posts):
+    """Create the schema and the users, profiles, posts and reaction type used by the workers."""
+    from django.core.management import call_command
+    from core.models import CustomUser, UserProfile
+    from feed.models import Post, ReactionType
+
+    call_command('migrate', verbosity=0)
+    CustomUser.objects.bulk_create([CustomUser(email=f'u{i}@example.com', username=f'u{i}') for i in range(users)])
+    UserProfile.objects.bulk_create([UserProfile(user=user) for user in CustomUser.objects.all()])
+    profiles = list(UserProfile.objects.all())
+    Post.objects.bulk_create([Post(post_owner=random.choice(profiles), text_body='post') for _ in range(posts)])
+    ReactionType.objects.create(type='like')
+
+
+def write_loop(deadline, retry, results):
+    """Upsert random reactions until the deadline, counting successes and lock errors."""
+    from django.db import OperationalError, transaction
+    from core.db.utils import retry_on_busy
+    from feed.models import Post, PostReaction, ReactionType
+    from core.models import UserProfile
+
+    profile_ids = list(UserProfile.objects.values_list('id', flat=True))
+    post_ids = list(Post.objects.values_list('id', flat=True))
+    reaction_type = ReactionType.objects.first()
+
+    def react():
+        post_id, profile_id = random.choice(post_ids), random.choice(profile_ids)
+        existing = PostReaction.objects.filter(post_id=post_id, reaction_by_id=profile_id).first()
+        if existing:
+            existing.save()
+        else:
+            PostReaction.objects.create(post_id=post_id, reaction_by_id=profile_id, reaction_type=reaction_type)
+
+    react = retry_on_busy(react) if retry else transaction.atomic()(react)
+
+    done = errors = 0
+    while time.monotonic() < deadline:
+        try:
+            react()
+            done += 1
+        except OperationalError:
+            errors += 1
+    results.put(('write', done, errors))
+
+
+def read_loop(deadline, results):
+    """List posts with reaction counts until the deadline, counting successes and lock errors."""
+    from django.db import OperationalError
+    from django.db.models import Count
+    from feed.models import Post
+
+    done = errors = 0
+    while time.monotonic() < deadline:
+        try:
+            list(Post.objects.annotate(reactions=Count('postreaction'))[:20])
+            done += 1
+        except OperationalError:
+            errors += 1
+    results.put(('read', done, errors))
+
+
+def run_profile(args):
+    """Run the workers for the profile configured in the environment and print JSON totals."""
+    setup_django()
+    from django.db import connections
+
+    seed(args.users, args.posts)
+    connections.close_all()
+
+    results = multiprocessing.Queue()
+    deadline = time.monotonic() + args.seconds
+    retry = os.environ['DATABASE_PROFILE'] == 'sqlite-wal'
+    workers = [multiprocessing.Process(target=write_loop, args=(deadline, retry, results)) for _ in range(args.writers)]
+    workers += [multiprocessing.Process(target=read_loop, args=(deadline, results)) for _ in range(args.readers)]
+    for worker in workers:
+        worker.start()
+
+    totals = {'write': [0, 0], 'read': [0, 0]}
+    for _ in workers:
+        kind, done, errors = results.get()
+        totals[kind][0] += done
+        totals[kind][1] += errors
+    for worker in workers:
+        worker.join()
+    print(json.dumps(totals))
+
+
+def main():
+    """Run every profile in a fresh interpreter and print the throughput of each."""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--posts', type=int, default=200)
+    parser.add_argument('--run-profile', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_profile:
+        return run_profile(args)
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds}s")
+    for profile, label in PROFILES.items():
+        with tempfile.TemporaryDirectory() as directory:
+            env = {
+                **os.environ, 'DATABASE_PROFILE': profile, 'SQLITE_PATH': os.path.join(directory, 'bench.sqlite3'),
+                'PASSWORD_HASHING_WORKERS': '0',
+            }
+            output = subprocess.run(
+                [sys.executable, __file__, '--run-profile', *sys.argv[1:]], env=env, check=True,
+                capture_output=True, text=True
+            ).stdout
+        totals = json.loads(output.strip().splitlines()[-1])
+        print(f"{label:<26} writes {totals['write'][0] / args.seconds:8.1f}/s ({totals['write'][1]} locked)  "
+              f"reads {totals['read'][0] / args.seconds:8.1f}/s ({totals['read'][1]} locked)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,6 @@
 from django.contrib import admin
 
-from .models import CustomUser, UserProfile, Follow, Education, Experience, Certification, Course
+from .models import CustomUser, UserProfile, Follow, Education, Experience, Certification, Course, RequestProfile, SlowQuery
 
 
 admin.site.site_header = 'LinkedIn Clone'
@@ -72,6 +72,23 @@ class CourseAdmin(admin.ModelAdmin):
     ordering = ['-created_at']
 
 
+class RequestProfileAdmin(admin.ModelAdmin):
+    """Admin for RequestProfile Model."""
+
+    list_display = ['id', 'view_name', 'method', 'duration', 'samples', 'created_at']
+    ordering = ['-created_at']
+    list_filter = ['view_name']
+
+
+class SlowQueryAdmin(admin.ModelAdmin):
+    """Admin for SlowQuery Model."""
+
+    list_display = ['id', 'fingerprint', 'duration', 'view_name', 'serializer', 'created_at']
+    search_fields = ['fingerprint', 'normalized_sql']
+    ordering = ['-created_at']
+    list_filter = ['view_name']
+
+
 admin.site.register(CustomUser, CustomUserAdmin)
 admin.site.register(UserProfile, UserProfileAdmin)
 admin.site.register(Follow, FollowAdmin)
@@ -79,3 +96,5 @@ admin.site.register(Education, EducationAdmin)
 admin.site.register(Experience, ExperienceAdmin)
 admin.site.register(Certification, CertificationAdmin)
 admin.site.register(Course, CourseAdmin)
+admin.site.register(RequestProfile, RequestProfileAdmin)
+admin.site.register(SlowQuery, SlowQueryAdmin)
@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        """Connect Signal for the core app."""
+        import core.checks
+        import core.signals
+        from core import instrumentation, slow_queries
+
+        instrumentation.install()
+        slow_queries.install()
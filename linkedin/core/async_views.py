@@ -0,0 +1,92 @@
+import inspect
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ObjectDoesNotExist
+from django.http import Http404
+from rest_framework.generics import GenericAPIView
+from rest_framework.response import Response
+
+from .instrumentation import SerializerTimingMixin
+from .renderers import FastJSONRenderer
+
+
+class AsyncAPIView(SerializerTimingMixin, GenericAPIView):
+    """Base class for read only async views served under ASGI.
+
+    Queryset, lookup, permissions and serializer plumbing come from `GenericAPIView`,
+    only dispatch is async. Authentication, throttling and permission checks run in
+    a worker thread through `initial`, since they may hit the cache or database.
+    Responses are rendered with `FastJSONRenderer`, so the output matches the sync views.
+
+    Serializers are run directly on the event loop, so querysets must prefetch or
+    annotate everything the serializer reads. A missed relation raises
+    `SynchronousOnlyOperation` instead of silently issuing a query per row.
+    """
+
+    renderer_classes = [FastJSONRenderer]
+
+    async def dispatch(self, request, *args, **kwargs):
+        """Async version of `APIView.dispatch`, awaiting the handler.
+
+        :param request: Django HTTP request.
+        :return: DRF response, rendered by Django's handler.
+        """
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if inspect.isawaitable(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncListAPIView(AsyncAPIView):
+    """Async view to list a queryset, fetched in a worker thread.
+
+    The queryset is evaluated at once rather than with `aiterator`, which would run
+    the `prefetch_related` lookups again for every chunk.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        """List serialized objects."""
+        queryset = self.filter_queryset(self.get_queryset())
+        instances = [instance async for instance in queryset]
+        return Response(self.get_serializer(instances, many=True).data)
+
+
+class AsyncRetrieveAPIView(AsyncAPIView):
+    """Async view to retrieve one object by `lookup_field`, fetched with `aget`."""
+
+    async def aget_object(self):
+        """Async version of `get_object`.
+
+        :raises Http404: when no object matches the lookup.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            instance = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except ObjectDoesNotExist:
+            raise Http404
+        self.check_object_permissions(self.request, instance)
+        return instance
+
+    async def get(self, request, *args, **kwargs):
+        """Retrieve one serialized object."""
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
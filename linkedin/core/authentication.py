@@ -0,0 +1,105 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from .metrics import record_cache
+from .models import CustomUser, UserProfile
+
+USER_TYPE_CLAIM = 'user_type'
+PROFILE_ID_CLAIM = 'profile_id'
+TOKEN_VERSION_CLAIM = 'token_version'
+
+AUTH_STATE_CACHE_KEY = 'auth-state:{user_id}'
+
+
+def get_auth_state(user_id):
+    """Return the cached ``(token_version, is_active)`` pair of a user.
+
+    :param user_id: primary key of the user.
+    :returns: tuple of current token version and active status, or None if the user does not exist.
+    """
+    key = AUTH_STATE_CACHE_KEY.format(user_id=user_id)
+    state = cache.get(key)
+    record_cache('auth_state', state is not None)
+
+    if state is None:
+        state = CustomUser.objects.filter(pk=user_id).values_list('token_version', 'is_active').first()
+        if state is None:
+            return None
+        cache.set(key, tuple(state), settings.AUTH_STATE_CACHE_TTL)
+
+    return tuple(state)
+
+
+def invalidate_auth_state(user_id):
+    """Drop the cached auth state so the next request reads it from the database.
+
+    :param user_id: primary key of the user.
+    """
+    cache.delete(AUTH_STATE_CACHE_KEY.format(user_id=user_id))
+
+
+def add_user_claims(token, user):
+    """Embed the claims needed by `StatelessJWTAuthentication` into a token.
+
+    :param token: simplejwt token to update.
+    :param user: user the token is issued for.
+    :returns: the updated token.
+    """
+    token[USER_TYPE_CLAIM] = user.user_type
+    token[PROFILE_ID_CLAIM] = UserProfile.objects.filter(user=user).values_list('id', flat=True).first()
+    token[TOKEN_VERSION_CLAIM] = user.token_version
+    return token
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """JWT authentication that builds the user from token claims instead of loading it.
+
+    Revocation is enforced by comparing the token version claim with the user's current
+    version and active flag, read through the default cache. Saving a user drops its
+    cached state, so with the shared cache required in production, deactivation and
+    logout from all devices take effect on the next request in every worker. Changes
+    that skip ``save()``, such as ``QuerySet.update()``, and a per process cache take up
+    to ``AUTH_STATE_CACHE_TTL`` seconds. The ``user_type`` and ``profile_id`` claims are
+    trusted for the lifetime of the access token.
+    """
+
+    def get_user(self, validated_token):
+        """Return a lazily loaded user built from the token claims.
+
+        :param validated_token: validated access token.
+        :returns: `CustomUser` instance with only claim fields loaded.
+        """
+        if TOKEN_VERSION_CLAIM not in validated_token:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        state = get_auth_state(user_id)
+        if state is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        token_version, is_active = state
+        if not is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if validated_token[TOKEN_VERSION_CLAIM] != token_version:
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+        user = CustomUser.from_db(
+            None, ['id', 'user_type', 'is_active', 'token_version'],
+            [user_id, validated_token[USER_TYPE_CLAIM], is_active, token_version]
+        )
+
+        profile_id = validated_token.get(PROFILE_ID_CLAIM)
+        if profile_id is not None:
+            profile = UserProfile.from_db(None, ['id', 'user_id'], [profile_id, user_id])
+            UserProfile.user.field.set_cached_value(profile, user)
+            CustomUser.user_profile.related.set_cached_value(user, profile)
+
+        return user
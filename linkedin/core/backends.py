@@ -0,0 +1,40 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from . import hashing
+
+UserModel = get_user_model()
+
+
+class PooledModelBackend(ModelBackend):
+    """Model backend that verifies passwords in the hashing process pool."""
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        """Authenticate by email and password, hashing outside the request worker.
+
+        :param request: HTTP request object, may be None.
+        :param username: value of the user's USERNAME_FIELD.
+        :param password: raw password.
+        :returns: user if credentials are valid and the user is active else None.
+        """
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so unknown users take as long as wrong passwords.
+            hashing.make_password(password)
+            return None
+
+        matched, must_update = hashing.check_password(password, user.password)
+        if not matched or not self.user_can_authenticate(user):
+            return None
+
+        if must_update:
+            user.set_password(password)
+            user.save(update_fields=['password'])
+
+        return user
@@ -0,0 +1,161 @@
+import hashlib
+import math
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router
+from django.db.models import DateTimeField, Q, Value
+from django.db.models.constants import OnConflict
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+# Changes whenever tokens are blacklisted, telling every process its filter is out of date.
+GENERATION_CACHE_KEY = 'token-blacklist:generation'
+
+
+def get_generation():
+    """Return the current blacklist generation, starting a new one if the cache lost it."""
+    generation = cache.get(GENERATION_CACHE_KEY)
+    if generation is None:
+        cache.add(GENERATION_CACHE_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(GENERATION_CACHE_KEY)
+    return generation
+
+
+def blacklist_changed():
+    """Start a new blacklist generation, so every process reloads its filter before trusting it."""
+    cache.set(GENERATION_CACHE_KEY, uuid.uuid4().hex, None)
+
+
+def blacklist_user_tokens(user_id):
+    """Blacklist every outstanding refresh token of a user in a single ``INSERT ... SELECT``.
+
+    Tokens blacklisted concurrently are skipped by the conflict clause.
+
+    :param user_id: primary key of the user.
+    :return: number of tokens blacklisted.
+    """
+    connection = connections[router.db_for_write(BlacklistedToken)]
+    tokens = OutstandingToken.objects.using(connection.alias).filter(
+        user_id=user_id, blacklistedtoken__isnull=True
+    ).annotate(
+        blacklisted_at=Value(timezone.now(), output_field=DateTimeField())
+    ).values('id', 'blacklisted_at')
+    select, params = tokens.query.sql_with_params()
+
+    meta, quote = BlacklistedToken._meta, connection.ops.quote_name
+    fields = [meta.get_field('token'), meta.get_field('blacklisted_at')]
+    columns = ', '.join(quote(field.column) for field in fields)
+    suffix = connection.ops.on_conflict_suffix_sql(fields, OnConflict.IGNORE, None, None)
+    insert = connection.ops.insert_statement(on_conflict=OnConflict.IGNORE)
+    with connection.cursor() as cursor:
+        cursor.execute(f"{insert} {quote(meta.db_table)} ({columns}) {select} {suffix}".strip(), params)
+        return cursor.rowcount
+
+
+class BloomFilter:
+    """Fixed size Bloom filter over strings."""
+
+    def __init__(self, capacity, error_rate):
+        """Size the bit array for the given capacity and false positive rate.
+
+        :param capacity: expected number of items.
+        :param error_rate: acceptable false positive probability.
+        """
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        """Bit positions of an item, using double hashing over one digest."""
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        """Add an item to the filter."""
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        """False means the item was never added, True means it probably was."""
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class BlacklistFilter:
+    """In-process Bloom filter in front of the token blacklist table.
+
+    The filter only rules tokens out: a miss means the token is not blacklisted and
+    a possible hit is checked against the database. A miss is only trusted while the
+    filter is up to date, so before each lookup the blacklist generation is read from
+    the shared cache, and rows added since the last load are pulled when it changed.
+
+    Primary keys are assigned before rows commit, so a lower id can become visible
+    after a higher one was loaded. New rows are therefore those past the last loaded
+    id, plus those blacklisted within ``TOKEN_BLACKLIST_FILTER_OVERLAP`` seconds of
+    the previous load. The filter is rebuilt from scratch once it holds more items
+    than it was sized for.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.filter = None
+        self.last_id = 0
+        self.loaded_at = None
+        self.generation = None
+
+    def reset(self):
+        """Forget every loaded entry, the next lookup rebuilds the filter."""
+        with self.lock:
+            self.filter = None
+            self.last_id = 0
+            self.loaded_at = None
+            self.generation = None
+
+    def refresh(self, force=False):
+        """Load blacklist rows added since the last refresh, if the blacklist changed since.
+
+        :param force: load new rows even if the generation did not change.
+        """
+        generation = get_generation()
+        with self.lock:
+            if not force and self.filter is not None and generation == self.generation:
+                return
+
+            if self.filter is None or self.filter.count >= self.filter.capacity:
+                self.filter = BloomFilter(
+                    max(settings.TOKEN_BLACKLIST_FILTER_CAPACITY, BlacklistedToken.objects.count() * 2),
+                    settings.TOKEN_BLACKLIST_FILTER_ERROR_RATE
+                )
+                self.last_id = 0
+                self.loaded_at = None
+
+            loaded_at = timezone.now()
+            rows = BlacklistedToken.objects.filter(id__gt=self.last_id)
+            if self.loaded_at is not None:
+                overlap = timedelta(seconds=settings.TOKEN_BLACKLIST_FILTER_OVERLAP)
+                rows = BlacklistedToken.objects.filter(
+                    Q(id__gt=self.last_id) | Q(blacklisted_at__gte=self.loaded_at - overlap)
+                )
+            for row_id, jti in rows.order_by('id').values_list('id', 'token__jti').iterator():
+                # Rows of the overlap are usually loaded already, skipped so they are not counted twice.
+                if jti not in self.filter:
+                    self.filter.add(jti)
+                self.last_id = max(self.last_id, row_id)
+
+            self.loaded_at = loaded_at
+            self.generation = generation
+
+    def might_contain(self, jti):
+        """Return False only if the token is certainly not blacklisted."""
+        self.refresh()
+        return jti in self.filter
+
+
+blacklist_filter = BlacklistFilter()
@@ -0,0 +1,20 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, register
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Require a cache shared by the worker processes in the production database profile.
+
+    Auth state, replica pins and cached profiles are invalidated through the default
+    cache, which a per process cache would only do in the worker that made the change.
+    """
+    if getattr(settings, 'DATABASE_PROFILE', None) != 'postgres' or not isinstance(caches['default'], LocMemCache):
+        return []
+    return [Error(
+        "The postgres profile needs a cache shared by all worker processes.",
+        hint="Set CACHE_BACKEND to database or redis.",
+        id='core.E001',
+    )]
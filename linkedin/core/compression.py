@@ -0,0 +1,157 @@
+import re
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ACCEPT_ENCODING = re.compile(r'\s*([A-Za-z0-9*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*')
+
+# Content types that are compressed already, compressing them again only costs CPU.
+COMPRESSED_TYPES = re.compile(
+    r'^(image/(?!svg)|video/|audio/|font/woff|application/(zip|gzip|x-gzip|x-bzip2|x-xz|x-7z-compressed|'
+    r'x-rar-compressed|zstd|pdf|octet-stream))'
+)
+
+
+class Codec:
+    """Base class of the codecs, streaming through the incremental compressor each one provides."""
+
+    name = None
+
+    def compress(self, data, level):
+        """Compress a whole body."""
+        raise NotImplementedError
+
+    def compressor(self, level):
+        """Return a function compressing and flushing one chunk, and a function ending the stream."""
+        raise NotImplementedError
+
+    def stream(self, chunks, level):
+        """Compress chunks as they come, flushing each one so clients can decode it right away."""
+        compress, finish = self.compressor(level)
+        for chunk in chunks:
+            data = compress(chunk)
+            if data:
+                yield data
+        yield finish()
+
+    async def astream(self, chunks, level):
+        """Async version of `stream`, for the async iterators of streaming responses served under ASGI."""
+        compress, finish = self.compressor(level)
+        async for chunk in chunks:
+            data = compress(chunk)
+            if data:
+                yield data
+        yield finish()
+
+
+class GzipCodec(Codec):
+    """gzip through zlib, always available."""
+
+    name = 'gzip'
+
+    def compress(self, data, level):
+        """Compress a whole body."""
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return compressor.compress(data) + compressor.flush()
+
+    def compressor(self, level):
+        """gzip chunks flushed with ``Z_SYNC_FLUSH``."""
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return lambda chunk: compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH), compressor.flush
+
+
+class BrotliCodec(Codec):
+    """Brotli, when the ``brotli`` package is installed."""
+
+    name = 'br'
+
+    def compress(self, data, level):
+        """Compress a whole body."""
+        return brotli.compress(data, quality=level)
+
+    def compressor(self, level):
+        """Flushed brotli chunks."""
+        compressor = brotli.Compressor(quality=level)
+        return lambda chunk: compressor.process(chunk) + compressor.flush(), compressor.finish
+
+
+class ZstdCodec(Codec):
+    """Zstandard, when the ``zstandard`` package is installed."""
+
+    name = 'zstd'
+
+    def compress(self, data, level):
+        """Compress a whole body."""
+        return zstandard.ZstdCompressor(level=level).compress(data)
+
+    def compressor(self, level):
+        """Zstandard chunks flushed block by block."""
+        compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+        def compress(chunk):
+            return compressor.compress(chunk) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return compress, compressor.flush
+
+
+def available_codecs():
+    """Codecs usable in this process by encoding name, in order of preference."""
+    codecs = {}
+    if zstandard is not None:
+        codecs['zstd'] = ZstdCodec()
+    if brotli is not None:
+        codecs['br'] = BrotliCodec()
+    codecs['gzip'] = GzipCodec()
+    return codecs
+
+
+CODECS = available_codecs()
+
+
+def parse_accept_encoding(header):
+    """Return the quality of each encoding listed in an ``Accept-Encoding`` header.
+
+    :param header: header value such as ``gzip, br;q=0.8, *;q=0``.
+    """
+    qualities = {}
+    for part in header.split(','):
+        match = ACCEPT_ENCODING.fullmatch(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+        qualities[match.group(1).lower()] = quality
+    return qualities
+
+
+def negotiate(header, enabled):
+    """Pick the codec to compress a response with, or None.
+
+    The client's highest quality wins, ties are broken by the order of `enabled`.
+
+    :param header: ``Accept-Encoding`` of the request.
+    :param enabled: encoding names the server may use, in order of preference.
+    """
+    qualities = parse_accept_encoding(header)
+    wildcard = qualities.get('*', 0)
+    best, best_quality = None, 0
+    for name in enabled:
+        codec = CODECS.get(name)
+        quality = qualities.get(name, wildcard)
+        if codec is not None and quality > best_quality:
+            best, best_quality = codec, quality
+    return best
+
+
+def is_compressed_type(content_type):
+    """Return whether a content type is compressed already."""
+    return bool(COMPRESSED_TYPES.match(content_type.split(';')[0].strip().lower()))
@@ -0,0 +1,23 @@
+from django.db import models
+from django.db.models.expressions import OrderBy
+
+
+class NullsLastIndex(models.Index):
+    """Index on expressions sorted with ``F(field).desc(nulls_last=True)``, matching the same ordering.
+
+    SQLite already sorts NULLs last in descending order and rejects ``NULLS LAST``
+    in an index, so there the modifier is left out of descending expressions.
+    """
+
+    def create_sql(self, model, schema_editor, using="", **kwargs):
+        """Index creation statement, without ``NULLS LAST`` on SQLite."""
+        if schema_editor.connection.vendor != 'sqlite':
+            return super().create_sql(model, schema_editor, using=using, **kwargs)
+
+        index = self.clone()
+        index.expressions = tuple(
+            OrderBy(expression.expression, descending=True)
+            if isinstance(expression, OrderBy) and expression.descending and expression.nulls_last else expression
+            for expression in self.expressions
+        )
+        return super(NullsLastIndex, index).create_sql(model, schema_editor, using=using, **kwargs)
@@ -0,0 +1,31 @@
+from django.db.migrations.operations import AddIndex
+
+
+class AddIndexConcurrently(AddIndex):
+    """Add an index without locking writes on Postgres, falling back to a plain index elsewhere.
+
+    Migrations using it must set ``atomic = False``, as Postgres cannot build an index
+    concurrently inside a transaction.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        """Build the index, concurrently on Postgres."""
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+        model = to_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.add_index(model, self.index, concurrently=True)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        """Drop the index, concurrently on Postgres."""
+        if schema_editor.connection.vendor != 'postgresql':
+            return super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+        model = from_state.apps.get_model(app_label, self.model_name)
+        if self.allow_migrate_model(schema_editor.connection.alias, model):
+            schema_editor.remove_index(model, self.index, concurrently=True)
+
+    def describe(self):
+        """Describe the operation for migration output."""
+        return f"Concurrently create index {self.index.name} on {self.model_name}"
@@ -0,0 +1,34 @@
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connection, transaction
+
+
+def is_busy_error(exc):
+    """Whether an OperationalError means SQLite could not get its lock in time."""
+    message = str(exc).lower()
+    return 'database is locked' in message or 'database is busy' in message
+
+
+def retry_on_busy(func):
+    """Run the wrapped function in a transaction, retrying it when the database is busy.
+
+    Retries back off exponentially with jitter, up to ``DATABASE_BUSY_RETRIES``
+    attempts. Nothing is retried inside an outer atomic block, since the outer
+    transaction is already broken at that point.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        attempts = settings.DATABASE_BUSY_RETRIES
+        for attempt in range(attempts):
+            try:
+                with transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as exc:
+                if not is_busy_error(exc) or connection.in_atomic_block or attempt == attempts - 1:
+                    raise
+                time.sleep(0.01 * 2 ** attempt * (1 + random.random()))
+
+    return wrapper
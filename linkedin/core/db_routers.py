@@ -0,0 +1,75 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.utils.functional import SimpleLazyObject
+
+REPLICA_ALIAS = 'replica'
+# App label of the model behind Django's database cache backend.
+CACHE_APP_LABEL = 'django_cache'
+PIN_PRIMARY_CACHE_KEY = 'pin-primary:{user_id}'
+
+# Request being served in the current thread or task, set by `ReplicaRoutingMiddleware`.
+current_request = ContextVar('current_request', default=None)
+
+
+def pin_primary(user_id):
+    """Send the user's reads to the primary for ``REPLICA_STICKY_SECONDS`` after a write.
+
+    The pin is kept in the default cache, which the postgres profile requires to be
+    shared by the workers (check ``core.E001``), so it holds whichever worker serves
+    the user's next request.
+
+    :param user_id: primary key of the user who wrote.
+    """
+    cache.set(PIN_PRIMARY_CACHE_KEY.format(user_id=user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def replica_allowed(request):
+    """Whether reads of this request may be served by the replica.
+
+    Only safe requests to list and retrieve views qualify, and only if the
+    authenticated user has not written within the stickiness window. The
+    stickiness lookup is done once per request, after authentication ran.
+
+    :param request: Django HTTP request.
+    """
+    if not getattr(request, 'replica_view', False):
+        return False
+
+    if not hasattr(request, 'replica_pinned'):
+        user = request.__dict__.get('user')
+        if user is None or type(user) is SimpleLazyObject:
+            # DRF has not authenticated the request yet, keep its own lookups on the primary.
+            return False
+        request.replica_pinned = user.is_authenticated and bool(
+            cache.get(PIN_PRIMARY_CACHE_KEY.format(user_id=user.pk))
+        )
+
+    return not request.replica_pinned
+
+
+class PrimaryReplicaRouter:
+    """Route safe list and retrieve reads to the replica and everything else to the primary."""
+
+    def db_for_read(self, model, **hints):
+        """Return the replica alias when configured and allowed for the current request.
+
+        The database cache table always reads from the primary, as cache entries
+        written by another worker must be seen at once.
+        """
+        if model._meta.app_label == CACHE_APP_LABEL:
+            return 'default'
+        request = current_request.get()
+        if request is not None and REPLICA_ALIAS in connections.settings and replica_allowed(request):
+            return REPLICA_ALIAS
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        """All writes go to the primary."""
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        """Primary and replica hold the same data, so relations between them are fine."""
+        return True
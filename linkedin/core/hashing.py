@@ -0,0 +1,117 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import hashers
+
+from .metrics import QUEUE_DEPTH
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _init_worker(settings_module):
+    """Configure Django in a pool process started with the spawn method.
+
+    :param settings_module: settings module of the parent process.
+    """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+
+    import django
+    django.setup()
+
+
+def get_executor():
+    """Return the process pool used for password hashing, creating it on first use."""
+    global _executor
+
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # Spawned rather than forked, as the web worker may already run threads and hold connections.
+                _executor = ProcessPoolExecutor(
+                    max_workers=settings.PASSWORD_HASHING_WORKERS,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'linkedin.settings'),)
+                )
+    return _executor
+
+
+def shutdown():
+    """Stop the pool processes, a new pool is created on next use."""
+    global _executor
+
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+
+def submit(fn, *args):
+    """Submit a call to the pool, counted in the queue depth until it completes.
+
+    :returns: future of the call.
+    """
+    QUEUE_DEPTH.inc(queue='password_hashing')
+    future = get_executor().submit(fn, *args)
+    future.add_done_callback(lambda _: QUEUE_DEPTH.dec(queue='password_hashing'))
+    return future
+
+
+def _verify(password, encoded):
+    """Check a password in a pool process, returning whether it matched and needs rehashing."""
+    if not hashers.check_password(password, encoded):
+        return False, False
+    return True, hashers.identify_hasher(encoded).must_update(encoded)
+
+
+def make_password(password):
+    """Hash a password in the pool, blocking the caller until done.
+
+    :param password: raw password.
+    :returns: encoded password hash ready to be stored on the user.
+    """
+    if not settings.PASSWORD_HASHING_WORKERS:
+        return hashers.make_password(password)
+    return submit(hashers.make_password, password).result()
+
+
+def make_passwords(passwords):
+    """Hash many passwords in parallel across the pool.
+
+    :param passwords: iterable of raw passwords, None gives an unusable password.
+    :returns: list of encoded password hashes in input order.
+    """
+    if not settings.PASSWORD_HASHING_WORKERS:
+        return [hashers.make_password(password) for password in passwords]
+    return [future.result() for future in [submit(hashers.make_password, password) for password in passwords]]
+
+
+def check_password(password, encoded):
+    """Verify a password in the pool, blocking the caller until done.
+
+    :param password: raw password.
+    :param encoded: stored password hash.
+    :returns: tuple of whether the password matched and whether the hash should be upgraded.
+    """
+    if not settings.PASSWORD_HASHING_WORKERS:
+        return _verify(password, encoded)
+    return submit(_verify, password, encoded).result()
+
+
+async def amake_password(password):
+    """Async version of `make_password` that awaits the pool without blocking the event loop."""
+    if not settings.PASSWORD_HASHING_WORKERS:
+        return hashers.make_password(password)
+    return await asyncio.wrap_future(submit(hashers.make_password, password))
+
+
+async def acheck_password(password, encoded):
+    """Async version of `check_password` that awaits the pool without blocking the event loop."""
+    if not settings.PASSWORD_HASHING_WORKERS:
+        return _verify(password, encoded)
+    return await asyncio.wrap_future(submit(_verify, password, encoded))
@@ -0,0 +1,127 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.backends.signals import connection_created
+
+# Metrics of the request being served in the current thread or task.
+current_metrics = ContextVar('current_metrics', default=None)
+
+# Timed subclasses of the serializer classes, see `timed_serializer_class`.
+_timed_classes = {}
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a view runs more queries than its declared budget while budgets are enforced."""
+
+
+class RequestMetrics:
+    """Query count, database time and serializer time collected for one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.serializer_depth = 0
+        self.serializer = None
+
+    @property
+    def total_time(self):
+        """Seconds since the request started."""
+        return time.perf_counter() - self.started
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper adding each query to the current request metrics."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.query_count += 1
+        metrics.db_time += time.perf_counter() - started
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    """Add `record_query` to every new database connection."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+@contextmanager
+def serializing(serializer):
+    """Add the time spent in the block to the serializer time of the current request.
+
+    Only the outermost serializer is timed, nested serializers are part of its time.
+    Its class, or the class of its items for a list, is kept as the serializer
+    running while queries are issued.
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+
+    metrics.serializer_depth += 1
+    if metrics.serializer_depth == 1:
+        metrics.serializer = type(getattr(serializer, 'child', serializer)).__name__
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.serializer_depth -= 1
+        if not metrics.serializer_depth:
+            metrics.serializer_time += time.perf_counter() - started
+            metrics.serializer = None
+
+
+def timed_serializer_class(serializer_class):
+    """Return a subclass of `serializer_class` whose ``data`` runs under `serializing`, cached per class."""
+    timed = _timed_classes.get(serializer_class)
+    if timed is None:
+        class timed(serializer_class):
+            @property
+            def data(self):
+                with serializing(self):
+                    return super().data
+
+        timed.__name__, timed.__qualname__ = serializer_class.__name__, serializer_class.__qualname__
+        timed.__module__ = serializer_class.__module__
+        _timed_classes[serializer_class] = timed
+    return timed
+
+
+class SerializerTimingMixin:
+    """Generic view mixin adding the time spent building serializer ``data`` to the request metrics."""
+
+    def get_serializer(self, *args, **kwargs):
+        """Return the serializer, its ``data`` timed."""
+        serializer = super().get_serializer(*args, **kwargs)
+        serializer.__class__ = timed_serializer_class(type(serializer))
+        return serializer
+
+
+def install():
+    """Start recording queries, called once from `CoreConfig.ready`."""
+    connection_created.connect(install_query_recorder, dispatch_uid='core.instrumentation')
+
+
+def get_query_budget(view_func, method):
+    """Return the query budget declared on a view for a method, or None.
+
+    Views declare ``query_budget`` as a number, or as a dict keyed by viewset action
+    or lower case HTTP method.
+
+    :param view_func: resolved view callable.
+    :param method: HTTP method of the request.
+    """
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    budget = getattr(view_class, 'query_budget', None)
+    if not isinstance(budget, dict):
+        return budget
+
+    actions = getattr(view_func, 'actions', None) or {}
+    return budget.get(actions.get(method.lower()), budget.get(method.lower()))
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
+
+
+class Command(BaseCommand):
+    """Purge expired outstanding and blacklisted tokens in batches.
+
+    Meant to be scheduled periodically (e.g. hourly from cron) so the token tables
+    stay small and blacklist lookups stay cheap.
+    """
+
+    help = "Purges expired outstanding and blacklisted tokens in batches."
+
+    def add_arguments(self, parser):
+        """Command line arguments of the command."""
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows deleted per batch.")
+
+    def handle(self, *args, **options):
+        """Delete expired tokens batch by batch, each batch in its own short statements."""
+        batch_size = options['batch_size']
+        now = timezone.now()
+        purged = 0
+
+        while True:
+            token_ids = list(
+                OutstandingToken.objects.filter(expires_at__lte=now).values_list('id', flat=True)[:batch_size]
+            )
+            if not token_ids:
+                break
+
+            BlacklistedToken.objects.filter(token_id__in=token_ids).delete()
+            OutstandingToken.objects.filter(id__in=token_ids).delete()
+            purged += len(token_ids)
+
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} expired tokens."))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from core.models import UserProfile
+from core.profile_documents import rebuild_document
+
+
+class Command(BaseCommand):
+    """Build the stored documents of profiles that are missing or stale.
+
+    Covers profiles created in bulk without signals, and rebuilds lost on exit or
+    failed in the background. Meant to be run periodically.
+    """
+
+    help = "Rebuilds stored profile documents, only the missing and stale ones unless --all is given."
+
+    def add_arguments(self, parser):
+        """Command line arguments of the command."""
+        parser.add_argument(
+            '--all', action='store_true', help="Rebuild every document, not only missing and stale ones."
+        )
+
+    def handle(self, *args, **options):
+        """Rebuild the documents one profile at a time."""
+        profiles = UserProfile.objects.order_by('pk')
+        if not options['all']:
+            profiles = profiles.filter(Q(document__isnull=True) | Q(document__version__gt=F('document__built_version')))
+
+        rebuilt = 0
+        for profile_id in profiles.values_list('pk', flat=True).iterator():
+            rebuilt += rebuild_document(profile_id) is not None
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} profile documents."))
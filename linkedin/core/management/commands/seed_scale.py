@@ -0,0 +1,284 @@
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth import hashers
+from django.core.management.base import BaseCommand
+from django.core.management.color import no_style
+from django.db import connection, connections
+from django.db.models import Max
+
+from core.db.utils import retry_on_busy
+from core.hashing import _init_worker
+from core.models import CustomUser, UserProfile, Follow
+from feed.models import Post, ReactionType, PostReaction, Comment, CommentReply
+from job.models import JobPost, Tag, JobApplication
+
+# Models given explicit primary keys, their sequences are reset once seeding is done.
+SEEDED_MODELS = [CustomUser, UserProfile, Post, Comment, JobPost]
+
+
+def skewed_count(rng, mean, limit):
+    """Draw a heavy tailed count with the given mean, capped at `limit`.
+
+    Uses a Pareto distribution with shape 2, whose mean is twice its scale, so most
+    draws are small and a few are very large, like follower counts or viral posts.
+    """
+    return min(limit, int(mean / 2 * rng.paretovariate(2)))
+
+
+def skewed_index(rng, size, skew=3):
+    """Pick an index in ``range(size)`` following a power law, low indexes being the popular ones."""
+    return int(size * rng.random() ** skew)
+
+
+def sample_distinct(rng, size, count, exclude=None):
+    """Pick up to `count` distinct power law indexes in ``range(size)``, leaving out `exclude`."""
+    picked = set()
+    for _ in range(count * 2):
+        if len(picked) >= count:
+            break
+        index = skewed_index(rng, size)
+        if index != exclude:
+            picked.add(index)
+    return picked
+
+
+def seed_users(rng, plan, start, stop):
+    """Users and their profiles with ids ``start`` to ``stop`` of the run."""
+    ids = plan['ids']
+    users = [
+        CustomUser(
+            id=ids['user'] + i, email=f'seed{ids["user"] + i}@example.com', username=f'seed{ids["user"] + i}',
+            password=plan['password'],
+        )
+        for i in range(start, stop)
+    ]
+    CustomUser.objects.bulk_create(users, batch_size=plan['batch_size'])
+    UserProfile.objects.bulk_create(
+        [UserProfile(id=ids['profile'] + i, user_id=ids['user'] + i) for i in range(start, stop)],
+        batch_size=plan['batch_size']
+    )
+    return {'users': len(users)}
+
+
+def seed_follows(rng, plan, start, stop):
+    """Power law follow graph for the followers ``start`` to ``stop``, popular profiles gather most follows."""
+    profiles, base = plan['users'], plan['ids']['profile']
+    follows = [
+        Follow(follower_id=base + follower, following_id=base + following)
+        for follower in range(start, stop)
+        for following in sample_distinct(rng, profiles, skewed_count(rng, plan['follows'], profiles - 1), follower)
+    ]
+    Follow.objects.bulk_create(follows, batch_size=plan['batch_size'], ignore_conflicts=True)
+    return {'follows': len(follows)}
+
+
+def seed_posts(rng, plan, start, stop):
+    """Posts ``start`` to ``stop`` with their reactions, owned mostly by the most active profiles."""
+    profiles, ids = plan['users'], plan['ids']
+    posts = [
+        Post(id=ids['post'] + i, post_owner_id=ids['profile'] + skewed_index(rng, profiles), text_body=f'Post {i}')
+        for i in range(start, stop)
+    ]
+    Post.objects.bulk_create(posts, batch_size=plan['batch_size'])
+
+    reactions = [
+        PostReaction(
+            post_id=post.id, reaction_by_id=ids['profile'] + profile,
+            reaction_type_id=rng.choice(plan['reaction_types']),
+        )
+        for post in posts
+        for profile in rng.sample(range(profiles), skewed_count(rng, plan['reactions'], profiles))
+    ]
+    PostReaction.objects.bulk_create(reactions, batch_size=plan['batch_size'])
+    return {'posts': len(posts), 'reactions': len(reactions)}
+
+
+def seed_comments(rng, plan, start, stop):
+    """Comments ``start`` to ``stop`` and their replies, concentrated on the popular posts."""
+    ids = plan['ids']
+    comments = [
+        Comment(
+            id=ids['comment'] + i, post_id=ids['post'] + skewed_index(rng, plan['posts']),
+            comment_owner_id=ids['profile'] + rng.randrange(plan['users']), text=f'Comment {i}'
+        )
+        for i in range(start, stop)
+    ]
+    for comment in comments:
+        comment.reply_count = skewed_count(rng, plan['replies'], plan['users'])
+    Comment.objects.bulk_create(comments, batch_size=plan['batch_size'])
+
+    replies = [
+        CommentReply(comment_id=comment.id, reply_owner_id=ids['profile'] + rng.randrange(plan['users']), text='Reply')
+        for comment in comments
+        for _ in range(comment.reply_count)
+    ]
+    CommentReply.objects.bulk_create(replies, batch_size=plan['batch_size'])
+    return {'comments': len(comments), 'replies': len(replies)}
+
+
+def seed_jobs(rng, plan, start, stop):
+    """Job posts ``start`` to ``stop`` with their tags and applications."""
+    profiles, ids = plan['users'], plan['ids']
+    jobs = [
+        JobPost(
+            id=ids['job'] + i, title=f'Job {i}', description='Job description',
+            recruiter_id=ids['profile'] + skewed_index(rng, profiles)
+        )
+        for i in range(start, stop)
+    ]
+    JobPost.objects.bulk_create(jobs, batch_size=plan['batch_size'])
+
+    tags = plan['tags']
+    JobPost.tags.through.objects.bulk_create([
+        JobPost.tags.through(jobpost_id=job.id, tag_id=tags[index])
+        for job in jobs if tags
+        for index in sample_distinct(rng, len(tags), rng.randint(1, min(5, len(tags))))
+    ], batch_size=plan['batch_size'])
+
+    applications = [
+        JobApplication(job_id=job.id, applicant_id=ids['profile'] + profile)
+        for job in jobs
+        for profile in rng.sample(range(profiles), skewed_count(rng, plan['applications'], profiles))
+    ]
+    JobApplication.objects.bulk_create(applications, batch_size=plan['batch_size'])
+    return {'jobs': len(jobs), 'applications': len(applications)}
+
+
+PHASES = [
+    ('users', seed_users),
+    ('follows', seed_follows),
+    ('posts', seed_posts),
+    ('comments', seed_comments),
+    ('jobs', seed_jobs),
+]
+
+
+def run_chunk(phase, plan, start, stop):
+    """Seed one chunk of a phase in a transaction.
+
+    The random generator is derived from the seed, phase and chunk, so the data does
+    not depend on the number of workers or the order chunks complete in.
+    """
+    rng = random.Random(f"{plan['seed']}:{phase}:{start}")
+    return retry_on_busy(dict(PHASES)[phase])(rng, plan, start, stop)
+
+
+class Command(BaseCommand):
+    """Generate a large synthetic dataset to measure performance against.
+
+    Rows are bulk created in chunks spread over worker processes. Primary keys are
+    assigned up front from the current maximum, so chunks never need to read back
+    what other chunks wrote and the same seed always yields the same data.
+    """
+
+    help = "Generates users, a power law follow graph, posts with reactions, comments, replies and jobs."
+
+    def add_arguments(self, parser):
+        """Command line arguments of the command."""
+        parser.add_argument('--users', type=int, default=10000, help="Users created, each with a profile.")
+        parser.add_argument('--follows', type=float, default=50, help="Mean follows per user.")
+        parser.add_argument('--posts', type=int, default=50000, help="Posts created.")
+        parser.add_argument('--reactions', type=float, default=20, help="Mean reactions per post.")
+        parser.add_argument('--comments', type=int, default=100000, help="Comments created.")
+        parser.add_argument('--replies', type=float, default=1, help="Mean replies per comment.")
+        parser.add_argument('--jobs', type=int, default=2000, help="Job posts created.")
+        parser.add_argument('--tags', type=int, default=200, help="Tags the job posts are tagged with.")
+        parser.add_argument('--applications', type=float, default=10, help="Mean applications per job post.")
+        parser.add_argument('--batch-size', type=int, default=5000, help="Rows per bulk insert statement.")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Parent rows per worker task.")
+        parser.add_argument('--workers', type=int, default=os.cpu_count(), help="Worker processes, 0 seeds inline.")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed, the same seed gives the same data.")
+        parser.add_argument('--password', default='password', help="Password of every generated user.")
+
+    def handle(self, *args, **options):
+        """Seed every phase in order, each phase spread over the workers."""
+        plan = self.make_plan(options)
+        counts = {
+            'users': options['users'], 'follows': options['users'], 'posts': options['posts'],
+            'comments': options['comments'] if options['posts'] else 0, 'jobs': options['jobs'],
+        }
+        if not options['users']:
+            counts = dict.fromkeys(counts, 0)
+        totals = {}
+        executor = None
+        if options['workers']:
+            connections.close_all()
+            executor = ProcessPoolExecutor(
+                max_workers=options['workers'], mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker, initargs=(os.environ.get('DJANGO_SETTINGS_MODULE', 'linkedin.settings'),)
+            )
+
+        try:
+            for phase, _ in PHASES:
+                started = time.perf_counter()
+                chunks = [
+                    (phase, plan, start, min(start + options['chunk_size'], counts[phase]))
+                    for start in range(0, counts[phase], options['chunk_size'])
+                ]
+                if executor:
+                    results = executor.map(run_chunk, *zip(*chunks)) if chunks else []
+                else:
+                    results = [run_chunk(*chunk) for chunk in chunks]
+
+                for result in results:
+                    for name, count in result.items():
+                        totals[name] = totals.get(name, 0) + count
+                self.stdout.write(f"Seeded {phase} in {time.perf_counter() - started:.1f}s")
+        finally:
+            if executor:
+                executor.shutdown()
+
+        self.reset_sequences()
+        self.stdout.write(self.style.SUCCESS(
+            "Created " + ", ".join(f"{count} {name}" for name, count in totals.items()) + "."
+        ))
+
+    def make_plan(self, options):
+        """Shared parameters of the run: counts, first primary key of each model and lookup rows.
+
+        :param options: parsed command line options.
+        :return: picklable dict handed to every chunk.
+        """
+        reaction_types = [
+            ReactionType.objects.get_or_create(type=value)[0].id for value, _ in ReactionType.REACTION_TYPE_CHOICES
+        ]
+        Tag.objects.bulk_create([Tag(name=f'tag-{i}') for i in range(options['tags'])], ignore_conflicts=True)
+        tags = list(Tag.objects.filter(name__startswith='tag-').values_list('id', flat=True)[:options['tags']])
+
+        return {
+            'seed': options['seed'],
+            'batch_size': options['batch_size'],
+            'password': hashers.make_password(options['password']),
+            'users': options['users'],
+            'posts': options['posts'],
+            'follows': options['follows'],
+            'reactions': options['reactions'],
+            'replies': options['replies'],
+            'applications': options['applications'],
+            'reaction_types': reaction_types,
+            'tags': tags,
+            'ids': {
+                'user': self.next_id(CustomUser),
+                'profile': self.next_id(UserProfile),
+                'post': self.next_id(Post),
+                'comment': self.next_id(Comment),
+                'job': self.next_id(JobPost),
+            },
+        }
+
+    @staticmethod
+    def next_id(model):
+        """First free primary key of a model."""
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    @staticmethod
+    def reset_sequences():
+        """Move primary key sequences past the explicitly assigned ids, a no-op on SQLite."""
+        statements = connection.ops.sequence_reset_sql(no_style(), SEEDED_MODELS)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
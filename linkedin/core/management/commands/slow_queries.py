@@ -0,0 +1,65 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Avg, Count, Max, Sum
+from django.utils import timezone
+
+from core.models import SlowQuery
+
+ORDERINGS = {'total': 'total', 'count': 'count', 'max': 'max_duration', 'avg': 'avg_duration'}
+
+
+class Command(BaseCommand):
+    """Report the slow query log grouped by query fingerprint.
+
+    Each group shows how often the query was slow and for how long, the views and
+    serializers that issued it, its normalized SQL and, with ``--plans``, the
+    latest captured plan.
+    """
+
+    help = "Reports slow queries grouped by fingerprint, worst first."
+
+    def add_arguments(self, parser):
+        """Command line arguments of the command."""
+        parser.add_argument('--hours', type=float, default=24, help="Only include queries of the last hours.")
+        parser.add_argument('--limit', type=int, default=20, help="Number of fingerprints reported.")
+        parser.add_argument('--order', choices=ORDERINGS, default='total', help="Ranking of the fingerprints.")
+        parser.add_argument('--view', help="Only include queries issued by this view.")
+        parser.add_argument('--plans', action='store_true', help="Show the latest plan of each fingerprint.")
+        parser.add_argument('--purge', action='store_true', help="Delete entries older than --hours instead.")
+
+    def handle(self, *args, **options):
+        """Print the report, or purge old entries."""
+        since = timezone.now() - timedelta(hours=options['hours'])
+        if options['purge']:
+            deleted, _ = SlowQuery.objects.filter(created_at__lt=since).delete()
+            self.stdout.write(self.style.SUCCESS(f"Purged {deleted} slow queries."))
+            return
+
+        entries = SlowQuery.objects.filter(created_at__gte=since)
+        if options['view']:
+            entries = entries.filter(view_name=options['view'])
+
+        groups = entries.values('fingerprint').annotate(
+            count=Count('id'), total=Sum('duration'), avg_duration=Avg('duration'), max_duration=Max('duration'),
+        ).order_by(f"-{ORDERINGS[options['order']]}")[:options['limit']]
+
+        if not groups:
+            self.stdout.write("No slow queries recorded.")
+            return
+
+        for rank, group in enumerate(groups, 1):
+            group_entries = entries.filter(fingerprint=group['fingerprint'])
+            latest = group_entries.latest('created_at')
+            origins = group_entries.values_list('view_name', 'serializer').annotate(count=Count('id')).order_by('-count')
+
+            self.stdout.write(self.style.MIGRATE_HEADING(
+                f"#{rank} {group['fingerprint']}  count {group['count']}  total {group['total']:.1f} ms  "
+                f"avg {group['avg_duration']:.1f} ms  max {group['max_duration']:.1f} ms"
+            ))
+            for view_name, serializer, count in origins:
+                self.stdout.write(f"   {count:>6}x {view_name or '-'} {serializer or ''}".rstrip())
+            self.stdout.write(f"   {latest.normalized_sql}")
+            if options['plans'] and latest.plan:
+                for line in latest.plan.splitlines():
+                    self.stdout.write(f"   | {line}")
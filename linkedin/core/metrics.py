@@ -0,0 +1,316 @@
+import bisect
+import fcntl
+import glob
+import json
+import math
+import mmap
+import os
+import struct
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+
+# Metrics by name, in the order they are rendered.
+REGISTRY = {}
+
+
+class MmapDict:
+    """Float values by string key, stored in a memory mapped file written by a single process.
+
+    The file starts with the number of bytes in use, followed by entries of a key
+    length, the UTF-8 key padded to 8 bytes and a double. Entries are appended and
+    the used size is written last, so other processes reading the file never see
+    a half written entry, and values are aligned doubles updated in place.
+    """
+
+    initial_size = 1 << 16
+    header = struct.Struct('<i4x')
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, 'a+b')
+        size = os.fstat(self._file.fileno()).st_size
+        if size == 0:
+            self._file.truncate(self.initial_size)
+            size = self.initial_size
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+        self._used = self.header.unpack_from(self._mmap)[0] or self.header.size
+        self._positions = {key: position for key, _, position in self.parse(self._mmap)}
+
+    @classmethod
+    def parse(cls, data):
+        """Yield the key, value and value offset of every entry in file contents."""
+        used = cls.header.unpack_from(data)[0]
+        position = cls.header.size
+        while position < used:
+            length = struct.unpack_from('<i', data, position)[0]
+            key = bytes(data[position + 4:position + 4 + length]).decode()
+            position += 4 + length + (-(4 + length) % 8)
+            yield key, struct.unpack_from('<d', data, position)[0], position
+            position += 8
+
+    @classmethod
+    def read(cls, path):
+        """Return the items of a file written by any process, without mapping it."""
+        with open(path, 'rb') as metrics_file:
+            data = metrics_file.read()
+        if len(data) < cls.header.size:
+            return []
+        return [(key, value) for key, value, _ in cls.parse(data)]
+
+    def _position(self, key):
+        """Offset of the value of a key, appending a zero valued entry for a new key."""
+        position = self._positions.get(key)
+        if position is not None:
+            return position
+
+        encoded = key.encode()
+        entry = struct.pack('<i', len(encoded)) + encoded + b' ' * (-(4 + len(encoded)) % 8) + struct.pack('<d', 0)
+        while self._used + len(entry) > len(self._mmap):
+            size = len(self._mmap) * 2
+            self._mmap.close()
+            self._file.truncate(size)
+            self._mmap = mmap.mmap(self._file.fileno(), size)
+
+        self._mmap[self._used:self._used + len(entry)] = entry
+        self._used += len(entry)
+        self.header.pack_into(self._mmap, 0, self._used)
+        self._positions[key] = self._used - 8
+        return self._used - 8
+
+    def increment(self, key, amount):
+        """Add to the value of a key."""
+        with self._lock:
+            position = self._position(key)
+            value = struct.unpack_from('<d', self._mmap, position)[0]
+            struct.pack_into('<d', self._mmap, position, value + amount)
+
+    def set(self, key, value):
+        """Replace the value of a key."""
+        with self._lock:
+            struct.pack_into('<d', self._mmap, self._position(key), value)
+
+    def close(self):
+        """Unmap and close the file."""
+        self._mmap.close()
+        self._file.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the metrics file of the current process, opening a new one after a fork."""
+    global _store
+
+    path = os.path.join(settings.METRICS_DIR, f'metrics-{os.getpid()}.db')
+    if _store is None or _store.path != path:
+        with _store_lock:
+            if _store is None or _store.path != path:
+                os.makedirs(settings.METRICS_DIR, exist_ok=True)
+                _store = MmapDict(path)
+    return _store
+
+
+class Metric:
+    """Base class of the metric types, registered by name on creation."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        REGISTRY[name] = self
+
+    def key(self, sample, labels, bound=None):
+        """Store key of a sample with the given labels, and the upper bound of a histogram bucket."""
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}.")
+        items = sorted(labels.items()) + ([('le', bound)] if bound is not None else [])
+        return json.dumps([self.name, sample, items])
+
+    def samples(self, values):
+        """Yield sample names, labels and values to render from values summed across processes."""
+        for (sample, labels), value in sorted(values.items()):
+            yield sample, labels, value
+
+
+class Counter(Metric):
+    """Monotonically increasing count, summed across processes."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        """Add to the counter."""
+        get_store().increment(self.key(self.name, labels), amount)
+
+
+class Gauge(Metric):
+    """Value that goes up and down, summed across the processes still running."""
+
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        """Add to the gauge."""
+        get_store().increment(self.key(self.name, labels), amount)
+
+    def dec(self, amount=1, **labels):
+        """Subtract from the gauge."""
+        get_store().increment(self.key(self.name, labels), -amount)
+
+    def set(self, value, **labels):
+        """Set the value this process contributes to the gauge."""
+        get_store().set(self.key(self.name, labels), value)
+
+
+class Histogram(Metric):
+    """Distribution of observed values in cumulative buckets, summed across processes."""
+
+    kind = 'histogram'
+    default_buckets = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+
+    def __init__(self, name, documentation, labelnames=(), buckets=None):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets or self.default_buckets) + (math.inf,)
+
+    def observe(self, value, **labels):
+        """Count a value in its bucket and add it to the sum."""
+        store = get_store()
+        bound = self.buckets[bisect.bisect_left(self.buckets, value)]
+        store.increment(self.key(f'{self.name}_bucket', labels, bound), 1)
+        store.increment(self.key(f'{self.name}_count', labels), 1)
+        store.increment(self.key(f'{self.name}_sum', labels), value)
+
+    def samples(self, values):
+        """Yield every bucket of each label set as a cumulative count, then its sum and count."""
+        series = defaultdict(dict)
+        for (sample, labels), value in values.items():
+            base = tuple(item for item in labels if item[0] != 'le')
+            bound = dict(labels).get('le')
+            series[base][bound if sample.endswith('_bucket') else sample] = value
+
+        for labels, points in sorted(series.items()):
+            cumulative = 0.0
+            for bound in self.buckets:
+                cumulative += points.get(bound, 0)
+                yield f'{self.name}_bucket', labels + (('le', format_bound(bound)),), cumulative
+            yield f'{self.name}_sum', labels, points.get(f'{self.name}_sum', 0.0)
+            yield f'{self.name}_count', labels, points.get(f'{self.name}_count', 0.0)
+
+
+def format_bound(bound):
+    """Bucket bound as written in the ``le`` label."""
+    return '+Inf' if bound == math.inf else repr(float(bound))
+
+
+def is_alive(pid):
+    """Return whether a process is still running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+@contextmanager
+def directory_lock(exclusive=False):
+    """Lock the metrics directory, shared to read the files and exclusive to fold a file into the archive."""
+    os.makedirs(settings.METRICS_DIR, exist_ok=True)
+    with open(os.path.join(settings.METRICS_DIR, 'metrics.lock'), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        yield
+
+
+def mark_process_dead(pid):
+    """Fold the counters and histograms of an exited process into the archive file and delete its file.
+
+    Its gauges are dropped. Meant for the worker exit hook of the server, such as
+    gunicorn's ``child_exit``. `collect` also calls it for the files of processes
+    that are gone, so files do not pile up when workers are recycled.
+
+    :param pid: id of the exited process.
+    """
+    path = os.path.join(settings.METRICS_DIR, f'metrics-{pid}.db')
+    with directory_lock(exclusive=True):
+        if not os.path.exists(path):
+            return
+        archive = MmapDict(os.path.join(settings.METRICS_DIR, 'archive.db'))
+        try:
+            for key, value in MmapDict.read(path):
+                metric = REGISTRY.get(json.loads(key)[0])
+                if metric is None or metric.kind != 'gauge':
+                    archive.increment(key, value)
+        finally:
+            archive.close()
+        os.remove(path)
+
+
+def collect():
+    """Sum the samples of the archive and every process file by metric, dropping gauges of exited processes.
+
+    Files of exited processes are folded into the archive once read.
+
+    :return: dict of metric name to ``{(sample, labels): value}``.
+    """
+    values = defaultdict(lambda: defaultdict(float))
+    dead = []
+    with directory_lock():
+        paths = glob.glob(os.path.join(settings.METRICS_DIR, 'metrics-*.db'))
+        archive = os.path.join(settings.METRICS_DIR, 'archive.db')
+        for path in paths + ([archive] if os.path.exists(archive) else []):
+            pid = int(os.path.basename(path)[len('metrics-'):-len('.db')]) if path != archive else None
+            alive = pid is None or is_alive(pid)
+            if not alive:
+                dead.append(pid)
+            for key, value in MmapDict.read(path):
+                name, sample, labels = json.loads(key)
+                metric = REGISTRY.get(name)
+                if metric is None or metric.kind == 'gauge' and not alive:
+                    continue
+                values[name][(sample, tuple((label, label_value) for label, label_value in labels))] += value
+
+    for pid in dead:
+        mark_process_dead(pid)
+    return values
+
+
+def escape(value):
+    """Escape a label value for the text format."""
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def render():
+    """Return every metric in the Prometheus text exposition format."""
+    values = collect()
+    lines = []
+    for name, metric in REGISTRY.items():
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        for sample, labels, value in metric.samples(values.get(name, {})):
+            label_text = ','.join(f'{label}="{escape(label_value)}"' for label, label_value in labels)
+            lines.append(f'{sample}{{{label_text}}} {value!r}' if label_text else f'{sample} {value!r}')
+    return '\n'.join(lines) + '\n'
+
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', "Time to serve a request, by resolved view and method.", ['view', 'method']
+)
+DB_QUERIES = Counter('db_queries_total', "Database queries run while serving requests.", ['view', 'method'])
+CACHE_REQUESTS = Counter('cache_requests_total', "Cache lookups by cache and hit or miss.", ['cache', 'result'])
+NOTIFICATION_FANOUT = Histogram(
+    'notification_fanout_size', "Notifications created for one new post.",
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+)
+QUEUE_DEPTH = Gauge('background_queue_depth', "Tasks waiting or running in a background queue.", ['queue'])
+
+
+def record_cache(cache, hit):
+    """Count a lookup of a named cache as a hit or a miss."""
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
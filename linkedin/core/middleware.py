@@ -0,0 +1,257 @@
+import json
+import logging
+import time
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
+from rest_framework.permissions import SAFE_METHODS
+
+from .async_views import AsyncListAPIView, AsyncRetrieveAPIView
+from .compression import is_compressed_type, negotiate
+from .db_routers import current_request, pin_primary
+from .instrumentation import RequestMetrics, QueryBudgetExceeded, current_metrics, get_query_budget
+from .metrics import DB_QUERIES, REQUEST_LATENCY
+from .models import RequestProfile
+from .profiling import StackSampler, should_profile
+
+logger = logging.getLogger(__name__)
+
+READ_ACTIONS = ('list', 'retrieve')
+
+
+def is_read_view(view_func, method):
+    """Whether the resolved view lists or retrieves objects for this method.
+
+    :param view_func: resolved view callable.
+    :param method: HTTP method of the request.
+    """
+    if method not in SAFE_METHODS:
+        return False
+
+    actions = getattr(view_func, 'actions', None)
+    if actions is not None:
+        return actions.get(method.lower()) in READ_ACTIONS
+
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    return view_class is not None and issubclass(
+        view_class, (ListModelMixin, RetrieveModelMixin, AsyncListAPIView, AsyncRetrieveAPIView)
+    )
+
+
+def stream_in_context(response, var, value, finish=None):
+    """Keep `var` set to `value` while each chunk of a streaming response is produced.
+
+    Streamed content is generated after the middleware returned, so rows fetched
+    while it is sent would otherwise run outside the request's context.
+
+    :param response: streaming response, sync or async.
+    :param var: context variable to set.
+    :param value: value of the variable while chunks are produced.
+    :param finish: called without arguments once the content is exhausted or closed.
+    """
+    content = response.streaming_content
+
+    def iterate():
+        iterator = iter(content)
+        try:
+            while True:
+                token = var.set(value)
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    var.reset(token)
+                yield chunk
+        finally:
+            if finish is not None:
+                finish()
+
+    async def aiterate():
+        iterator = aiter(content)
+        try:
+            while True:
+                token = var.set(value)
+                try:
+                    chunk = await anext(iterator)
+                except StopAsyncIteration:
+                    return
+                finally:
+                    var.reset(token)
+                yield chunk
+        finally:
+            if finish is not None:
+                finish()
+
+    response.streaming_content = aiterate() if response.is_async else iterate()
+
+
+class ReplicaRoutingMiddleware:
+    """Expose the request to `PrimaryReplicaRouter` and pin writers to the primary."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_request.set(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_request.reset(token)
+        if response.streaming:
+            stream_in_context(response, current_request, request)
+
+        user = getattr(request, 'user', None)
+        if request.method not in SAFE_METHODS and user is not None and user.is_authenticated:
+            pin_primary(user.pk)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Mark requests served by list and retrieve views as replica eligible."""
+        request.replica_view = is_read_view(view_func, request.method)
+
+
+class QueryInstrumentationMiddleware:
+    """Record query count, database time and serializer time per resolved view.
+
+    In debug mode the numbers are returned as ``X-*`` response headers, otherwise
+    they are logged as one JSON line per request. Views may declare a
+    ``query_budget``; going over it raises `QueryBudgetExceeded` when
+    ``QUERY_BUDGET_STRICT`` is on (as it is under the test runner) and logs a
+    warning otherwise. Streaming responses are accounted once their content is
+    sent, including the queries run while it is generated, and always logged.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+
+        if response.streaming:
+            stream_in_context(response, current_metrics, metrics, lambda: self.record(request, response, metrics))
+        else:
+            self.record(request, response, metrics)
+        return response
+
+    def record(self, request, response, metrics):
+        """Observe the request metrics, check the query budget and report the numbers.
+
+        :param request: Django HTTP request.
+        :param response: response of the request, its headers already sent when streaming.
+        :param metrics: metrics collected for the request.
+        """
+        match = request.resolver_match
+        view_name = match.view_name if match else None
+        budget = get_query_budget(match.func, request.method) if match else None
+
+        labels = {'view': view_name or 'unresolved', 'method': request.method}
+        REQUEST_LATENCY.observe(metrics.total_time, **labels)
+        DB_QUERIES.inc(metrics.query_count, **labels)
+
+        if budget is not None and metrics.query_count > budget:
+            message = f"{view_name} ran {metrics.query_count} queries, over its budget of {budget}."
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        if settings.DEBUG and not response.streaming:
+            response['X-Query-Count'] = str(metrics.query_count)
+            response['X-DB-Time-Ms'] = f"{metrics.db_time * 1000:.2f}"
+            response['X-Serializer-Time-Ms'] = f"{metrics.serializer_time * 1000:.2f}"
+            response['X-Response-Time-Ms'] = f"{metrics.total_time * 1000:.2f}"
+        else:
+            logger.info(json.dumps({
+                "view": view_name,
+                "method": request.method,
+                "status": response.status_code,
+                "queries": metrics.query_count,
+                "db_ms": round(metrics.db_time * 1000, 2),
+                "serializer_ms": round(metrics.serializer_time * 1000, 2),
+                "total_ms": round(metrics.total_time * 1000, 2),
+            }))
+
+
+class ProfilingMiddleware:
+    """Profile a sample of requests with `StackSampler` and store their stacks per view.
+
+    A request is profiled with probability ``PROFILING_SAMPLE_RATE``, or when it
+    carries an ``X-Profile-Token`` header matching ``PROFILING_TOKEN``. Only the
+    request thread is sampled, so async views served under ASGI show up as time
+    spent waiting on the event loop.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not should_profile(request):
+            return self.get_response(request)
+
+        with StackSampler(self.profile_response.__code__) as sampler:
+            started = time.perf_counter()
+            response = self.profile_response(request)
+            duration = time.perf_counter() - started
+
+        match = request.resolver_match
+        if match and sampler.stacks:
+            RequestProfile.objects.create(
+                view_name=match.view_name, method=request.method, duration=duration,
+                samples=sum(sampler.stacks.values()), stacks=dict(sampler.stacks),
+            )
+        return response
+
+    def profile_response(self, request):
+        """Call the rest of the chain, the root frame of the sampled stacks."""
+        return self.get_response(request)
+
+
+class CompressionMiddleware:
+    """Compress responses with the best encoding allowed by both the client and ``COMPRESSION_ENCODINGS``.
+
+    gzip is always available, brotli and zstd when their packages are installed.
+    Responses already encoded, already compressed media and bodies under
+    ``COMPRESSION_MIN_SIZE`` bytes are sent as they are. Streaming responses are
+    compressed chunk by chunk, each chunk flushed as soon as it is produced.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding') or is_compressed_type(response.get('Content-Type', '')):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_SIZE:
+            return response
+
+        codec = negotiate(request.META.get('HTTP_ACCEPT_ENCODING', ''), settings.COMPRESSION_ENCODINGS)
+        if codec is None:
+            return response
+        level = settings.COMPRESSION_LEVELS[codec.name]
+
+        if response.streaming:
+            stream = codec.astream if response.is_async else codec.stream
+            response.streaming_content = stream(response.streaming_content, level)
+            del response['Content-Length']
+        else:
+            compressed = codec.compress(response.content, level)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = codec.name
+        return response
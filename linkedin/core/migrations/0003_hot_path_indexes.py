@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:29
+
+from django.db import migrations, models
+
+from core.db.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # Indexes are built concurrently on Postgres, which cannot run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('core', '0002_customuser_token_version'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='customuser',
+            index=models.Index(fields=['date_joined'], name='user_date_joined_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='follow',
+            index=models.Index(fields=['following', '-created_at'], name='follow_following_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='follow',
+            index=models.Index(fields=['follower', '-created_at'], name='follow_follower_created_idx'),
+        ),
+    ]
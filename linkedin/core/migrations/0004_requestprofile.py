@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RequestProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('view_name', models.CharField(max_length=255)),
+                ('method', models.CharField(max_length=10)),
+                ('duration', models.FloatField(help_text='Seconds spent in the view.')),
+                ('samples', models.PositiveIntegerField()),
+                ('stacks', models.JSONField(help_text='Samples per collapsed stack.')),
+            ],
+            options={
+                'verbose_name': 'Request Profile',
+                'verbose_name_plural': 'Request Profiles',
+                'indexes': [models.Index(fields=['view_name', '-created_at'], name='requestprofile_view_idx')],
+            },
+        ),
+    ]
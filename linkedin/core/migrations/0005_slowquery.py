@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_requestprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SlowQuery',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('fingerprint', models.CharField(max_length=16)),
+                ('normalized_sql', models.TextField()),
+                ('sql', models.TextField()),
+                ('duration', models.FloatField(help_text='Milliseconds spent running the query.')),
+                ('view_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('serializer', models.CharField(blank=True, max_length=255, null=True)),
+                ('plan', models.TextField(blank=True)),
+            ],
+            options={
+                'verbose_name': 'Slow Query',
+                'verbose_name_plural': 'Slow Queries',
+                'indexes': [models.Index(fields=['created_at'], name='slowquery_created_idx'), models.Index(fields=['fingerprint', '-created_at'], name='slowquery_fingerprint_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:02
+
+import django.db.models.expressions
+from django.db import migrations
+
+import core.db.indexes
+from core.db.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # Indexes are built concurrently on Postgres, which cannot run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ('core', '0005_slowquery'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='certification',
+            options={'ordering': [django.db.models.expressions.OrderBy(django.db.models.expressions.F('issue_date'), descending=True, nulls_last=True), '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='course',
+            options={'ordering': ['-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='education',
+            options={'ordering': [django.db.models.expressions.OrderBy(django.db.models.expressions.F('start_date'), descending=True, nulls_last=True), '-id']},
+        ),
+        migrations.AlterModelOptions(
+            name='experience',
+            options={'ordering': [django.db.models.expressions.OrderBy(django.db.models.expressions.F('start_date'), descending=True, nulls_last=True), '-id']},
+        ),
+        AddIndexConcurrently(
+            model_name='certification',
+            index=core.db.indexes.NullsLastIndex(django.db.models.expressions.F('person'), django.db.models.expressions.OrderBy(django.db.models.expressions.F('issue_date'), descending=True, nulls_last=True), django.db.models.expressions.OrderBy(django.db.models.expressions.F('id'), descending=True), name='certification_person_issue_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='education',
+            index=core.db.indexes.NullsLastIndex(django.db.models.expressions.F('person'), django.db.models.expressions.OrderBy(django.db.models.expressions.F('start_date'), descending=True, nulls_last=True), django.db.models.expressions.OrderBy(django.db.models.expressions.F('id'), descending=True), name='education_person_start_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='experience',
+            index=core.db.indexes.NullsLastIndex(django.db.models.expressions.F('person'), django.db.models.expressions.OrderBy(django.db.models.expressions.F('start_date'), descending=True, nulls_last=True), django.db.models.expressions.OrderBy(django.db.models.expressions.F('id'), descending=True), name='experience_person_start_idx'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:04
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_profile_section_person_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProfileDocument',
+            fields=[
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('profile', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='document', serialize=False, to='core.userprofile')),
+                ('document', models.JSONField(help_text='Profile, user, follow counts and sections, rebuilt on change.')),
+            ],
+            options={
+                'abstract': False,
+            },
+        ),
+    ]
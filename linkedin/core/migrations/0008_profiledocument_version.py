@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_profiledocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profiledocument',
+            name='built_version',
+            field=models.PositiveIntegerField(default=0, help_text='Version the document was built from.'),
+        ),
+        migrations.AddField(
+            model_name='profiledocument',
+            name='version',
+            field=models.PositiveIntegerField(default=0, help_text='Bumped by every change to the profile.'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
+from django.db.models import F
 from django.contrib.auth.models import AbstractUser
 
+from .db.indexes import NullsLastIndex
 from .managers import CustomUserManager
 from .constants import (
     ADMIN, EMPLOYEE, RECRUITER, MALE, FEMALE, OTHER, ON_SITE, HYBRID, REMOTE,
@@ -36,6 +38,7 @@ class CustomUser(AbstractUser, TimeStampMixin):
     is_admin = models.BooleanField(default=False)
     is_superuser = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
+    token_version = models.PositiveIntegerField(default=0)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ['username']
@@ -48,6 +51,9 @@ class CustomUser(AbstractUser, TimeStampMixin):
         verbose_name = 'User'
         verbose_name_plural = 'Users'
         ordering = ['date_joined']
+        indexes = [
+            models.Index(fields=['date_joined'], name='user_date_joined_idx'),
+        ]
 
     def __str__(self):
         """String representation of the object."""
@@ -110,6 +116,10 @@ class Follow(TimeStampMixin):
         verbose_name = 'Follow'
         verbose_name_plural = 'Follows'
         unique_together = ('follower', 'following')
+        indexes = [
+            models.Index(fields=['following', '-created_at'], name='follow_following_created_idx'),
+            models.Index(fields=['follower', '-created_at'], name='follow_follower_created_idx'),
+        ]
 
     def __str__(self):
         """String representation of the object."""
@@ -143,6 +153,16 @@ class Experience(TimeStampMixin):
     skills = models.TextField(blank=True, null=True)
     media = models.FileField(blank=True, null=True)
 
+    class Meta:
+        """Contains meta option, used to change behavior of fields."""
+
+        ordering = [F('start_date').desc(nulls_last=True), '-id']
+        indexes = [
+            NullsLastIndex(
+                F('person'), F('start_date').desc(nulls_last=True), F('id').desc(), name='experience_person_start_idx'
+            ),
+        ]
+
 
 class Education(TimeStampMixin):
     """Contain Education fields about the User."""
@@ -158,6 +178,16 @@ class Education(TimeStampMixin):
     skills = models.TextField(blank=True, null=True)
     media = models.FileField(blank=True, null=True)
 
+    class Meta:
+        """Contains meta option, used to change behavior of fields."""
+
+        ordering = [F('start_date').desc(nulls_last=True), '-id']
+        indexes = [
+            NullsLastIndex(
+                F('person'), F('start_date').desc(nulls_last=True), F('id').desc(), name='education_person_start_idx'
+            ),
+        ]
+
 
 class Certification(TimeStampMixin):
     """Contain Certifications fields about the User."""
@@ -171,6 +201,17 @@ class Certification(TimeStampMixin):
     credential_url = models.URLField(blank=True, null=True)
     skills = models.TextField(blank=True, null=True)
 
+    class Meta:
+        """Contains meta option, used to change behavior of fields."""
+
+        ordering = [F('issue_date').desc(nulls_last=True), '-id']
+        indexes = [
+            NullsLastIndex(
+                F('person'), F('issue_date').desc(nulls_last=True), F('id').desc(),
+                name='certification_person_issue_idx',
+            ),
+        ]
+
 
 class Course(TimeStampMixin):
     """Contain Courses fields about the User."""
@@ -179,3 +220,71 @@ class Course(TimeStampMixin):
     course_name = models.CharField(max_length=40)
     course_code = models.CharField(max_length=10, blank=True, null=True)
     associated_with = models.CharField(max_length=40, blank=True, null=True)
+
+    class Meta:
+        """Contains meta option, used to change behavior of fields."""
+
+        ordering = ['-id']
+
+
+class ProfileDocument(TimeStampMixin):
+    """Materialized document of a profile, as returned by the profile detail."""
+
+    profile = models.OneToOneField(UserProfile, on_delete=models.CASCADE, primary_key=True, related_name='document')
+    document = models.JSONField(help_text="Profile, user, follow counts and sections, rebuilt on change.")
+    version = models.PositiveIntegerField(default=0, help_text="Bumped by every change to the profile.")
+    built_version = models.PositiveIntegerField(default=0, help_text="Version the document was built from.")
+
+    @property
+    def is_stale(self):
+        """Whether the profile changed since the document was built."""
+        return self.version != self.built_version
+
+
+class RequestProfile(TimeStampMixin):
+    """Collapsed stack samples of one profiled request."""
+
+    view_name = models.CharField(max_length=255)
+    method = models.CharField(max_length=10)
+    duration = models.FloatField(help_text="Seconds spent in the view.")
+    samples = models.PositiveIntegerField()
+    stacks = models.JSONField(help_text="Samples per collapsed stack.")
+
+    class Meta:
+        """Contains meta option, used to change behavior of fields."""
+
+        verbose_name = 'Request Profile'
+        verbose_name_plural = 'Request Profiles'
+        indexes = [
+            models.Index(fields=['view_name', '-created_at'], name='requestprofile_view_idx'),
+        ]
+
+    def __str__(self):
+        """String representation of the object."""
+        return f"{self.method} {self.view_name} ({self.samples} samples)"
+
+
+class SlowQuery(TimeStampMixin):
+    """Query that ran longer than ``SLOW_QUERY_THRESHOLD_MS``, with its plan."""
+
+    fingerprint = models.CharField(max_length=16)
+    normalized_sql = models.TextField()
+    sql = models.TextField()
+    duration = models.FloatField(help_text="Milliseconds spent running the query.")
+    view_name = models.CharField(max_length=255, blank=True, null=True)
+    serializer = models.CharField(max_length=255, blank=True, null=True)
+    plan = models.TextField(blank=True)
+
+    class Meta:
+        """Contains meta option, used to change behavior of fields."""
+
+        verbose_name = 'Slow Query'
+        verbose_name_plural = 'Slow Queries'
+        indexes = [
+            models.Index(fields=['created_at'], name='slowquery_created_idx'),
+            models.Index(fields=['fingerprint', '-created_at'], name='slowquery_fingerprint_idx'),
+        ]
+
+    def __str__(self):
+        """String representation of the object."""
+        return f"{self.fingerprint} {self.duration:.1f} ms"
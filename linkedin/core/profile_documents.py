@@ -0,0 +1,202 @@
+import functools
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from rest_framework import serializers
+
+from .metrics import QUEUE_DEPTH
+from .models import Follow, ProfileDocument, UserProfile
+from .serializers import FullUserProfileSerializer
+
+logger = logging.getLogger(__name__)
+
+
+def follow_count(field):
+    """Subquery counting the follows pointing at a profile through `field`, without joining them all."""
+    follows = Follow.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+    return Coalesce(Subquery(follows.annotate(total=Count('pk')).values('total'), output_field=IntegerField()), 0)
+
+
+def get_full_profile_queryset():
+    """Profiles with their user, follow counts and every profile section, in five queries."""
+    return UserProfile.objects.select_related('user').annotate(
+        following_total=follow_count('follower'),
+        followers_total=follow_count('following'),
+    ).prefetch_related('experiences', 'educations', 'certifications', 'courses')
+
+
+def rebuild_document(profile_id, version=None):
+    """Build the document of a profile and store it, replacing the previous one.
+
+    File fields are stored as relative URLs, see `absolute_urls`. The document is
+    marked as built from `version`, read before the profile, so a change committed
+    while it is built leaves it stale.
+
+    :param profile_id: primary key of the profile.
+    :param version: current version of the stored document, read when None.
+    :return: the document, or None when the profile does not exist anymore.
+    """
+    if version is None:
+        version = ProfileDocument.objects.filter(pk=profile_id).values_list('version', flat=True).first() or 0
+    try:
+        profile = get_full_profile_queryset().get(pk=profile_id)
+    except UserProfile.DoesNotExist:
+        ProfileDocument.objects.filter(pk=profile_id).delete()
+        return None
+
+    document = FullUserProfileSerializer(profile).data
+    ProfileDocument.objects.bulk_create(
+        [ProfileDocument(profile=profile, document=document, version=version, built_version=version)],
+        update_conflicts=True, unique_fields=['profile'], update_fields=['document', 'built_version', 'updated_at'],
+    )
+    return document
+
+
+def get_document(profile_id):
+    """Read the stored document of a profile, rebuilding it first when missing or stale.
+
+    :param profile_id: primary key of the profile.
+    :return: the document, or None when the profile does not exist.
+    """
+    stored = ProfileDocument.objects.filter(pk=profile_id).only('document', 'version', 'built_version').first()
+    if stored is not None and not stored.is_stale:
+        return stored.document
+    return rebuild_document(profile_id, stored.version if stored else 0)
+
+
+async def aget_document(profile_id):
+    """Async version of `get_document`, rebuilding in a worker thread."""
+    stored = await ProfileDocument.objects.filter(pk=profile_id).only('document', 'version', 'built_version').afirst()
+    if stored is not None and not stored.is_stale:
+        return stored.document
+    return await sync_to_async(rebuild_document)(profile_id, stored.version if stored else 0)
+
+
+def mark_stale(profile_ids):
+    """Bump the version of the stored documents of profiles, in the transaction of the change.
+
+    :param profile_ids: primary keys of the changed profiles.
+    """
+    ProfileDocument.objects.filter(pk__in=profile_ids).update(version=F('version') + 1)
+
+
+@functools.cache
+def file_field_paths(serializer_class):
+    """Names of the file fields in the output of a serializer class.
+
+    :return: list of ``(name, children)``, children being the paths inside a
+        nested serializer or None for a file field.
+    """
+    paths = []
+    for name, field in serializer_class().fields.items():
+        child = getattr(field, 'child', field)
+        if isinstance(field, serializers.FileField):
+            paths.append((name, None))
+        elif isinstance(child, serializers.Serializer) and file_field_paths(type(child)):
+            paths.append((name, file_field_paths(type(child))))
+    return paths
+
+
+def absolute_urls(data, request, paths=None):
+    """Make the relative file URLs of a stored document absolute for a request.
+
+    :param data: document, or a subset of its keys.
+    :param request: request the URLs are built for, None leaves them relative.
+    :param paths: paths of the file fields, those of `FullUserProfileSerializer` by default.
+    :return: a copy of the document with absolute URLs.
+    """
+    if request is None:
+        return data
+    data = dict(data)
+    for name, children in file_field_paths(FullUserProfileSerializer) if paths is None else paths:
+        value = data.get(name)
+        if not value:
+            continue
+        if children is None:
+            data[name] = request.build_absolute_uri(value)
+        elif isinstance(value, list):
+            data[name] = [absolute_urls(item, request, children) for item in value]
+        else:
+            data[name] = absolute_urls(value, request, children)
+    return data
+
+
+class DocumentRebuilder:
+    """Rebuild profile documents from a background thread, once per burst of changes.
+
+    A change schedules its profile to be rebuilt ``PROFILE_DOCUMENT_DEBOUNCE``
+    seconds later. Further changes to a profile already waiting are merged into
+    that rebuild, which reads the profile as it is when it runs. A change made
+    while the rebuild runs schedules the next one.
+
+    Pending rebuilds only live in memory. The change itself marks the stored
+    document stale, so a rebuild lost on exit or failing is done by the next
+    read or by the ``rebuild_profile_documents`` command.
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def schedule(self, profile_id):
+        """Rebuild the document of a profile after the debounce delay, unless already scheduled."""
+        with self._condition:
+            if profile_id in self.pending:
+                return
+            self.pending[profile_id] = time.monotonic() + settings.PROFILE_DOCUMENT_DEBOUNCE
+            QUEUE_DEPTH.inc(queue='profile_documents')
+            self._condition.notify()
+
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='profile-document-rebuilder', daemon=True)
+                self._thread.start()
+
+    def run_due(self, now=None):
+        """Rebuild the documents whose delay has passed.
+
+        :param now: `time.monotonic` value to compare the due times with, defaults to now.
+        :return: ids of the profiles rebuilt.
+        """
+        now = time.monotonic() if now is None else now
+        with self._condition:
+            due = [profile_id for profile_id, due_at in self.pending.items() if due_at <= now]
+            for profile_id in due:
+                del self.pending[profile_id]
+
+        for profile_id in due:
+            try:
+                rebuild_document(profile_id)
+            except Exception:
+                logger.exception("Could not rebuild the document of profile %s.", profile_id)
+            finally:
+                QUEUE_DEPTH.dec(queue='profile_documents')
+        return due
+
+    def _run(self):
+        """Wait for the next due rebuild and run it, closing the thread's connections when idle."""
+        while True:
+            with self._condition:
+                while not self.pending:
+                    self._condition.wait()
+                delay = min(self.pending.values()) - time.monotonic()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+            self.run_due()
+            if not self.pending:
+                connections.close_all()
+
+
+rebuilder = DocumentRebuilder()
+
+
+def schedule_rebuild(profile_id):
+    """Schedule a rebuild of a profile document once the current transaction commits."""
+    transaction.on_commit(lambda: rebuilder.schedule(profile_id))
@@ -0,0 +1,185 @@
+import datetime
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.utils import timezone
+from rest_framework import ISO_8601, serializers
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+from .instrumentation import serializing
+from .renderers import StreamingJSONListResponse
+
+# Serializer fields whose representation of a database value is the value itself.
+IDENTITY_FIELDS = (
+    serializers.IntegerField, serializers.CharField, serializers.BooleanField, serializers.FloatField,
+)
+
+_plans = {}
+
+
+# Converter factories take the request and return the function applied to each value,
+# so what depends on the request or the active time zone is resolved once per list.
+
+def representation(field):
+    """Converter factory applying the ``to_representation`` of a serializer field."""
+    def factory(request):
+        return field.to_representation
+    return factory
+
+
+def iso_datetime(request):
+    """Converter of aware datetimes to ISO 8601 in the current time zone, as ``DateTimeField`` renders them."""
+    current = timezone.get_current_timezone()
+    # Values come back from the database in UTC, converting them to UTC again is skipped.
+    current_is_utc = getattr(current, 'key', None) == 'UTC'
+
+    def convert(value):
+        if not (current_is_utc and value.tzinfo is datetime.timezone.utc):
+            value = value.astimezone(current)
+        value = value.isoformat()
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    return convert
+
+
+def file_url(storage):
+    """Converter factory of stored file names to their URL, made absolute when the request is known."""
+    def factory(request):
+        def convert(name):
+            if not name:
+                return None
+            url = storage.url(name)
+            return request.build_absolute_uri(url) if request is not None else url
+        return convert
+    return factory
+
+
+class ProjectionPlan:
+    """Columns to select and converters to apply to serialize rows like a ``ModelSerializer``.
+
+    Built once per serializer class. Every field must read a model column: primary
+    keys of foreign keys are used as they are, and other fields reuse the
+    ``to_representation`` of the serializer field unless it returns database
+    values unchanged. Many to many fields, nested serializers, method fields
+    and properties cannot be read from a row and raise `ImproperlyConfigured`.
+    """
+
+    def __init__(self, serializer_class):
+        self.serializer = serializer_class()
+        model = serializer_class.Meta.model
+        self.names, self.columns, self.converters = [], [], []
+
+        for name, field in self.serializer.fields.items():
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                model_field = None
+            if model_field is None or not model_field.concrete or model_field.many_to_many:
+                raise ImproperlyConfigured(
+                    f"{serializer_class.__name__}.{name} does not read a column and cannot be projected."
+                )
+
+            if isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+                converter = None
+            elif isinstance(field, serializers.FileField):
+                use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+                converter = file_url(model_field.storage) if use_url else None
+            elif (
+                isinstance(field, serializers.DateTimeField) and settings.USE_TZ and not hasattr(field, 'timezone')
+                and getattr(field, 'format', api_settings.DATETIME_FORMAT).lower() == ISO_8601
+            ):
+                converter = iso_datetime
+            elif isinstance(field, IDENTITY_FIELDS) and not getattr(field, 'coerce_to_string', False):
+                converter = None
+            else:
+                converter = representation(field)
+
+            self.names.append(name)
+            self.columns.append(model_field.attname)
+            self.converters.append(converter)
+
+    @classmethod
+    def for_serializer(cls, serializer_class):
+        """Return the cached plan of a serializer class."""
+        plan = _plans.get(serializer_class)
+        if plan is None:
+            plan = _plans[serializer_class] = cls(serializer_class)
+        return plan
+
+
+class ProjectionSerializer:
+    """Read only serializer building dicts straight from ``values_list()`` rows.
+
+    The output matches ``serializer_class(queryset, many=True).data`` for the
+    serializers a `ProjectionPlan` accepts, without creating model instances or
+    serializer field bindings per row.
+
+    :param queryset: rows to serialize.
+    :param serializer_class: ``ModelSerializer`` the output must match.
+    :param context: serializer context, its request makes file URLs absolute.
+    :param fields: names of the fields to return, all of them by default.
+    """
+
+    def __init__(self, queryset, serializer_class, context=None, fields=None):
+        self.queryset = queryset
+        self.plan = ProjectionPlan.for_serializer(serializer_class)
+        self.child = self.plan.serializer
+        self.request = (context or {}).get('request')
+        self.fields = fields
+
+    def _serialize(self, rows):
+        """Yield the dicts of rows fetched by `rows`, called with the columns to select."""
+        plan = self.plan
+        selected = [
+            index for index, name in enumerate(plan.names) if self.fields is None or name in self.fields
+        ]
+        names = [plan.names[index] for index in selected]
+        converters = [plan.converters[index] and plan.converters[index](self.request) for index in selected]
+
+        if not any(converters):
+            for row in rows(*[plan.columns[index] for index in selected]):
+                yield dict(zip(names, row))
+            return
+
+        fields = list(zip(names, converters))
+        for row in rows(*[plan.columns[index] for index in selected]):
+            item = {}
+            for (name, converter), value in zip(fields, row):
+                item[name] = value if converter is None or value is None else converter(value)
+            yield item
+
+    @property
+    def data(self):
+        """Serialized rows as a list of dicts."""
+        return list(self._serialize(self.queryset.values_list))
+
+    def iter_data(self, chunk_size=2000):
+        """Yield serialized rows one at a time, fetching them from a server side cursor in chunks."""
+        return self._serialize(lambda *columns: self.queryset.values_list(*columns).iterator(chunk_size=chunk_size))
+
+
+class ProjectionListMixin:
+    """List view mixin serializing with a `ProjectionSerializer` instead of the serializer class.
+
+    Used on hot list endpoints whose serializer only reads columns. Paginated
+    views keep the regular serializer. With ``?stream=true`` the rows are fetched,
+    encoded and sent in chunks instead of being rendered as a whole, for exports
+    of large lists. The middleware keeps query counting and replica routing on
+    while the rows are fetched.
+    """
+
+    def list(self, request, *args, **kwargs):
+        """List the rows of the queryset projected to the serializer fields."""
+        if self.paginator is not None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        get_sparse_fields = getattr(self, 'get_sparse_fields', None)
+        serializer = ProjectionSerializer(
+            queryset, self.get_serializer_class(), context=self.get_serializer_context(),
+            fields=get_sparse_fields() if get_sparse_fields else None,
+        )
+        if request.query_params.get('stream') in ('1', 'true'):
+            return StreamingJSONListResponse(serializer.iter_data())
+        with serializing(serializer):
+            return Response(serializer.data)
@@ -0,0 +1,98 @@
+import json
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Separators are escaped by DRF so the output stays a strict JavaScript subset.
+LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+_default = encoders.JSONEncoder().default
+
+
+def escape_separators(content):
+    """Escape U+2028 and U+2029 in encoded JSON, as `JSONRenderer` does."""
+    for raw, escaped in LINE_SEPARATORS:
+        if raw in content:
+            content = content.replace(raw, escaped)
+    return content
+
+
+def dumps_orjson(data):
+    """Encode compact JSON with orjson, using DRF's encoder for the types orjson leaves to it.
+
+    Datetimes are passed to DRF's encoder too, so they render exactly as with
+    `JSONRenderer`.
+    """
+    return escape_separators(orjson.dumps(
+        data, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    ))
+
+
+def dumps_json(data):
+    """Encode compact JSON with the standard library, as `JSONRenderer` does."""
+    return escape_separators(json.dumps(
+        data, cls=encoders.JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(',', ':')
+    ).encode())
+
+
+ENCODERS = {'orjson': dumps_orjson, 'json': dumps_json}
+
+
+def get_encoder():
+    """Return the encoder selected with ``JSON_ENCODER``, the standard library one when orjson is missing."""
+    name = settings.JSON_ENCODER
+    if name == 'orjson' and orjson is None:
+        name = 'json'
+    return ENCODERS[name]
+
+
+class FastJSONRenderer(JSONRenderer):
+    """`JSONRenderer` encoding compact output with the encoder selected by ``JSON_ENCODER``.
+
+    Indented output, asked for through the media type or by the browsable API,
+    is left to `JSONRenderer`.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Render `data` into JSON, returning a bytestring."""
+        if data is None:
+            return b''
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return get_encoder()(data)
+
+
+def stream_json_list(items, chunk_size=500):
+    """Yield a JSON array of items in chunks, encoding at most `chunk_size` items at a time.
+
+    :param items: iterable of JSON serializable items, consumed lazily.
+    :param chunk_size: number of items encoded and flushed together.
+    """
+    encode = get_encoder()
+    yield b'['
+    chunk = []
+    first = True
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == chunk_size:
+            yield (b'' if first else b',') + encode(chunk)[1:-1]
+            first = False
+            chunk = []
+    if chunk:
+        yield (b'' if first else b',') + encode(chunk)[1:-1]
+    yield b']'
+
+
+class StreamingJSONListResponse(StreamingHttpResponse):
+    """Response streaming a JSON array, so large lists are never held in memory at once."""
+
+    def __init__(self, items, chunk_size=500, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(stream_json_list(items, chunk_size), **kwargs)
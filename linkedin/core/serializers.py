@@ -2,7 +2,13 @@ from rest_framework import serializers
 from rest_framework.validators import UniqueValidator
 from django.contrib.auth.password_validation import validate_password
 from django.contrib.auth import get_user_model
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 
+from . import hashing
+from .authentication import add_user_claims, get_auth_state, TOKEN_VERSION_CLAIM
+from .tokens import FilteredRefreshToken
 from .models import UserProfile, Follow, CustomUser, Experience, Education, Certification, Course
 
 User = get_user_model()
@@ -17,6 +23,42 @@ class CustomUserSerializer(serializers.ModelSerializer):
         fields = ['id', 'first_name', 'last_name', 'email', 'username', 'user_type']
 
 
+class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Serializer to obtain token pair carrying the claims used for stateless authentication."""
+
+    @classmethod
+    def get_token(cls, user):
+        """To create refresh token with user type, profile id and token version claims.
+
+        :param user: authenticated user.
+        :returns: refresh token, access tokens derived from it inherit the claims.
+        """
+        return add_user_claims(super().get_token(user), user)
+
+
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """Serializer to refresh access token without loading the user from the database."""
+
+    token_class = FilteredRefreshToken
+
+    def validate(self, attrs):
+        """To validate refresh token against the cached auth state of its user.
+
+        :param attrs: Dictionary containing the refresh token.
+        :returns: Dictionary containing new access token.
+        """
+        refresh = self.token_class(attrs['refresh'])
+
+        if api_settings.ROTATE_REFRESH_TOKENS or TOKEN_VERSION_CLAIM not in refresh.payload:
+            return super().validate(attrs)
+
+        state = get_auth_state(refresh.payload.get(api_settings.USER_ID_CLAIM))
+        if state is None or not state[1] or state[0] != refresh[TOKEN_VERSION_CLAIM]:
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        return {'access': str(refresh.access_token)}
+
+
 class RegistrationSerializer(serializers.ModelSerializer):
     """Serializer to register new user to the app."""
 
@@ -61,15 +103,33 @@ class RegistrationSerializer(serializers.ModelSerializer):
             email=validated_data['email'],
             first_name=validated_data['first_name'],
             last_name=validated_data['last_name'],
-            user_type=validated_data['user_type']
+            user_type=validated_data['user_type'],
+            password=hashing.make_password(validated_data['password'])
         )
 
-        user.set_password(validated_data['password'])
-        user.save()
-
         return user
 
 
+class BulkUserImportRowSerializer(serializers.ModelSerializer):
+    """Serializer to validate one row of a bulk user import.
+
+    Uniqueness is checked per batch by the import view, so the model's unique
+    validators are dropped here to avoid one query per row.
+    """
+
+    password = serializers.CharField(write_only=True, required=False, allow_blank=True)
+
+    class Meta:
+        """Contains meta option, used to change behavior of fields."""
+
+        model = User
+        fields = ('username', 'email', 'first_name', 'last_name', 'user_type', 'password')
+        extra_kwargs = {
+            'username': {'validators': []},
+            'email': {'validators': []},
+        }
+
+
 class ChangePasswordSerializer(serializers.ModelSerializer):
     """Serializer class to change user password."""
 
@@ -166,6 +226,8 @@ class GetUserProfileSerializer(serializers.ModelSerializer):
         :param obj: The user profile instance.
         :returns: number of followers for provided instance.
         """
+        if hasattr(obj, 'following_total'):
+            return obj.following_total
         return obj.following.count()
 
     def get_following_count(self, obj):
@@ -174,6 +236,8 @@ class GetUserProfileSerializer(serializers.ModelSerializer):
         :param obj: The user profile instance.
         :returns: number of people this instance is following.
         """
+        if hasattr(obj, 'followers_total'):
+            return obj.followers_total
         return obj.followers.count()
 
 
@@ -359,3 +423,20 @@ class UpdateCoursesSerializer(serializers.ModelSerializer):
 
         model = Course
         fields = ('course_name', 'course_code', 'associated_with')
+
+
+class FullUserProfileSerializer(GetUserProfileSerializer):
+    """Serializer for the whole profile page: profile, user and every profile section."""
+
+    user = CustomUserSerializer(read_only=True)
+    experiences = GetExperienceSerializer(many=True, read_only=True)
+    educations = GetEducationSerializer(many=True, read_only=True)
+    certifications = GetCertificationSerializer(many=True, read_only=True)
+    courses = GetCourseSerializer(many=True, read_only=True)
+
+    class Meta(GetUserProfileSerializer.Meta):
+        """Contains meta option, used to change behavior of fields."""
+
+        fields = GetUserProfileSerializer.Meta.fields + (
+            'experiences', 'educations', 'certifications', 'courses'
+        )
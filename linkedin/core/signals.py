@@ -0,0 +1,63 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .authentication import invalidate_auth_state
+from .blacklist import blacklist_changed
+from .models import Certification, Course, CustomUser, Education, Experience, Follow, UserProfile
+from .profile_documents import mark_stale, schedule_rebuild
+
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_delete, sender=CustomUser)
+def reset_auth_state(sender, instance, **kwargs):
+    """Drop cached auth state when a user is saved or deleted."""
+    invalidate_auth_state(instance.pk)
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def reset_blacklist_filters(sender, instance, created, **kwargs):
+    """Make every process reload its blacklist filter once a new blacklist row is committed."""
+    if created:
+        transaction.on_commit(blacklist_changed)
+
+
+def profile_changed(*profile_ids):
+    """Mark the stored documents of profiles stale and schedule their rebuild."""
+    mark_stale(profile_ids)
+    for profile_id in profile_ids:
+        schedule_rebuild(profile_id)
+
+
+@receiver(post_save, sender=UserProfile)
+@receiver(post_delete, sender=UserProfile)
+def update_profile(sender, instance, **kwargs):
+    """Refresh the full profile of a saved or deleted profile."""
+    profile_changed(instance.pk)
+
+
+@receiver(post_save, sender=CustomUser)
+def update_user_profile(sender, instance, **kwargs):
+    """Refresh the full profile of the profile of a saved user."""
+    profile_changed(*UserProfile.objects.filter(user=instance).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Experience)
+@receiver(post_delete, sender=Experience)
+@receiver(post_save, sender=Education)
+@receiver(post_delete, sender=Education)
+@receiver(post_save, sender=Certification)
+@receiver(post_delete, sender=Certification)
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def update_profile_section(sender, instance, **kwargs):
+    """Refresh the full profile owning a saved or deleted section."""
+    profile_changed(instance.person_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def update_follow_profiles(sender, instance, **kwargs):
+    """Refresh the full profiles of both sides of a follow, whose counts changed."""
+    profile_changed(instance.follower_id, instance.following_id)
@@ -0,0 +1,179 @@
+import hashlib
+import json
+import logging
+import queue
+import re
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError, connections
+from django.db.backends.signals import connection_created
+
+from .db_routers import current_request
+from .instrumentation import current_metrics
+from .metrics import QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+PLACEHOLDER_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+WHITESPACE = re.compile(r"\s+")
+EXPLAINABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+# Set while the recorder runs its own queries, which must not be logged in turn.
+_recording = threading.local()
+
+
+def normalize(sql):
+    """Replace literals and placeholders with ``?`` and collapse placeholder lists.
+
+    Queries differing only by their parameters, or by the length of an ``IN`` list,
+    normalize to the same text.
+    """
+    sql = STRING_LITERAL.sub('?', sql)
+    sql = NUMBER_LITERAL.sub('?', sql.replace('%s', '?'))
+    sql = PLACEHOLDER_LIST.sub('(...)', sql)
+    return WHITESPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    """Short stable hash of a normalized query."""
+    return hashlib.sha1(normalized_sql.encode()).hexdigest()[:16]
+
+
+def explain(connection, sql, params):
+    """Return the plan of a query without running it.
+
+    :param connection: connection the query ran on.
+    :param sql: query with placeholders.
+    :param params: parameters of the query.
+    """
+    prefix = 'EXPLAIN QUERY PLAN' if connection.vendor == 'sqlite' else 'EXPLAIN'
+    with connection.cursor() as cursor:
+        cursor.execute(f'{prefix} {sql}', params)
+        rows = cursor.fetchall()
+    if connection.vendor == 'sqlite':
+        return '\n'.join(str(row[-1]) for row in rows)
+    return '\n'.join(' | '.join(str(column) for column in row) for row in rows)
+
+
+class SlowQueryRecorder:
+    """Capture the plan of slow queries and store them from a background thread.
+
+    Requests only pay for putting the query on a bounded queue. The thread runs
+    ``EXPLAIN`` on its own connection and writes a `SlowQuery` row. When the queue
+    is full, further slow queries are only logged.
+    """
+
+    def __init__(self, maxsize=1000):
+        self.queue = queue.Queue(maxsize)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, entry):
+        """Queue a slow query for its plan to be captured and stored."""
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            return
+        QUEUE_DEPTH.inc(queue='slow_query_explain')
+
+        if self._thread is None or not self._thread.is_alive():
+            with self._lock:
+                if self._thread is None or not self._thread.is_alive():
+                    self._thread = threading.Thread(target=self._run, name='slow-query-recorder', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        """Record queued queries, closing the thread's connections whenever the queue drains."""
+        while True:
+            entry = self.queue.get()
+            try:
+                self.record(entry)
+            except Exception:
+                logger.exception("Could not record slow query %s.", entry['fingerprint'])
+            finally:
+                QUEUE_DEPTH.dec(queue='slow_query_explain')
+                self.queue.task_done()
+            if self.queue.empty():
+                connections.close_all()
+
+    def record(self, entry):
+        """Capture the plan of a slow query and store it.
+
+        :param entry: dict built by `log_slow_query`.
+        """
+        from .models import SlowQuery
+
+        _recording.active = True
+        try:
+            plan = ''
+            if EXPLAINABLE.match(entry['sql']):
+                try:
+                    plan = explain(connections[entry['alias']], entry['sql'], entry['params'])
+                except DatabaseError as exc:
+                    plan = f"EXPLAIN failed: {exc}"
+
+            SlowQuery.objects.create(
+                fingerprint=entry['fingerprint'], normalized_sql=entry['normalized_sql'], sql=entry['sql'],
+                duration=entry['duration'], view_name=entry['view_name'], serializer=entry['serializer'], plan=plan,
+            )
+        finally:
+            _recording.active = False
+
+    def join(self):
+        """Block until every queued query has been recorded."""
+        self.queue.join()
+
+
+recorder = SlowQueryRecorder()
+
+
+def log_slow_query(execute, sql, params, many, context):
+    """Database execute wrapper logging request queries slower than ``SLOW_QUERY_THRESHOLD_MS``.
+
+    The query is logged right away with its fingerprint, view and serializer, and
+    handed to the `recorder` to capture its plan. Queries run outside of a request,
+    such as migrations and management commands, are left out.
+    """
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    request = current_request.get()
+    if not threshold or request is None or getattr(_recording, 'active', False):
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        duration = (time.perf_counter() - started) * 1000
+        if duration >= threshold:
+            match = request.resolver_match
+            metrics = current_metrics.get()
+            normalized_sql = normalize(sql)
+            entry = {
+                'alias': context['connection'].alias,
+                'sql': sql,
+                'params': list(params[0] if many and params else params or ()),
+                'normalized_sql': normalized_sql,
+                'fingerprint': fingerprint(normalized_sql),
+                'duration': duration,
+                'view_name': match.view_name if match else None,
+                'serializer': metrics.serializer if metrics else None,
+            }
+            logger.warning(json.dumps({
+                key: entry[key] for key in ('fingerprint', 'duration', 'view_name', 'serializer', 'normalized_sql')
+            }))
+            recorder.submit(entry)
+
+
+def install_slow_query_log(sender, connection, **kwargs):
+    """Add `log_slow_query` to every new database connection."""
+    if log_slow_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_slow_query)
+
+
+def install():
+    """Start logging slow queries, called once from `CoreConfig.ready`."""
+    connection_created.connect(install_slow_query_log, dispatch_uid='core.slow_queries')
@@ -0,0 +1,106 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+
+def parse_field_names(value):
+    """Split a comma separated list of field names, ignoring blanks."""
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class SparseFieldsetMixin:
+    """View mixin returning only the serializer fields asked for with ``?fields=`` or left out with ``?omit=``.
+
+    The requested fields are resolved against the serializer before the queryset
+    is evaluated. Prefetches and annotations are only added for fields that are
+    returned, and when every returned field maps to a model column the queryset
+    loads just those columns with ``only()``.
+
+    Views describe what serializer fields need beyond their own column:
+    `field_prefetches` and `field_annotations` list the lookups and annotations
+    they read, and `field_columns` the columns read by fields which are not model
+    fields, such as properties. Without an entry such a field disables ``only()``.
+    """
+
+    field_prefetches = {}
+    field_annotations = {}
+    field_columns = {}
+
+    def get_serializer_fields(self):
+        """Every field of the serializer of the current action, by name."""
+        if not hasattr(self, '_serializer_fields'):
+            self._serializer_fields = self.get_serializer_class()(context=self.get_serializer_context()).fields
+        return self._serializer_fields
+
+    def get_sparse_fields(self):
+        """Names of the fields to return, or None when the request asks for every field.
+
+        :raises ValidationError: when an unknown field is requested or omitted.
+        """
+        if not hasattr(self, '_sparse_fields'):
+            self._sparse_fields = None
+            params = self.request.query_params
+            if self.request.method in SAFE_METHODS and ('fields' in params or 'omit' in params):
+                available = list(self.get_serializer_fields())
+                requested = parse_field_names(params.get('fields')) or available
+                omitted = parse_field_names(params.get('omit'))
+                unknown = sorted(set(requested + omitted) - set(available))
+                if unknown:
+                    raise ValidationError({"fields": f"Unknown fields: {', '.join(unknown)}."})
+                self._sparse_fields = [name for name in available if name in requested and name not in omitted]
+        return self._sparse_fields
+
+    def get_sparse_columns(self, model, fields):
+        """Model fields to load for the returned fields, or None when some cannot be resolved."""
+        serializer_fields = self.get_serializer_fields()
+        columns = [model._meta.pk.name]
+        for name in fields:
+            if name in self.field_columns:
+                columns.extend(self.field_columns[name])
+                continue
+            source = serializer_fields[name].source
+            if source == '*':
+                return None
+            try:
+                model_field = model._meta.get_field(source.split('.')[0])
+            except FieldDoesNotExist:
+                return None
+            if model_field.concrete and not model_field.many_to_many:
+                columns.append(model_field.name)
+        return columns
+
+    def filter_queryset(self, queryset):
+        """Add the prefetches and annotations of the returned fields, loading only their columns."""
+        queryset = super().filter_queryset(queryset)
+        if self.request.method not in SAFE_METHODS:
+            return queryset
+
+        fields = self.get_sparse_fields()
+        for name in fields if fields is not None else self.get_serializer_fields():
+            if name in self.field_prefetches:
+                queryset = queryset.prefetch_related(*self.field_prefetches[name])
+            if name in self.field_annotations:
+                queryset = queryset.annotate(**self.field_annotations[name])
+
+        if fields is not None:
+            columns = self.get_sparse_columns(queryset.model, fields)
+            if columns is not None:
+                queryset = queryset.only(*columns)
+        return queryset
+
+    def get_serializer(self, *args, **kwargs):
+        """Return the serializer with the fields that were not requested removed."""
+        serializer = super().get_serializer(*args, **kwargs)
+        fields = self.get_sparse_fields()
+        if fields is not None:
+            target = getattr(serializer, 'child', serializer)
+            for name in set(target.fields) - set(fields):
+                target.fields.pop(name)
+        return serializer
+
+    def get_sparse_data(self, data):
+        """Keep the requested fields of an already serialized document."""
+        fields = self.get_sparse_fields()
+        if fields is None:
+            return data
+        return {name: data[name] for name in fields if name in data}
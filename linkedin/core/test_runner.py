@@ -0,0 +1,23 @@
+import logging
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Test runner that turns view query budgets into failures and keeps request logs quiet."""
+
+    def setup_test_environment(self, **kwargs):
+        """Enforce query budgets, write metrics to a directory of the run and turn off the slow query log."""
+        super().setup_test_environment(**kwargs)
+        settings.QUERY_BUDGET_STRICT = True
+        settings.METRICS_DIR = tempfile.mkdtemp(prefix='metrics-')
+        settings.SLOW_QUERY_THRESHOLD_MS = 0
+        logging.getLogger('core').setLevel(logging.WARNING)
+
+    def teardown_test_environment(self, **kwargs):
+        """Remove the metrics of the run."""
+        shutil.rmtree(settings.METRICS_DIR, ignore_errors=True)
+        super().teardown_test_environment(**kwargs)
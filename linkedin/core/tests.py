@@ -1,3 +1,958 @@
-from django.test import TestCase
+import decimal
+import gzip
+import json
+import multiprocessing
+import uuid
+import os
+import tempfile
+import time
+import unittest.mock
+import zlib
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.db.backends.sqlite3.base import DatabaseWrapper as SQLiteWrapper
+from django.http import HttpResponse, StreamingHttpResponse
+from django.conf import settings
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import generics
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
+
+from feed.models import Post, PostReaction, Comment
+from job.models import JobPost
+from .blacklist import blacklist_changed, blacklist_filter
+from .checks import check_shared_cache
+from .compression import negotiate
+from .db.utils import retry_on_busy
+from .db_routers import PrimaryReplicaRouter, current_request, pin_primary, replica_allowed
+from .instrumentation import QueryBudgetExceeded, RequestMetrics, SerializerTimingMixin, current_metrics
+from .metrics import Counter, Gauge, REGISTRY, mark_process_dead, render
+from .slow_queries import normalize, recorder
+from .middleware import CompressionMiddleware, is_read_view
+from .models import CustomUser, UserProfile, Follow, RequestProfile, SlowQuery, Experience, ProfileDocument
+from .profile_documents import rebuild_document, rebuilder
+from .projection import ProjectionSerializer
+from .renderers import FastJSONRenderer, stream_json_list
+from .serializers import (
+    CustomUserSerializer, GetFollowSerializer, GetExperienceSerializer, GetEducationSerializer,
+    GetCertificationSerializer, GetCourseSerializer,
+)
+from .tokens import FilteredRefreshToken
+from .views import UserProfileViewSet, FollowerListView, AsyncUserProfileDetailView, LogoutAllView, UserListView
+
+
+class StatelessJWTAuthenticationTests(APITestCase):
+    """Tests for the claim based JWT authentication."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(
+            email='jane@example.com', password='secret', username='jane', user_type='employee'
+        )
+        self.profile = UserProfile.objects.create(user=self.user)
+
+    def login(self):
+        response = self.client.post(
+            reverse('core:token_obtain_pair'), {'email': 'jane@example.com', 'password': 'secret'}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_authenticated_request_skips_user_and_profile_queries(self):
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.client.get(reverse('core:follower-list'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('core:follower-list'))
+
+        self.assertEqual(response.status_code, 200)
+        tables = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('"core_customuser"', tables)
+        self.assertNotIn('FROM "core_userprofile"', tables)
+
+    def test_logout_all_revokes_access_tokens(self):
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+
+        response = self.client.post(reverse('core:logout_all'))
+        self.assertEqual(response.status_code, 205)
+
+        response = self.client.get(reverse('core:follower-list'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_deactivated_user_is_rejected(self):
+        tokens = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get(reverse('core:follower-list'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_production_profile_requires_shared_cache(self):
+        locmem = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        shared = {'default': {'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'core_cache'}}
+        with self.settings(DATABASE_PROFILE='postgres', CACHES=locmem):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['core.E001'])
+        with self.settings(DATABASE_PROFILE='postgres', CACHES=shared):
+            self.assertEqual(check_shared_cache(None), [])
+        with self.settings(DATABASE_PROFILE='sqlite', CACHES=locmem):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class TokenBlacklistTests(APITestCase):
+    """Tests for set based logout and the blacklist filter."""
+
+    def setUp(self):
+        cache.clear()
+        blacklist_filter.reset()
+        self.user = CustomUser.objects.create_user(
+            email='jane@example.com', password='secret', username='jane', user_type='employee'
+        )
+
+    def login(self):
+        response = self.client.post(
+            reverse('core:token_obtain_pair'), {'email': 'jane@example.com', 'password': 'secret'}
+        )
+        return response.data
+
+    def test_logout_all_blacklists_every_device_in_one_insert(self):
+        refresh_tokens = [self.login()['refresh'] for _ in range(3)]
+        access = self.login()['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.post(reverse('core:logout_all'))
+
+        statements = [query['sql'] for query in queries.captured_queries]
+        inserts = [sql for sql in statements if sql.startswith('INSERT')]
+        self.assertEqual(len(inserts), 1)
+        self.assertIn('SELECT', inserts[0])
+        self.assertFalse([sql for sql in statements if sql.startswith('SELECT "token_blacklist_outstandingtoken"')])
+        self.assertEqual(BlacklistedToken.objects.count(), 4)
+
+        self.client.credentials()
+        response = self.client.post(reverse('core:token_refresh'), {'refresh': refresh_tokens[0]})
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh_skips_blacklist_query_for_unknown_token(self):
+        refresh = self.login()['refresh']
+        blacklist_filter.refresh(force=True)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('core:token_refresh'), {'refresh': refresh})
+
+        self.assertEqual(response.status_code, 200)
+        tables = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('token_blacklist_blacklistedtoken', tables)
+
+    def test_token_blacklisted_elsewhere_is_rejected_at_once(self):
+        refresh = self.login()['refresh']
+        blacklist_filter.refresh(force=True)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BlacklistedToken.objects.create(token=OutstandingToken.objects.get())
+
+        response = self.client.post(reverse('core:token_refresh'), {'refresh': refresh})
+        self.assertEqual(response.status_code, 401)
+
+    def test_rows_committed_out_of_id_order_are_loaded(self):
+        first, second = self.login()['refresh'], self.login()['refresh']
+        first_token, second_token = OutstandingToken.objects.order_by('pk')
+        BlacklistedToken.objects.create(id=11, token=second_token)
+        blacklist_filter.refresh(force=True)
+
+        # A lower id committed after the higher one was loaded.
+        BlacklistedToken.objects.create(id=10, token=first_token)
+        blacklist_changed()
+
+        self.assertTrue(blacklist_filter.might_contain(first_token.jti))
+        response = self.client.post(reverse('core:token_refresh'), {'refresh': first})
+        self.assertEqual(response.status_code, 401)
+        response = self.client.post(reverse('core:token_refresh'), {'refresh': second})
+        self.assertEqual(response.status_code, 401)
+
+    def test_blacklisted_token_cannot_refresh(self):
+        refresh = self.login()['refresh']
+        FilteredRefreshToken(refresh).blacklist()
+
+        response = self.client.post(reverse('core:token_refresh'), {'refresh': refresh})
+        self.assertEqual(response.status_code, 401)
+
+    def test_purge_expired_tokens(self):
+        self.login()
+        OutstandingToken.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.first())
+
+        call_command('purge_expired_tokens', batch_size=1, stdout=StringIO())
+
+        self.assertFalse(OutstandingToken.objects.exists())
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+
+class RegistrationTests(APITestCase):
+    """Tests for user registration."""
+
+    def test_registration_writes_user_once_with_hashed_password(self):
+        data = {
+            'username': 'john', 'email': 'john@example.com', 'password': 'secret', 'confirmed_password': 'secret',
+            'first_name': 'John', 'last_name': 'Doe', 'user_type': 'employee'
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('core:register'), data)
+
+        self.assertEqual(response.status_code, 201)
+        writes = [query for query in queries.captured_queries if query['sql'].startswith(('INSERT', 'UPDATE'))]
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(CustomUser.objects.get(email='john@example.com').check_password('secret'))
+
+
+class BulkUserImportTests(APITestCase):
+    """Tests for the bulk user import endpoint."""
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com', password='secret', username='admin', user_type='admin'
+        )
+        self.client.force_authenticate(self.admin)
+
+    def test_ndjson_import_reports_row_errors_without_aborting(self):
+        body = '\n'.join([
+            '{"username": "a1", "email": "a1@example.com", "password": "pw"}',
+            '{"username": "a2", "email": "not-an-email"}',
+            '{"username": "admin", "email": "other@example.com"}',
+            'not json',
+            '{"username": "a1", "email": "dup@example.com"}',
+            '{"username": "a3", "email": "a3@example.com"}',
+        ])
+        response = self.client.post(reverse('core:bulk-import'), body, content_type='application/x-ndjson')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 2)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3, 4, 5])
+        self.assertTrue(CustomUser.objects.get(username='a1').check_password('pw'))
+        self.assertEqual(UserProfile.objects.filter(user__username__in=['a1', 'a3']).count(), 2)
+
+    def test_csv_import(self):
+        body = 'username,email,first_name\nb1,b1@example.com,Bea\nb2,b2@example.com,Bob\n'
+        response = self.client.post(reverse('core:bulk-import'), body, content_type='text/csv')
+
+        self.assertEqual(response.data, {'created': 2, 'errors': []})
+        self.assertFalse(CustomUser.objects.get(username='b1').has_usable_password())
+
+    def test_non_admin_is_rejected(self):
+        user = CustomUser.objects.create_user(email='e@example.com', password='secret', username='e')
+        self.client.force_authenticate(user)
+        response = self.client.post(reverse('core:bulk-import'), '', content_type='text/csv')
+        self.assertEqual(response.status_code, 403)
+
+
+class AsyncUserProfileDetailTests(APITestCase):
+    """Tests for the async profile detail view."""
+
+    def test_profile_detail_matches_sync_view(self):
+        user = CustomUser.objects.create_user(email='jane@example.com', password='secret', username='jane')
+        other = CustomUser.objects.create_user(email='joe@example.com', password='secret', username='joe')
+        profile = UserProfile.objects.create(user=user)
+        Follow.objects.create(follower=UserProfile.objects.create(user=other), following=profile)
+        self.client.force_authenticate(user)
+
+        sync = self.client.get(reverse('core:userprofile-detail', args=[profile.pk]))
+        response = self.client.get(reverse('core:async-profile-detail', args=[profile.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), sync.json())
+
+
+class ReplicaRoutingTests(APITestCase):
+    """Tests for replica eligibility and read-your-writes stickiness."""
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user(email='jane@example.com', password='secret', username='jane')
+
+    def test_only_list_and_retrieve_views_are_replica_eligible(self):
+        self.assertTrue(is_read_view(UserProfileViewSet.as_view({'get': 'list'}), 'GET'))
+        self.assertTrue(is_read_view(UserProfileViewSet.as_view({'get': 'retrieve'}), 'GET'))
+        self.assertFalse(is_read_view(UserProfileViewSet.as_view({'post': 'create'}), 'POST'))
+        self.assertTrue(is_read_view(FollowerListView.as_view(), 'GET'))
+        self.assertTrue(is_read_view(AsyncUserProfileDetailView.as_view(), 'GET'))
+        self.assertFalse(is_read_view(LogoutAllView.as_view(), 'GET'))
+
+    def make_request(self, user):
+        request = RequestFactory().get('/')
+        request.replica_view = True
+        request.user = user
+        return request
+
+    def test_writer_reads_from_primary_within_window(self):
+        self.assertTrue(replica_allowed(self.make_request(self.user)))
+
+        pin_primary(self.user.pk)
+
+        self.assertFalse(replica_allowed(self.make_request(self.user)))
+        self.assertTrue(replica_allowed(self.make_request(AnonymousUser())))
+
+    def test_database_cache_is_read_from_primary(self):
+        from django.core.cache.backends.db import DatabaseCache
+
+        request = self.make_request(self.user)
+        token = current_request.set(request)
+        try:
+            with unittest.mock.patch('core.db_routers.connections') as connections:
+                connections.settings = {'default': {}, 'replica': {}}
+                router = PrimaryReplicaRouter()
+                self.assertEqual(router.db_for_read(UserProfile), 'replica')
+                self.assertEqual(router.db_for_read(DatabaseCache('core_cache', {}).cache_model_class), 'default')
+        finally:
+            current_request.reset(token)
+
+    def test_write_request_pins_user(self):
+        self.client.force_authenticate(self.user)
+        self.client.post(reverse('core:logout_all'))
+        self.assertFalse(replica_allowed(self.make_request(self.user)))
+
+
+class TunedSQLiteBackendTests(TransactionTestCase):
+    """Tests for the tuned SQLite options and busy retries."""
+
+    def test_connection_applies_options(self):
+        with tempfile.TemporaryDirectory() as directory:
+            wrapper = SQLiteWrapper({
+                **connection.settings_dict, 'NAME': os.path.join(directory, 'test.sqlite3'),
+                'OPTIONS': settings.SQLITE_WAL_OPTIONS,
+            }, alias='tuned')
+            try:
+                with wrapper.cursor() as cursor:
+                    cursor.execute('PRAGMA journal_mode')
+                    self.assertEqual(cursor.fetchone()[0], 'wal')
+                    cursor.execute('PRAGMA busy_timeout')
+                    self.assertEqual(cursor.fetchone()[0], 5000)
+                self.assertEqual(wrapper.transaction_mode, 'IMMEDIATE')
+            finally:
+                wrapper.close()
+
+    def test_retry_on_busy_retries_locked_transactions(self):
+        calls = []
+
+        @retry_on_busy
+        def write():
+            calls.append(1)
+            if len(calls) < 3:
+                raise OperationalError('database is locked')
+            return 'done'
+
+        self.assertEqual(write(), 'done')
+        self.assertEqual(len(calls), 3)
+
+
+class QueryInstrumentationTests(APITestCase):
+    """Tests for the per view query and latency instrumentation."""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='jane@example.com', password='secret', username='jane')
+        self.profile = UserProfile.objects.create(user=self.user)
+        self.client.force_authenticate(self.user)
+
+    @override_settings(DEBUG=True)
+    def test_debug_responses_carry_metrics_headers(self):
+        response = self.client.get(reverse('core:user-list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Query-Count'], '1')
+        for header in ('X-DB-Time-Ms', 'X-Serializer-Time-Ms', 'X-Response-Time-Ms'):
+            self.assertGreaterEqual(float(response[header]), 0)
+
+    def test_metrics_are_logged_outside_debug(self):
+        with self.assertLogs('core.middleware', 'INFO') as logs:
+            self.client.get(reverse('core:user-list'))
+
+        self.assertIn('"view": "core:user-list"', logs.output[0])
+        self.assertIn('"queries": 1', logs.output[0])
+
+    def test_views_time_their_serializers(self):
+        class UserView(SerializerTimingMixin, generics.GenericAPIView):
+            serializer_class = CustomUserSerializer
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        try:
+            serializer = UserView(request=None, format_kwarg=None).get_serializer([self.user], many=True)
+            data = serializer.data
+        finally:
+            current_metrics.reset(token)
+
+        self.assertEqual(data, CustomUserSerializer([self.user], many=True).data)
+        self.assertGreater(metrics.serializer_time, 0)
+        self.assertEqual(metrics.serializer_depth, 0)
+
+    def test_exceeding_query_budget_fails(self):
+        with self.settings(QUERY_BUDGET_STRICT=True):
+            with unittest.mock.patch.object(FollowerListView, 'query_budget', 0):
+                with self.assertRaises(QueryBudgetExceeded):
+                    self.client.get(reverse('core:follower-list'))
+
+
+class SeedScaleTests(APITestCase):
+    """Tests for the synthetic dataset generator."""
+
+    def seed(self):
+        call_command(
+            'seed_scale', users=50, posts=40, comments=30, jobs=5, tags=8, workers=0, chunk_size=7, seed=3,
+            stdout=StringIO()
+        )
+        first_profile = UserProfile.objects.order_by('pk').first().pk
+        first_post = Post.objects.order_by('pk').first().pk
+        follows = Follow.objects.values_list('follower', 'following')
+        reactions = PostReaction.objects.values_list('post', 'reaction_by')
+        return (
+            sorted((a - first_profile, b - first_profile) for a, b in follows),
+            sorted((a - first_post, b - first_profile) for a, b in reactions),
+        )
+
+    def test_seed_creates_related_rows(self):
+        follows, reactions = self.seed()
+
+        self.assertEqual(UserProfile.objects.count(), 50)
+        self.assertEqual(Post.objects.count(), 40)
+        self.assertEqual(Comment.objects.count(), 30)
+        self.assertEqual(JobPost.objects.count(), 5)
+        self.assertTrue(follows and reactions)
+        self.assertFalse([pair for pair in follows if pair[0] == pair[1]])
+        self.assertTrue(CustomUser.objects.first().check_password('password'))
+
+    def test_same_seed_gives_same_data(self):
+        first = self.seed()
+        CustomUser.objects.all().delete()
+        JobPost.objects.all().delete()
+
+        self.assertEqual(self.seed(), first)
+
+
+class ProfilingTests(APITestCase):
+    """Tests for the sampling profiler hook and its flamegraph endpoint."""
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user(
+            email='admin@example.com', password='secret', username='admin', user_type='admin'
+        )
+        self.user = CustomUser.objects.create_user(email='jane@example.com', password='secret', username='jane')
+        UserProfile.objects.create(user=self.user)
+
+    @override_settings(PROFILING_TOKEN='let-me-profile', PROFILING_INTERVAL=0.001, QUERY_BUDGET_STRICT=True)
+    def test_authorized_header_profiles_request(self):
+        self.client.force_authenticate(self.user)
+        # Storing the profile must not count against the query budget of the view.
+        with unittest.mock.patch('core.views.UserListView.list', side_effect=self.slow_list), \
+                unittest.mock.patch('core.views.UserListView.query_budget', 0, create=True):
+            self.client.get(reverse('core:user-list'), HTTP_X_PROFILE_TOKEN='wrong')
+            self.assertFalse(RequestProfile.objects.exists())
+            self.client.get(reverse('core:user-list'), HTTP_X_PROFILE_TOKEN='let-me-profile')
+
+        profile = RequestProfile.objects.get()
+        self.assertEqual(profile.view_name, 'core:user-list')
+        self.assertTrue(any('slow_list' in stack for stack in profile.stacks))
+
+    def slow_list(self, request, *args, **kwargs):
+        time.sleep(0.05)
+        return Response([])
+
+    def test_flamegraph_merges_stacks_for_admins_only(self):
+        for stacks in ({'a;b': 2, 'a;c': 1}, {'a;b': 3}):
+            RequestProfile.objects.create(
+                view_name='feed:list-comments-for-post', method='GET', duration=0.1,
+                samples=sum(stacks.values()), stacks=stacks
+            )
+        url = reverse('core:profiling-flamegraph')
+
+        self.client.force_authenticate(self.user)
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(url, {'view': 'feed:list-comments-for-post'})
+        self.assertEqual(response.data['samples'], 6)
+        self.assertEqual(response.data['stacks'][0], {'stack': 'a;b', 'samples': 5})
+
+        response = self.client.get(url, {'view': 'feed:list-comments-for-post', 'output': 'collapsed'})
+        self.assertEqual(response.content.decode(), 'a;b 5\na;c 1')
+
+
+def increment_in_child(name):
+    REGISTRY[name].inc(2, kind='child')
+
+
+class MetricsTests(APITestCase):
+    """Tests for the multi process Prometheus metrics."""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        settings_override = override_settings(METRICS_DIR=self.directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.addCleanup(self.directory.cleanup)
+
+    def metric(self, metric_class, name):
+        self.addCleanup(REGISTRY.pop, name)
+        return metric_class(name, "Test metric.", ['kind'])
+
+    def test_values_are_summed_across_processes(self):
+        counter = self.metric(Counter, 'test_events_total')
+        counter.inc(kind='child')
+        child = multiprocessing.get_context('fork').Process(target=increment_in_child, args=('test_events_total',))
+        child.start()
+        child.join()
+
+        self.assertIn('test_events_total{kind="child"} 3.0', render())
+
+    def test_gauges_of_exited_processes_are_dropped(self):
+        gauge = self.metric(Gauge, 'test_depth')
+        gauge.set(4, kind='child')
+        child = multiprocessing.get_context('fork').Process(target=increment_in_child, args=('test_depth',))
+        child.start()
+        child.join()
+
+        self.assertIn('test_depth{kind="child"} 4.0', render())
+
+    def test_requests_and_fanout_are_exposed(self):
+        user = CustomUser.objects.create_user(email='jane@example.com', password='secret', username='jane')
+        profile = UserProfile.objects.create(user=user)
+        for name in ('joe', 'ann'):
+            follower = CustomUser.objects.create_user(email=f'{name}@example.com', password='secret', username=name)
+            Follow.objects.create(follower=UserProfile.objects.create(user=follower), following=profile)
+        Post.objects.create(post_owner=profile, text_body='Hello')
+        self.client.force_authenticate(user)
+        self.client.get(reverse('core:user-list'))
+
+        with self.settings(METRICS_TOKEN='scraper'):
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scraper')
+
+        text = response.content.decode()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('http_request_duration_seconds_count{method="GET",view="core:user-list"} 1.0', text)
+        self.assertIn('db_queries_total{method="GET",view="core:user-list"} 1.0', text)
+        self.assertIn('notification_fanout_size_bucket{le="1.0"} 0.0', text)
+        self.assertIn('notification_fanout_size_bucket{le="5.0"} 1.0', text)
+        self.assertIn('notification_fanout_size_sum 2.0', text)
+
+    def test_files_of_exited_processes_are_folded_into_the_archive(self):
+        counter = self.metric(Counter, 'test_events_total')
+        gauge = self.metric(Gauge, 'test_depth')
+        counter.inc(kind='child')
+        child = multiprocessing.get_context('fork').Process(target=increment_in_child, args=('test_events_total',))
+        child.start()
+        child.join()
+        gauge_child = multiprocessing.get_context('fork').Process(target=increment_in_child, args=('test_depth',))
+        gauge_child.start()
+        gauge_child.join()
+
+        mark_process_dead(child.pid)
+
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, f'metrics-{child.pid}.db')))
+        self.assertIn('test_events_total{kind="child"} 3.0', render())
+        self.assertFalse(os.path.exists(os.path.join(self.directory.name, f'metrics-{gauge_child.pid}.db')))
+        self.assertIn('test_events_total{kind="child"} 3.0', render())
+        self.assertNotIn('test_depth{', render())
+
+    def test_token_is_required(self):
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer ').status_code, 403)
+        with self.settings(METRICS_TOKEN='scraper'):
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+            response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer scraper')
+            self.assertEqual(response.status_code, 200)
+
+
+class SlowQueryLogTests(APITestCase):
+    """Tests for the slow query log and its report."""
+
+    def test_normalize_ignores_parameters_and_list_lengths(self):
+        self.assertEqual(
+            normalize('SELECT * FROM "t" WHERE "id" IN (%s, %s, %s) AND "name" = \'x\' LIMIT 21'),
+            normalize('SELECT * FROM "t"  WHERE "id" IN (%s) AND "name" = \'yz\' LIMIT 1'),
+        )
+
+    @override_settings(SLOW_QUERY_THRESHOLD_MS=0.000001)
+    def test_slow_queries_are_recorded_with_view_serializer_and_plan(self):
+        user = CustomUser.objects.create_user(email='jane@example.com', password='secret', username='jane')
+        UserProfile.objects.create(user=user)
+        self.client.force_authenticate(user)
+
+        with unittest.mock.patch.object(recorder, 'submit') as submit, self.assertLogs('core.slow_queries'):
+            self.client.get(reverse('core:user-list'))
+
+            entry = submit.call_args.args[0]
+            self.assertEqual(entry['view_name'], 'core:user-list')
+            self.assertEqual(entry['serializer'], 'CustomUserSerializer')
+
+            recorder.record(entry)
+            recorder.record(entry)
+            self.assertIn('SCAN', SlowQuery.objects.first().plan)
+
+            stdout = StringIO()
+            call_command('slow_queries', plans=True, stdout=stdout)
+        self.assertIn(f"{entry['fingerprint']}  count 2", stdout.getvalue())
+        self.assertIn('core:user-list CustomUserSerializer', stdout.getvalue())
+
+
+class FullProfileTests(APITestCase):
+    """Tests for the full profile endpoint."""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='jane@example.com', password='secret', username='jane')
+        other = CustomUser.objects.create_user(email='joe@example.com', password='secret', username='joe')
+        self.profile = UserProfile.objects.create(user=self.user)
+        Follow.objects.create(follower=UserProfile.objects.create(user=other), following=self.profile)
+        Experience.objects.create(person=self.profile, title='Engineer', company_name='Acme', location='Paris')
+        self.url = reverse('core:userprofile-full', args=[self.profile.pk])
+        self.client.force_authenticate(self.user)
+
+    def test_full_profile_is_built_once_then_read_from_the_document(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(queries), 7)
+        self.assertEqual(response.json()['user']['email'], 'jane@example.com')
+        self.assertEqual(response.json()['followers_count'], 0)
+        self.assertEqual(response.json()['following_count'], 1)
+        self.assertEqual([experience['title'] for experience in response.json()['experiences']], ['Engineer'])
+
+        with CaptureQueriesContext(connection) as queries:
+            stored = self.client.get(self.url)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(stored.json(), response.json())
+
+    def test_changes_to_sections_are_shown_at_once(self):
+        self.client.get(self.url)
+        Experience.objects.create(person=self.profile, title='Manager', company_name='Acme', location='Paris')
+        self.user.first_name = 'Jane'
+        self.user.save()
+
+        response = self.client.get(self.url)
+        self.assertEqual(len(response.json()['experiences']), 2)
+        self.assertEqual(response.json()['user']['first_name'], 'Jane')
+
+    def test_missing_profile_is_not_found(self):
+        response = self.client.get(reverse('core:userprofile-full', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+
+class ProfileSectionFilterTests(APITestCase):
+    """Tests for owner filtering of the profile section viewsets."""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='jane@example.com', password='secret', username='jane')
+        other = CustomUser.objects.create_user(email='joe@example.com', password='secret', username='joe')
+        self.profile = UserProfile.objects.create(user=self.user)
+        self.other = UserProfile.objects.create(user=other)
+        for person, title, start_date in [
+            (self.profile, 'Intern', '2019-01-01'), (self.profile, 'Freelance', None),
+            (self.profile, 'Engineer', '2021-01-01'), (self.other, 'CTO', None),
+        ]:
+            Experience.objects.create(
+                person=person, title=title, company_name='Acme', location='Paris', start_date=start_date
+            )
+        self.client.force_authenticate(self.user)
+
+    def test_list_is_filtered_by_person_in_date_order(self):
+        response = self.client.get(reverse('core:experience-list'), {'person': self.profile.pk})
+        self.assertEqual([experience['title'] for experience in response.json()], ['Engineer', 'Intern', 'Freelance'])
+
+        response = self.client.get(reverse('core:experience-list'), {'person': 'me'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_mine_returns_sections_of_the_token_profile(self):
+        response = self.client.get(reverse('core:experience-mine'))
+        self.assertEqual([experience['title'] for experience in response.json()], ['Engineer', 'Intern', 'Freelance'])
+
+        response = self.client.get(reverse('core:course-mine'))
+        self.assertEqual(response.json(), [])
+
+    def test_mine_without_profile_is_not_found(self):
+        user = CustomUser.objects.create_user(email='ann@example.com', password='secret', username='ann')
+        self.client.force_authenticate(user)
+
+        response = self.client.get(reverse('core:experience-mine'))
+        self.assertEqual(response.status_code, 404)
+
+    def test_person_filter_uses_the_person_index(self):
+        plan = Experience.objects.filter(person_id=self.profile.pk).explain()
+        self.assertIn('experience_person_start_idx', plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+
+class ProfileDocumentTests(APITestCase):
+    """Tests for the stored profile documents and their background rebuilds."""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='jane@example.com', password='secret', username='jane')
+        self.profile = UserProfile.objects.create(user=self.user, headline='Engineer')
+        self.url = reverse('core:userprofile-detail', args=[self.profile.pk])
+        self.client.force_authenticate(self.user)
+
+    def test_retrieve_reads_the_stored_document_by_primary_key(self):
+        rebuild_document(self.profile.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(response.json()['headline'], 'Engineer')
+        self.assertEqual(response.json()['user']['email'], 'jane@example.com')
+
+    def test_fields_select_document_keys(self):
+        response = self.client.get(self.url, {'fields': 'headline,experiences'})
+        self.assertEqual(response.json(), {'headline': 'Engineer', 'experiences': []})
+
+    def test_missing_document_is_built_on_read(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.json()['experiences'], [])
+        self.assertTrue(ProfileDocument.objects.filter(pk=self.profile.pk).exists())
+
+        response = self.client.get(reverse('core:userprofile-detail', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_changes_leave_the_document_stale_until_rebuilt(self):
+        rebuild_document(self.profile.pk)
+        Experience.objects.create(person=self.profile, title='Engineer', company_name='Acme', location='Paris')
+        self.assertTrue(ProfileDocument.objects.get(pk=self.profile.pk).is_stale)
+
+        response = self.client.get(self.url)
+        self.assertEqual([experience['title'] for experience in response.json()['experiences']], ['Engineer'])
+        self.assertFalse(ProfileDocument.objects.get(pk=self.profile.pk).is_stale)
+
+        Experience.objects.create(person=self.profile, title='Manager', company_name='Acme', location='Paris')
+        stdout = StringIO()
+        call_command('rebuild_profile_documents', stdout=stdout)
+        self.assertIn('Rebuilt 1 profile documents.', stdout.getvalue())
+        self.assertEqual(len(ProfileDocument.objects.get(pk=self.profile.pk).document['experiences']), 2)
+
+    def test_file_urls_are_stored_relative_and_served_absolute(self):
+        UserProfile.objects.filter(pk=self.profile.pk).update(profile_pic='Images/Profile/jane.png')
+        Experience.objects.create(
+            person=self.profile, title='Engineer', company_name='Acme', location='Paris', media='resume.pdf'
+        )
+        rebuild_document(self.profile.pk)
+
+        stored = ProfileDocument.objects.get(pk=self.profile.pk).document
+        self.assertEqual(stored['profile_pic'], '/Images/Profile/jane.png')
+        response = self.client.get(self.url).json()
+        self.assertEqual(response['profile_pic'], 'http://testserver/Images/Profile/jane.png')
+        self.assertEqual(response['experiences'][0]['media'], 'http://testserver/resume.pdf')
+        self.assertIsNone(response['cover_pic'])
+
+    def test_bursts_of_changes_are_rebuilt_once(self):
+        with self.captureOnCommitCallbacks(execute=True), unittest.mock.patch.object(rebuilder, '_thread') as thread:
+            thread.is_alive.return_value = True
+            for title in ('Intern', 'Engineer', 'Manager'):
+                Experience.objects.create(person=self.profile, title=title, company_name='Acme', location='Paris')
+
+        with unittest.mock.patch('core.profile_documents.rebuild_document') as rebuild:
+            self.assertEqual(rebuilder.run_due(now=0), [])
+            self.assertEqual(rebuilder.run_due(now=time.monotonic() + 60), [self.profile.pk])
+        rebuild.assert_called_once_with(self.profile.pk)
+
+    def test_batch_reads_stored_documents_in_one_query(self):
+        other = UserProfile.objects.create(
+            user=CustomUser.objects.create_user(email='joe@example.com', password='secret', username='joe')
+        )
+        rebuild_document(self.profile.pk)
+        rebuild_document(other.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('core:userprofile-batch'), {'ids': f'{other.pk},{self.profile.pk}'})
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(list(response.json()), [str(other.pk), str(self.profile.pk)])
+        self.assertEqual(response.json()[str(self.profile.pk)]['headline'], 'Engineer')
+
+        ProfileDocument.objects.filter(pk=other.pk).delete()
+        response = self.client.get(reverse('core:userprofile-batch'), {'ids': f'{other.pk},0'})
+        self.assertEqual(list(response.json()), [str(other.pk)])
+
+
+    def test_batch_rebuilds_a_few_documents_and_serves_the_others_live(self):
+        others = [
+            UserProfile.objects.create(
+                user=CustomUser.objects.create_user(email=f'{name}@example.com', password='secret', username=name),
+                headline=name,
+            ) for name in ('joe', 'ann')
+        ]
+        ids = [self.profile.pk] + [profile.pk for profile in others]
+
+        with unittest.mock.patch.object(UserProfileViewSet, 'max_inline_rebuilds', 1), \
+                self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.get(reverse('core:userprofile-batch'), {'ids': ','.join(map(str, ids))})
+
+        self.assertEqual([data['headline'] for data in response.json().values()], ['Engineer', 'joe', 'ann'])
+        self.assertEqual(list(ProfileDocument.objects.values_list('pk', flat=True)), [self.profile.pk])
+        self.assertEqual(len(callbacks), 2)
+
+
+class ProjectionContractTests(APITestCase):
+    """Contract shared by the projectable serializers: the projection matches the ``ModelSerializer`` output."""
+
+    def setUp(self):
+        call_command('seed_scale', users=20, follows=3, posts=10, reactions=3, comments=10, replies=1, jobs=3,
+                     applications=2, workers=0, stdout=StringIO())
+        profile = UserProfile.objects.first()
+        Experience.objects.create(
+            person=profile, title='Engineer', company_name='Acme', location='Paris', media='resume.pdf'
+        )
+        Experience.objects.create(person=profile, title='Intern', company_name='Acme', location='Paris')
+        self.request = RequestFactory().get('/')
+
+    def test_projection_matches_model_serializers(self):
+        from feed.serializers import (
+            GetPostReactionSerializer, GetCommentReactionSerializer, GetReplyReactionSerializer, NotificationSerializer
+        )
+        from job.serializers import GetJobApplicationSerializer
+
+        for serializer_class in (
+            CustomUserSerializer, GetFollowSerializer, GetExperienceSerializer, GetEducationSerializer,
+            GetCertificationSerializer, GetCourseSerializer, GetPostReactionSerializer, GetCommentReactionSerializer,
+            GetReplyReactionSerializer, NotificationSerializer, GetJobApplicationSerializer,
+        ):
+            queryset = serializer_class.Meta.model.objects.order_by('pk')
+            for context in ({}, {'request': self.request}):
+                with self.subTest(serializer=serializer_class.__name__, context=bool(context)):
+                    expected = serializer_class(queryset, many=True, context=context).data
+                    projected = ProjectionSerializer(queryset, serializer_class, context=context).data
+                    self.assertEqual(projected, [dict(item) for item in expected])
+
+    def test_fields_subset_and_unprojectable_serializers(self):
+        from feed.serializers import GetPostSerializer
+
+        users = CustomUser.objects.order_by('pk')
+        user = users.first()
+        projected = ProjectionSerializer(users, CustomUserSerializer, fields=['id', 'email'])
+        self.assertEqual(projected.data[0], {'id': user.pk, 'email': user.email})
+
+        with self.assertRaises(ImproperlyConfigured):
+            ProjectionSerializer(Post.objects.all(), GetPostSerializer).data
+
+
+class RendererTests(APITestCase):
+    """Tests for the fast JSON renderer and streamed lists."""
+
+    def test_encoders_match_drf_json_renderer(self):
+        data = {
+            'when': timezone.now(), 'amount': decimal.Decimal('1.50'), 'uuid': uuid.uuid4(), 'text': 'a\u2028b é',
+            'items': [1, 2.5, None, True], 'nested': {1: 'one'},
+        }
+        expected = JSONRenderer().render(data)
+        for encoder in ('orjson', 'json'):
+            with self.subTest(encoder=encoder), self.settings(JSON_ENCODER=encoder):
+                self.assertEqual(FastJSONRenderer().render(data), expected)
+
+    def test_indented_output_is_left_to_drf(self):
+        rendered = FastJSONRenderer().render({'a': 1}, 'application/json; indent=2')
+        self.assertEqual(rendered, JSONRenderer().render({'a': 1}, 'application/json; indent=2'))
+
+    def test_streamed_list_is_encoded_in_chunks(self):
+        chunks = list(stream_json_list(({'id': index} for index in range(5)), chunk_size=2))
+        self.assertEqual(len(chunks), 5)
+        self.assertEqual(json.loads(b''.join(chunks)), [{'id': index} for index in range(5)])
+        self.assertEqual(b''.join(stream_json_list([])), b'[]')
+
+    def test_user_list_streams_on_request(self):
+        for index in range(3):
+            CustomUser.objects.create_user(email=f'u{index}@example.com', password='secret', username=f'u{index}')
+        self.client.force_authenticate(CustomUser.objects.first())
+
+        response = self.client.get(reverse('core:user-list'), {'stream': 'true', 'fields': 'id,email'})
+        self.assertTrue(response.streaming)
+        streamed = json.loads(b''.join(response.streaming_content))
+        self.assertEqual(streamed, self.client.get(reverse('core:user-list'), {'fields': 'id,email'}).json())
+
+
+    def test_streamed_list_runs_in_the_request_context(self):
+        self.client.force_authenticate(CustomUser.objects.create_user(
+            email='jane@example.com', password='secret', username='jane'
+        ))
+        requests = []
+
+        def capture(execute, sql, params, many, context):
+            requests.append(current_request.get())
+            return execute(sql, params, many, context)
+
+        with self.settings(QUERY_BUDGET_STRICT=True):
+            response = self.client.get(reverse('core:user-list'), {'stream': 'true'})
+            with connection.execute_wrapper(capture):
+                content = b''.join(response.streaming_content)
+        self.assertEqual(len(json.loads(content)), 1)
+        self.assertTrue(requests)
+        self.assertIsNotNone(requests[0])
+
+        with self.settings(QUERY_BUDGET_STRICT=True), \
+                unittest.mock.patch.object(UserListView, 'query_budget', 0):
+            response = self.client.get(reverse('core:user-list'), {'stream': 'true'})
+            with self.assertRaises(QueryBudgetExceeded):
+                b''.join(response.streaming_content)
+
+
+class CompressionTests(APITestCase):
+    """Tests for the negotiated response compression."""
+
+    def setUp(self):
+        CustomUser.objects.bulk_create([
+            CustomUser(email=f'u{index}@example.com', username=f'u{index}', password='!') for index in range(15)
+        ])
+        self.client.force_authenticate(CustomUser.objects.first())
+
+    def test_negotiation(self):
+        self.assertEqual(negotiate('gzip, deflate', ['gzip']).name, 'gzip')
+        self.assertEqual(negotiate('*', ['gzip']).name, 'gzip')
+        self.assertIsNone(negotiate('identity', ['gzip']))
+        self.assertIsNone(negotiate('gzip;q=0', ['gzip']))
+        self.assertIsNone(negotiate('gzip', []))
+
+    def test_list_is_compressed(self):
+        plain = self.client.get(reverse('core:user-list'))
+        response = self.client.get(reverse('core:user-list'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(int(response['Content-Length']), len(response.content))
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+
+    def test_small_bodies_and_media_are_not_compressed(self):
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        small = CompressionMiddleware(lambda request: HttpResponse(b'{}', content_type='application/json'))(request)
+        image = CompressionMiddleware(lambda request: HttpResponse(b'x' * 4096, content_type='image/png'))(request)
+        self.assertNotIn('Content-Encoding', small)
+        self.assertNotIn('Content-Encoding', image)
+        self.assertEqual(image.content, b'x' * 4096)
+
+    def test_streamed_list_is_compressed_chunk_by_chunk(self):
+        response = self.client.get(reverse('core:user-list'), {'stream': 'true'}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertNotIn('Content-Length', response)
+        decompressor = zlib.decompressobj(31)
+        chunks = [decompressor.decompress(chunk) for chunk in response.streaming_content]
+        self.assertEqual(chunks[0], b'[')
+        self.assertEqual(json.loads(b''.join(chunks)), self.client.get(reverse('core:user-list')).json())
+
+    def test_async_streams_are_compressed(self):
+        async def content():
+            for part in (b'[', b'1,' * 600, b'1]'):
+                yield part
+
+        async def read(response):
+            return [chunk async for chunk in response.streaming_content]
+
+        request = RequestFactory().get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = CompressionMiddleware(lambda request: StreamingHttpResponse(content()))(request)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertTrue(response.is_async)
+        self.assertEqual(zlib.decompress(b''.join(async_to_sync(read)(response)), 31), b'[' + b'1,' * 600 + b'1]')
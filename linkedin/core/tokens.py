@@ -0,0 +1,19 @@
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .blacklist import blacklist_filter
+
+
+class FilteredRefreshToken(RefreshToken):
+    """Refresh token that consults the in-process blacklist filter before the database."""
+
+    def check_blacklist(self):
+        """Only query the blacklist table when the filter reports a possible match."""
+        if blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+    def blacklist(self):
+        """Blacklist the token and reload this process' filter right away."""
+        blacklisted = super().blacklist()
+        blacklist_filter.refresh(force=True)
+        return blacklisted
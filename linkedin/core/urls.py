@@ -5,7 +5,8 @@ from rest_framework.routers import DefaultRouter
 from .views import (
     UserProfileViewSet, UserRegistrationView, ChangePasswordView, UpdateUserView, LogoutAllView,
     LogoutView, FollowCreateView, UnfollowView, UserListView, UserDeleteView, FollowerListView,
-    FollowingListView, ExperienceViewSet, EducationViewSet, CertificationViewSet, CourseViewSet
+    FollowingListView, ExperienceViewSet, EducationViewSet, CertificationViewSet, CourseViewSet,
+    BulkUserImportView, AsyncUserProfileDetailView, ProfileFlamegraphView
 )
 
 app_name = 'core'
@@ -20,6 +21,7 @@ router.register(r'courses', CourseViewSet)
 
 urlpatterns = [
     path('register/register-user/', UserRegistrationView.as_view(), name='register'),
+    path('register/bulk-import/', BulkUserImportView.as_view(), name='bulk-import'),
 
     path('user/login/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('user/login/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
@@ -41,4 +43,7 @@ urlpatterns = [
     path('follow-profile/unfollow-user/<int:profile_id>/', UnfollowView.as_view(), name='follow-delete'),
 
     path('profile-details/', include(router.urls)),
+
+    path('async/profiles/<int:pk>/', AsyncUserProfileDetailView.as_view(), name='async-profile-detail'),
+    path('profiling/flamegraph/', ProfileFlamegraphView.as_view(), name='profiling-flamegraph'),
 ]
@@ -1,33 +1,61 @@
+import csv
+import hmac
+import json
+from itertools import islice
+
 from rest_framework import generics, status, viewsets
+from rest_framework.decorators import action
 from rest_framework.views import APIView
-from rest_framework_simplejwt.tokens import RefreshToken, OutstandingToken, BlacklistedToken
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.contrib.auth import get_user_model
-from rest_framework.exceptions import PermissionDenied
-
-from .permissions import IsUser
-from .models import UserProfile, Follow, CustomUser, Experience, Education, Certification, Course
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+from django.http import Http404, HttpResponse
+from django.views import View
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+from .authentication import invalidate_auth_state
+from .batch import BatchRetrieveMixin
+from .projection import ProjectionListMixin
+from .sparse import SparseFieldsetMixin
+from .instrumentation import SerializerTimingMixin
+from . import hashing
+from .async_views import AsyncRetrieveAPIView
+from .blacklist import blacklist_changed, blacklist_filter, blacklist_user_tokens
+from .permissions import IsUser, IsAdminUser
+from .models import (
+    UserProfile, Follow, CustomUser, Experience, Education, Certification, Course, ProfileDocument, RequestProfile
+)
+from . import metrics
+from .profile_documents import (
+    absolute_urls, aget_document, get_document, get_full_profile_queryset, rebuild_document, schedule_rebuild
+)
+from .profiling import merge_stacks
+from .tokens import FilteredRefreshToken
 from .serializers import (
     GetUserProfileSerializer, CreateUserProfileSerializer, RegistrationSerializer, ChangePasswordSerializer,
     FollowSerializer, UpdateUserProfileSerializer, CustomUserSerializer, GetFollowSerializer, UpdateUserSerializer,
     CreateExperienceSerializer, UpdateExperienceSerializer, GetEducationSerializer, GetExperienceSerializer,
     UpdateEducationSerializer, CreateEducationSerializer, GetCertificationSerializer, CreateCourseSerializer,
     UpdateCertificationSerializer, CreateCertificationSerializer, GetCourseSerializer, UpdateCoursesSerializer,
+    BulkUserImportRowSerializer, FullUserProfileSerializer,
 )
 
 User = get_user_model()
 
 
-class UserListView(generics.ListAPIView):
+class UserListView(SerializerTimingMixin, ProjectionListMixin, SparseFieldsetMixin, generics.ListAPIView):
     """To Lists users of the applications."""
 
     queryset = CustomUser.objects.all()
     serializer_class = CustomUserSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 2
 
 
-class UserDeleteView(generics.DestroyAPIView):
+class UserDeleteView(SerializerTimingMixin, generics.DestroyAPIView):
     """To Delete users of the applications."""
 
     queryset = CustomUser.objects.all()
@@ -35,7 +63,7 @@ class UserDeleteView(generics.DestroyAPIView):
     permission_classes = [IsAuthenticated, IsUser]
 
 
-class ChangePasswordView(generics.UpdateAPIView):
+class ChangePasswordView(SerializerTimingMixin, generics.UpdateAPIView):
     """View to Change old password."""
 
     queryset = User.objects.all()
@@ -47,7 +75,7 @@ class ChangePasswordView(generics.UpdateAPIView):
         raise PermissionDenied("PATCH and other methods are not allowed.")
 
 
-class UpdateUserView(generics.UpdateAPIView):
+class UpdateUserView(SerializerTimingMixin, generics.UpdateAPIView):
     """View to Update User Profile."""
 
     queryset = User.objects.all()
@@ -68,7 +96,7 @@ class LogoutView(APIView):
         """
         try:
             refresh_token = request.data['refresh_token']
-            token = RefreshToken(refresh_token)
+            token = FilteredRefreshToken(refresh_token)
             token.blacklist()
             return Response("Successfully logged out.", status=status.HTTP_205_RESET_CONTENT)
 
@@ -79,21 +107,24 @@ class LogoutView(APIView):
 class LogoutAllView(APIView):
     """To Logout user from all devices."""
 
-    permission_classes = [IsAuthenticated, IsUser]
+    permission_classes = [IsAuthenticated]
 
     def post(self, request):
         """Logs all users by blacklisting all the refresh tokens.
 
         :param request: HTTP request object
         :return: response object with status code 205"""
-        tokens = OutstandingToken.objects.filter(user_id=request.user.id)
-        for token in tokens:
-            _, _ = BlacklistedToken.objects.get_or_create(token=token)
+        blacklist_user_tokens(request.user.id)
+        transaction.on_commit(blacklist_changed)
+        blacklist_filter.refresh(force=True)
+
+        User.objects.filter(pk=request.user.id).update(token_version=F('token_version') + 1)
+        invalidate_auth_state(request.user.id)
 
         return Response(status=status.HTTP_205_RESET_CONTENT)
 
 
-class UserRegistrationView(generics.CreateAPIView):
+class UserRegistrationView(SerializerTimingMixin, generics.CreateAPIView):
     """View to register new user."""
 
     queryset = User.objects.all()
@@ -101,12 +132,140 @@ class UserRegistrationView(generics.CreateAPIView):
     serializer_class = RegistrationSerializer
 
 
-class UserProfileViewSet(viewsets.ModelViewSet):
+class BulkUserImportView(APIView):
+    """To import many users at once from a CSV or NDJSON request body.
+
+    Rows are processed in batches of ``BULK_IMPORT_BATCH_SIZE``: each batch is
+    validated, checked for duplicates with one query, hashed in the password
+    pool and written with `bulk_create`. Invalid rows are reported and skipped.
+    """
+
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def post(self, request):
+        """Import users from the request body.
+
+        :param request: HTTP request object with a ``text/csv`` or ``application/x-ndjson`` body.
+        :return: response with the number of created users and the per-row errors.
+        """
+        lines = (line.decode('utf-8') for line in request.stream or [])
+        content_type = request.content_type.split(';')[0].strip()
+
+        if content_type == 'text/csv':
+            rows = csv.DictReader(lines)
+        elif content_type in ('application/x-ndjson', 'application/jsonl'):
+            rows = (self.parse_json_line(line) for line in lines if line.strip())
+        else:
+            return Response(
+                "Content type must be text/csv or application/x-ndjson.",
+                status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE
+            )
+
+        created, errors = 0, []
+        numbered_rows = enumerate(rows, start=1)
+        while batch := list(islice(numbered_rows, settings.BULK_IMPORT_BATCH_SIZE)):
+            batch_created, batch_errors = self.import_batch(batch)
+            created += batch_created
+            errors.extend(batch_errors)
+
+        return Response({"created": created, "errors": errors}, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def parse_json_line(line):
+        """Parse one NDJSON line, returning None for malformed lines."""
+        try:
+            row = json.loads(line)
+        except ValueError:
+            return None
+        return row if isinstance(row, dict) else None
+
+    def import_batch(self, batch):
+        """Validate and create one batch of users.
+
+        :param batch: list of ``(row number, row)`` pairs.
+        :return: number of created users and list of row errors.
+        """
+        valid, errors = [], []
+        for number, row in batch:
+            if row is None:
+                errors.append({"row": number, "errors": "Malformed row."})
+                continue
+            serializer = BulkUserImportRowSerializer(data=row)
+            if serializer.is_valid():
+                data = serializer.validated_data
+                data['email'] = User.objects.normalize_email(data['email'])
+                valid.append((number, data))
+            else:
+                errors.append({"row": number, "errors": serializer.errors})
+
+        emails = {data['email'] for _, data in valid}
+        usernames = {data['username'] for _, data in valid}
+        taken = User.objects.filter(Q(email__in=emails) | Q(username__in=usernames)).values_list('email', 'username')
+        taken_emails = {email for email, _ in taken}
+        taken_usernames = {username for _, username in taken}
+
+        accepted = []
+        for number, data in valid:
+            if data['email'] in taken_emails or data['username'] in taken_usernames:
+                errors.append({"row": number, "errors": "User with this email or username already exists."})
+                continue
+            taken_emails.add(data['email'])
+            taken_usernames.add(data['username'])
+            accepted.append((number, data))
+
+        passwords = hashing.make_passwords([data.pop('password', None) or None for _, data in accepted])
+        users = [User(password=password, **data) for (_, data), password in zip(accepted, passwords)]
+
+        try:
+            with transaction.atomic():
+                self.create_users(users)
+            created = len(users)
+        except IntegrityError:
+            # Rows inserted concurrently since the uniqueness check, fall back to one row at a time.
+            created = 0
+            for (number, _), user in zip(accepted, users):
+                user.pk = None
+                try:
+                    with transaction.atomic():
+                        self.create_users([user])
+                    created += 1
+                except IntegrityError:
+                    errors.append({"row": number, "errors": "User with this email or username already exists."})
+
+        return created, sorted(errors, key=lambda error: error['row'])
+
+    @staticmethod
+    def create_users(users):
+        """Insert users and their empty profiles with one `bulk_create` each."""
+        User.objects.bulk_create(users)
+        UserProfile.objects.bulk_create([UserProfile(user=user) for user in users])
+
+
+def get_profile_document(pk):
+    """Read the stored document of a profile with one primary key lookup, building it when missing or stale.
+
+    :param pk: primary key of the profile, as found in the URL.
+    :raises Http404: when the profile does not exist.
+    """
+    try:
+        document = get_document(int(pk))
+    except (TypeError, ValueError):
+        raise Http404
+    if document is None:
+        raise Http404
+    return document
+
+
+class UserProfileViewSet(SerializerTimingMixin, BatchRetrieveMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """A viewset that provides default `create()`, `retrieve()`, `update()`,
-    `partial_update()`, `destroy()` and `list()` actions."""
+    `partial_update()`, `destroy()` and `list()` actions, and `batch()` to retrieve many profiles."""
 
     queryset = UserProfile.objects.all()
     permission_classes = [IsAuthenticated]
+    # Retrieve reads the stored document, or builds and stores it when missing.
+    query_budget = {'retrieve': 7, 'full': 7}
+    # Missing or stale documents rebuilt while serving a batch, the others are served live.
+    max_inline_rebuilds = 3
 
     def get_serializer_class(self):
         """Serialzer classess on specific action methods."""
@@ -114,12 +273,51 @@ class UserProfileViewSet(viewsets.ModelViewSet):
             return CreateUserProfileSerializer
         elif self.action in ['update', 'partial_update']:
             return UpdateUserProfileSerializer
+        elif self.action in ['retrieve', 'batch', 'full']:
+            return FullUserProfileSerializer
         return GetUserProfileSerializer
 
     def perform_create(self, serializer):
         """Override the perform_create method to set the user."""
         serializer.save(user=self.request.user)
 
+    def retrieve(self, request, *args, **kwargs):
+        """Return the stored profile document, kept up to date in the background.
+        :param request:
+        :param *args:
+        :param **kwargs:
+        :return: profile document.
+        """
+        document = self.get_sparse_data(get_profile_document(self.kwargs[self.lookup_field]))
+        return Response(absolute_urls(document, request))
+
+    def get_batch_results(self, ids):
+        """Read the stored documents of the profiles in one query.
+
+        Up to ``max_inline_rebuilds`` missing or stale documents are rebuilt on the
+        spot. The others are scheduled for the background rebuilder and served from
+        the live profiles meanwhile, in one more set of queries.
+        """
+        stored = ProfileDocument.objects.in_bulk(ids)
+        documents = {pk: document.document for pk, document in stored.items() if not document.is_stale}
+        missing = [pk for pk in ids if pk not in documents]
+        if missing:
+            existing = set(UserProfile.objects.filter(pk__in=missing).values_list('pk', flat=True))
+            missing = [pk for pk in missing if pk in existing]
+            for pk in missing[:self.max_inline_rebuilds]:
+                documents[pk] = rebuild_document(pk, stored[pk].version if pk in stored else 0)
+
+            deferred = missing[self.max_inline_rebuilds:]
+            if deferred:
+                profiles = get_full_profile_queryset().filter(pk__in=deferred)
+                for data in self.get_serializer(profiles, many=True).data:
+                    documents[data['id']] = data
+                    schedule_rebuild(data['id'])
+        return {
+            pk: absolute_urls(self.get_sparse_data(documents[pk]), self.request)
+            for pk in ids if documents.get(pk) is not None
+        }
+
     def update(self, request, *args, **kwargs):
         """ Check if the user can update profile and update profile.
         :param request:
@@ -159,8 +357,18 @@ class UserProfileViewSet(viewsets.ModelViewSet):
             return super().destroy(request, *args, **kwargs)
         return Response("You do not have permission to delete others profile.", status=status.HTTP_403_FORBIDDEN)
 
+    @action(detail=True, methods=['get'])
+    def full(self, request, pk=None):
+        """Return the profile, its user and all its sections in one response, read from the stored document.
 
-class FollowCreateView(generics.CreateAPIView):
+        :param request:
+        :param pk: primary key of the profile.
+        :return: full profile document.
+        """
+        return Response(absolute_urls(self.get_sparse_data(get_profile_document(pk)), request))
+
+
+class FollowCreateView(SerializerTimingMixin, generics.CreateAPIView):
     """To Create following relationship with a user profile."""
 
     queryset = Follow.objects.all()
@@ -182,31 +390,33 @@ class FollowCreateView(generics.CreateAPIView):
             serializer.save(follower=follower)
 
 
-class FollowerListView(generics.ListAPIView):
+class FollowerListView(SerializerTimingMixin, SparseFieldsetMixin, generics.ListAPIView):
     """View to list followers user profiles."""
 
     serializer_class = GetFollowSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 2
 
     def get_queryset(self):
         """To get current user profile."""
         user = self.request.user.user_profile
-        return Follow.objects.filter(following=user)
+        return Follow.objects.filter(following=user).order_by('-created_at')
 
 
-class FollowingListView(generics.ListAPIView):
+class FollowingListView(SerializerTimingMixin, SparseFieldsetMixin, generics.ListAPIView):
     """View to list following user profiles."""
 
     serializer_class = GetFollowSerializer
     permission_classes = [IsAuthenticated]
+    query_budget = 2
 
     def get_queryset(self):
         """To get current user profile."""
         user = self.request.user.user_profile
-        return Follow.objects.filter(follower=user)
+        return Follow.objects.filter(follower=user).order_by('-created_at')
 
 
-class UnfollowView(generics.DestroyAPIView):
+class UnfollowView(SerializerTimingMixin, generics.DestroyAPIView):
     """Vire to unfollow a user profile."""
 
     queryset = Follow.objects.all()
@@ -236,7 +446,41 @@ class UnfollowView(generics.DestroyAPIView):
             return Response("You are not following this user.", status=status.HTTP_400_BAD_REQUEST)
 
 
-class ExperienceViewSet(viewsets.ModelViewSet):
+class ProfileSectionMixin:
+    """Owner filtering for the viewsets of profile sections.
+
+    ``list`` accepts a ``person`` parameter returning the sections of one profile,
+    and the ``mine`` action returns those of the profile in the token. Both are
+    served by the ``(person, date)`` index of the section, in its model ordering.
+    """
+
+    def get_queryset(self):
+        """Sections of the profile given by ``person`` when listing, else all of them."""
+        queryset = super().get_queryset()
+        person = self.request.query_params.get('person')
+        if self.action == 'list' and person is not None:
+            if not person.isdigit():
+                raise ValidationError({"person": "person must be a profile id."})
+            queryset = queryset.filter(person_id=int(person))
+        return queryset
+
+    @action(detail=False, methods=['get'])
+    def mine(self, request):
+        """Return the sections of the profile of the current user.
+
+        :param request:
+        :return: sections of the user's profile, 404 when the user has no profile.
+        """
+        try:
+            profile_id = request.user.user_profile.pk
+        except UserProfile.DoesNotExist:
+            return Response("User profile not found.", status=status.HTTP_404_NOT_FOUND)
+
+        queryset = self.filter_queryset(self.get_queryset().filter(person_id=profile_id))
+        return Response(self.get_serializer(queryset, many=True).data)
+
+
+class ExperienceViewSet(SerializerTimingMixin, ProfileSectionMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """A viewset that provides default `create()`, `retrieve()`, `update()`,
     `partial_update()`, `destroy()` and `list()` actions."""
 
@@ -308,7 +552,7 @@ class ExperienceViewSet(viewsets.ModelViewSet):
         )
 
 
-class EducationViewSet(viewsets.ModelViewSet):
+class EducationViewSet(SerializerTimingMixin, ProfileSectionMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """A viewset that provides default `create()`, `retrieve()`, `update()`,
     `partial_update()`, `destroy()` and `list()` actions."""
 
@@ -381,7 +625,7 @@ class EducationViewSet(viewsets.ModelViewSet):
         )
 
 
-class CertificationViewSet(viewsets.ModelViewSet):
+class CertificationViewSet(SerializerTimingMixin, ProfileSectionMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """A viewset that provides default `create()`, `retrieve()`, `update()`,
     `partial_update()`, `destroy()` and `list()` actions."""
 
@@ -454,7 +698,7 @@ class CertificationViewSet(viewsets.ModelViewSet):
         )
 
 
-class CourseViewSet(viewsets.ModelViewSet):
+class CourseViewSet(SerializerTimingMixin, ProfileSectionMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """A viewset that provides default `create()`, `retrieve()`, `update()`,
     `partial_update()`, `destroy()` and `list()` actions."""
 
@@ -525,3 +769,88 @@ class CourseViewSet(viewsets.ModelViewSet):
             "You do not have permission to delete Course for others profile.",
             status=status.HTTP_403_FORBIDDEN
         )
+
+
+class AsyncUserProfileDetailView(AsyncRetrieveAPIView):
+    """Async version of the user profile detail."""
+
+    queryset = UserProfile.objects.all()
+    permission_classes = [IsAuthenticated]
+    query_budget = 7
+
+    async def get(self, request, *args, **kwargs):
+        """Return the stored profile document, built in a worker thread when missing or stale."""
+        document = await aget_document(kwargs['pk'])
+        if document is None:
+            raise Http404
+        return Response(absolute_urls(document, request))
+
+
+class ProfileFlamegraphView(APIView):
+    """To read the stacks stored by `ProfilingMiddleware`, aggregated per view.
+
+    Without a ``view`` parameter it lists the profiled views. With one it merges
+    the stacks of the latest ``limit`` profiles of that view, returned as JSON or,
+    with ``output=collapsed``, as text ready for flamegraph.pl or speedscope.
+    """
+
+    permission_classes = [IsAuthenticated, IsAdminUser]
+    max_profiles = 1000
+
+    def get(self, request):
+        """List profiled views, or return the merged stacks of one view.
+
+        :param request: request with optional ``view``, ``limit`` and ``output`` parameters.
+        """
+        view_name = request.query_params.get('view')
+        if not view_name:
+            views = RequestProfile.objects.values('view_name').annotate(
+                profiles=Count('id'), samples=Sum('samples')
+            ).order_by('-samples')
+            return Response(list(views))
+
+        try:
+            limit = min(int(request.query_params.get('limit', 100)), self.max_profiles)
+        except ValueError:
+            return Response({"detail": "limit must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+
+        profiles = list(
+            RequestProfile.objects.filter(view_name=view_name).order_by('-created_at')
+            .values_list('stacks', flat=True)[:limit]
+        )
+        stacks = merge_stacks(profiles)
+
+        if request.query_params.get('output') == 'collapsed':
+            lines = (f"{stack} {samples}" for stack, samples in stacks.most_common())
+            return HttpResponse('\n'.join(lines), content_type='text/plain')
+
+        return Response({
+            "view": view_name,
+            "profiles": len(profiles),
+            "samples": sum(stacks.values()),
+            "stacks": [{"stack": stack, "samples": samples} for stack, samples in stacks.most_common()],
+        })
+
+    def delete(self, request):
+        """Delete the stored profiles of a view, or of every view without a ``view`` parameter."""
+        profiles = RequestProfile.objects.all()
+        if request.query_params.get('view'):
+            profiles = profiles.filter(view_name=request.query_params['view'])
+        profiles.delete()
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class MetricsView(View):
+    """To expose the metrics of every worker process in the Prometheus text format.
+
+    Requests must carry ``METRICS_TOKEN`` as a bearer token. The endpoint is
+    disabled while no token is set.
+    """
+
+    def get(self, request):
+        """Render the metrics summed across processes."""
+        if not settings.METRICS_TOKEN:
+            return HttpResponse("Metrics are disabled, set METRICS_TOKEN.", status=status.HTTP_403_FORBIDDEN)
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f"Bearer {settings.METRICS_TOKEN}"):
+            return HttpResponse("Invalid metrics token.", status=status.HTTP_401_UNAUTHORIZED)
+        return HttpResponse(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
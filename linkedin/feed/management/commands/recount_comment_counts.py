@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from feed.models import COUNTERS
+
+
+class Command(BaseCommand):
+    """Recompute the stored reply and reaction counts of comments and replies.
+
+    Counters follow every save and delete, but rows written without signals, such
+    as bulk inserts or raw SQL, are not counted. Each counted model is recounted
+    with one UPDATE of correlated subqueries.
+    """
+
+    help = "Recomputes the stored reply and reaction counts of comments and replies."
+
+    def handle(self, *args, **options):
+        """Store the actual number of rows behind every counter."""
+        updates = {}
+        for model, (key, field) in COUNTERS.items():
+            counts = model.objects.filter(**{key: OuterRef('pk')}).order_by().values(key).annotate(total=Count('pk'))
+            related_model = model._meta.get_field(key).related_model
+            updates.setdefault(related_model, {})[field] = Coalesce(Subquery(counts.values('total')), 0)
+
+        for related_model, fields in updates.items():
+            updated = related_model.objects.update(**fields)
+            self.stdout.write(self.style.SUCCESS(
+                f"Recounted {', '.join(fields)} of {updated} {related_model._meta.verbose_name_plural.lower()}."
+            ))
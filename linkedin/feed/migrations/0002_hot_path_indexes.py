@@ -0,0 +1,39 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:29
+
+from django.db import migrations, models
+
+from core.db.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # Indexes are built concurrently on Postgres, which cannot run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ('core', '0003_hot_path_indexes'),
+        ('feed', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created_at'], name='comment_post_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='commentreply',
+            index=models.Index(fields=['comment', 'created_at'], name='reply_comment_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='notification',
+            index=models.Index(fields=['recipient', '-created_at'], name='notification_recipient_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='post',
+            index=models.Index(fields=['-created_at'], name='post_created_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='postreaction',
+            index=models.Index(fields=['post', 'reaction_by'], name='postreaction_post_by_idx'),
+        ),
+    ]
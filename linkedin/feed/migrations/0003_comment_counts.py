@@ -0,0 +1,48 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:25
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_of(model, key):
+    """Subquery counting the rows of `model` pointing at the outer row through `key`."""
+    counts = model.objects.filter(**{key: OuterRef('pk')}).order_by().values(key).annotate(total=Count('pk'))
+    return Coalesce(Subquery(counts.values('total')), 0)
+
+
+def backfill_counts(apps, schema_editor):
+    """Store the current reply and reaction counts of existing comments and replies."""
+    Comment = apps.get_model('feed', 'Comment')
+    CommentReply = apps.get_model('feed', 'CommentReply')
+    Comment.objects.update(
+        reply_count=count_of(CommentReply, 'comment'),
+        reaction_count=count_of(apps.get_model('feed', 'CommentReaction'), 'comment'),
+    )
+    CommentReply.objects.update(reaction_count=count_of(apps.get_model('feed', 'ReplyReaction'), 'comment_reply'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0002_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='reaction_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='commentreply',
+            name='reaction_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 14:28
+
+from django.db import migrations, models
+from django.db.models import Count, Max
+
+
+def remove_duplicate_reactions(apps, schema_editor):
+    """Keep only the latest reaction of each profile on a post, so the unique constraint can be added."""
+    PostReaction = apps.get_model('feed', 'PostReaction')
+    duplicates = PostReaction.objects.values('post', 'reaction_by').annotate(
+        latest=Max('pk'), total=Count('pk')
+    ).filter(total__gt=1).order_by()
+    for duplicate in duplicates:
+        PostReaction.objects.filter(post=duplicate['post'], reaction_by=duplicate['reaction_by']).exclude(
+            pk=duplicate['latest']
+        ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('feed', '0003_comment_counts'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_reactions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='postreaction',
+            constraint=models.UniqueConstraint(fields=('post', 'reaction_by'), name='postreaction_post_by_uniq'),
+        ),
+        # The unique constraint's index covers the lookups the plain index served.
+        migrations.RemoveIndex(
+            model_name='postreaction',
+            name='postreaction_post_by_idx',
+        ),
+    ]
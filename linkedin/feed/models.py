@@ -1,4 +1,6 @@
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
 from core.models import UserProfile
@@ -23,6 +25,9 @@ class Post(TimeStampMixin):
         verbose_name = 'post'
         verbose_name_plural = 'posts'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='post_created_idx'),
+        ]
 
     def __str__(self):
         """String representation of the object."""
@@ -38,8 +43,10 @@ class Post(TimeStampMixin):
 
     @property
     def number_of_comments(self):
-        """Number of comments on a post"""
-        comments = Comment.objects.filter(post=self).count()
+        """Number of comments on a post, read from the `comment_count` annotation when present."""
+        comments = getattr(self, 'comment_count', None)
+        if comments is None:
+            comments = Comment.objects.filter(post=self).count()
         if comments == 0:
             return ""
         elif comments == 1:
@@ -98,6 +105,13 @@ class PostReaction(TimeStampMixin):
     reaction_by = models.ForeignKey(UserProfile, on_delete=models.CASCADE, related_name='post_reactions')
     reaction_type = models.ForeignKey(ReactionType, on_delete=models.CASCADE)
 
+    class Meta:
+        """Contains meta option, used to change behavior of fields."""
+
+        constraints = [
+            models.UniqueConstraint(fields=['post', 'reaction_by'], name='postreaction_post_by_uniq'),
+        ]
+
     def __str__(self):
         """String representation of the object."""
         return f"{self.reaction_by.user.username} --> {self.reaction_type} --> {self.post}"
@@ -111,12 +125,17 @@ class Comment(TimeStampMixin):
     text = models.TextField()
     reacted_by = models.ManyToManyField(UserProfile, through='CommentReaction', related_name="reacted_comments")
     replied_by = models.ManyToManyField(UserProfile, through='CommentReply', related_name="replied_comments")
+    reply_count = models.PositiveIntegerField(default=0)
+    reaction_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         """Contains meta option, used to change behavior of fields."""
 
         verbose_name = 'Comment'
         verbose_name_plural = 'Comments'
+        indexes = [
+            models.Index(fields=['post', 'created_at'], name='comment_post_created_idx'),
+        ]
 
     def __str__(self):
         """String representation of the object."""
@@ -165,12 +184,16 @@ class CommentReply(TimeStampMixin):
     text = models.TextField()
     media = models.ImageField(upload_to='Comments/Media/', blank=True, null=True)
     reacted_by = models.ManyToManyField(UserProfile, through='ReplyReaction', related_name="reacted_replies")
+    reaction_count = models.PositiveIntegerField(default=0)
 
     class Meta:
         """Contains meta option, used to change behavior of fields."""
 
         verbose_name = 'Comment Reply'
         verbose_name_plural = 'Comment Replies'
+        indexes = [
+            models.Index(fields=['comment', 'created_at'], name='reply_comment_created_idx'),
+        ]
 
 
 class ReplyReaction(TimeStampMixin):
@@ -188,6 +211,65 @@ class ReplyReaction(TimeStampMixin):
         unique_together = (('comment_reply', 'reaction_owner'))
 
 
+def change_count(model, pk, field, delta):
+    """Add `delta` to a stored counter in a single UPDATE, so concurrent changes are not lost.
+
+    The counter never goes below zero, so a row missed when counting cannot make a removal fail.
+
+    :param model: model holding the counter.
+    :param pk: primary key of the row.
+    :param field: name of the counter field.
+    :param delta: amount added, negative to decrement.
+    """
+    return model.objects.filter(pk=pk).update(**{field: Greatest(F(field) + delta, 0)})
+
+
+# Counted models, with the foreign key to the row holding their count and the name of the counter.
+COUNTERS = {
+    CommentReply: ('comment', 'reply_count'),
+    CommentReaction: ('comment', 'reaction_count'),
+    ReplyReaction: ('comment_reply', 'reaction_count'),
+}
+
+
+def count_changed(instance, delta):
+    """Add `delta` to the counter of the row `instance` is counted on, when its model is counted.
+
+    :param instance: created or deleted row.
+    :param delta: 1 when created, -1 when deleted.
+    """
+    if type(instance) not in COUNTERS:
+        return
+    key, field = COUNTERS[type(instance)]
+    model = instance._meta.get_field(key).related_model
+    change_count(model, getattr(instance, f'{key}_id'), field, delta)
+
+
+def upsert_reaction(model, reaction_type_id, **keys):
+    """Create a reaction, or change its type when the owner already reacted.
+
+    The row is written by a single ``INSERT ... ON CONFLICT DO UPDATE`` against the
+    unique constraint on the fields in `keys`, so concurrent reactions of one owner
+    can never create duplicate rows. An update keeps the creation time of the
+    existing row, which tells a created reaction from an updated one. Bulk inserts
+    send no signals, so the counter of a created reaction is changed here.
+
+    :param model: reaction model, unique on the fields in `keys`.
+    :param reaction_type_id: id of the reaction type to set.
+    :param keys: ids of the reacted object and of the owner, such as ``post_id=1, reaction_by_id=2``.
+    :return: the id of the reaction and whether it was created rather than updated.
+    """
+    reaction = model(reaction_type_id=reaction_type_id, **keys)
+    model.objects.bulk_create(
+        [reaction], update_conflicts=True, unique_fields=list(keys), update_fields=['reaction_type', 'updated_at'],
+    )
+    created_at = model.objects.filter(pk=reaction.pk).values_list('created_at', flat=True).get()
+    created = created_at == reaction.created_at
+    if created:
+        count_changed(reaction, 1)
+    return reaction.pk, created
+
+
 class HashTag(TimeStampMixin):
     """Hashtags on posts."""
 
@@ -209,6 +291,13 @@ class Notification(TimeStampMixin):
     message = models.CharField(max_length=255)
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='post_notifications')
 
+    class Meta:
+        """Contains meta option, used to change behavior of fields."""
+
+        indexes = [
+            models.Index(fields=['recipient', '-created_at'], name='notification_recipient_idx'),
+        ]
+
     def __str__(self):
         """String representation of the object."""
         return f"Notification for {self.recipient.user.username}"
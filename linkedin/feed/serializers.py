@@ -1,10 +1,43 @@
+from django.db.models import Prefetch
+from django.urls import reverse
 from rest_framework import serializers
+from rest_framework.utils.urls import replace_query_param
 
+from core.models import UserProfile
 from .models import (
     Post, ReactionType, PostReaction, Comment, CommentReaction, CommentReply, ReplyReaction, Notification
 )
 
 
+# Reactors returned with a comment or reply, the latest first.
+SAMPLE_REACTORS = 3
+
+
+def sample_reactions(lookup, model):
+    """Prefetch of the latest reactions of `model` through `lookup`, read by `SampleReactorsField`."""
+    return Prefetch(
+        lookup, queryset=model.objects.order_by('-created_at', '-id')[:SAMPLE_REACTORS], to_attr='sample_reactions'
+    )
+
+
+class SampleReactorsField(serializers.Field):
+    """Profile ids of the latest reactors of an object, from the `sample_reactions` prefetch.
+
+    Falls back to a query on `lookup` when the reactions were not prefetched.
+    """
+
+    def __init__(self, lookup, **kwargs):
+        self.lookup = lookup
+        kwargs.update(source='*', read_only=True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        reactions = getattr(value, 'sample_reactions', None)
+        if reactions is None:
+            reactions = getattr(value, self.lookup).order_by('-created_at', '-id')[:SAMPLE_REACTORS]
+        return [reaction.reaction_owner_id for reaction in reactions]
+
+
 class CreatePostSerializer(serializers.ModelSerializer):
     """Serializer class to create Post for logged in user."""
 
@@ -89,13 +122,18 @@ class CommentSerializer(serializers.ModelSerializer):
 
 
 class GetCommentSerializer(serializers.ModelSerializer):
-    """Serializer to get comments on post."""
+    """Serializer to get comments on post, with their reply and reaction counts and a few reactors."""
+
+    sample_reactors = SampleReactorsField('commentreaction_set')
 
     class Meta:
         """Contains meta option, used to change behavior of fields."""
 
         model = Comment
-        fields = ('id', 'post', 'comment_owner', 'text', 'reacted_by', 'replied_by', 'time_difference',)
+        fields = (
+            'id', 'post', 'comment_owner', 'text', 'reply_count', 'reaction_count', 'sample_reactors',
+            'time_difference',
+        )
 
 
 class CommenReactionSerializer(serializers.ModelSerializer):
@@ -139,13 +177,18 @@ class UpdateCommentReplySerializer(serializers.ModelSerializer):
 
 
 class GetCommentReplySerializer(serializers.ModelSerializer):
-    """Serializer for replies on comment."""
+    """Serializer for replies on comment, with their reaction count and a few reactors."""
+
+    sample_reactors = SampleReactorsField('replyreaction_set')
 
     class Meta:
         """Contains meta option, used to change behavior of fields."""
 
         model = CommentReply
-        fields = '__all__'
+        fields = (
+            'id', 'comment', 'reply_owner', 'text', 'media', 'reaction_count', 'sample_reactors', 'created_at',
+            'updated_at',
+        )
 
 
 class ReplyReactionSerializer(serializers.ModelSerializer):
@@ -168,6 +211,65 @@ class GetReplyReactionSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class AuthorCardSerializer(serializers.ModelSerializer):
+    """Serializer for the author card shown with comments and replies."""
+
+    username = serializers.CharField(source='user.username', read_only=True)
+    first_name = serializers.CharField(source='user.first_name', read_only=True)
+    last_name = serializers.CharField(source='user.last_name', read_only=True)
+
+    class Meta:
+        """Contains meta option, used to change behavior of fields."""
+
+        model = UserProfile
+        fields = ('id', 'username', 'first_name', 'last_name', 'headline', 'profile_pic')
+
+
+class ThreadReplySerializer(serializers.ModelSerializer):
+    """Serializer for a reply in a comment thread, with its author and reaction summary."""
+
+    author = AuthorCardSerializer(source='reply_owner', read_only=True)
+    reactions = serializers.ReadOnlyField()
+
+    class Meta:
+        """Contains meta option, used to change behavior of fields."""
+
+        model = CommentReply
+        fields = ('id', 'comment', 'author', 'text', 'media', 'reactions', 'created_at')
+
+
+class ThreadCommentSerializer(serializers.ModelSerializer):
+    """Serializer for a comment in a comment thread, with its author, reaction summary and first replies.
+
+    Reads the attributes set by `feed.threads.load_thread`.
+    """
+
+    author = AuthorCardSerializer(source='comment_owner', read_only=True)
+    reactions = serializers.ReadOnlyField()
+    replies = serializers.SerializerMethodField()
+
+    class Meta:
+        """Contains meta option, used to change behavior of fields."""
+
+        model = Comment
+        fields = ('id', 'post', 'author', 'text', 'reactions', 'replies', 'created_at', 'time_difference')
+
+    def get_replies(self, comment):
+        """First replies of the comment, their total and the link to the next ones."""
+        next_url = None
+        if comment.replies_cursor:
+            url = self.context['request'].build_absolute_uri(
+                reverse('feed:comment-thread-replies', args=[comment.pk])
+            )
+            url = replace_query_param(url, 'limit', self.context['reply_limit'])
+            next_url = replace_query_param(url, 'cursor', comment.replies_cursor)
+        return {
+            'count': comment.reply_count,
+            'results': ThreadReplySerializer(comment.replies, many=True, context=self.context).data,
+            'next': next_url,
+        }
+
+
 class NotificationSerializer(serializers.ModelSerializer):
     """Serializer class for Notification."""
 
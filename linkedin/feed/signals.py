@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 
-from .models import Post, Notification
+from core.metrics import NOTIFICATION_FANOUT
+
+from .models import Post, Notification, CommentReply, CommentReaction, ReplyReaction, count_changed
 
 
 @receiver(post_save, sender=Post)
@@ -17,3 +19,24 @@ def create_post_notification(sender, instance, created, **kwargs):
                 post=instance
             )
             notification.save()
+        NOTIFICATION_FANOUT.observe(len(followers))
+
+
+@receiver(post_save, sender=CommentReply)
+@receiver(post_save, sender=CommentReaction)
+@receiver(post_save, sender=ReplyReaction)
+def count_created(sender, instance, created, raw=False, **kwargs):
+    """Count a created reply or reaction on its comment or reply.
+
+    Fixtures are skipped, as they already hold the stored counts.
+    """
+    if created and not raw:
+        count_changed(instance, 1)
+
+
+@receiver(post_delete, sender=CommentReply)
+@receiver(post_delete, sender=CommentReaction)
+@receiver(post_delete, sender=ReplyReaction)
+def count_deleted(sender, instance, **kwargs):
+    """Uncount a deleted reply or reaction, including those deleted in cascade."""
+    count_changed(instance, -1)
@@ -1,3 +1,335 @@
-from django.test import TestCase
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+
+from core.models import CustomUser, UserProfile, Follow
+from .models import Post, ReactionType, PostReaction, Comment, CommentReaction, CommentReply, ReplyReaction
+from .views import AsyncPostListView
+
+
+class AsyncReadViewTests(APITestCase):
+    """Tests that the async read views match the sync ones."""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(email='jane@example.com', password='secret', username='jane')
+        self.other = CustomUser.objects.create_user(email='joe@example.com', password='secret', username='joe')
+        self.profile = UserProfile.objects.create(user=self.user)
+        self.other_profile = UserProfile.objects.create(user=self.other)
+        Follow.objects.create(follower=self.other_profile, following=self.profile)
+
+        self.post = Post.objects.create(post_owner=self.profile, text_body='Hello')
+        Post.objects.create(post_owner=self.profile, parent_post=self.post, text_body='Reshare')
+        like = ReactionType.objects.create(type='like')
+        PostReaction.objects.create(post=self.post, reaction_by=self.other_profile, reaction_type=like)
+        Comment.objects.create(post=self.post, comment_owner=self.other_profile, text='Nice')
+        Comment.objects.create(post=self.post, comment_owner=self.other_profile, text='Again')
+
+        self.client.force_authenticate(self.other)
+
+    def test_post_list_matches_sync_view(self):
+        sync = self.client.get(reverse('feed:post-list'))
+        response = self.client.get(reverse('feed:async-post-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertCountEqual(response.json(), sync.json())
+
+    def test_post_list_prefetches_once_for_many_posts(self):
+        Post.objects.bulk_create(
+            Post(post_owner=self.profile, parent_post=self.post, text_body=f'Post {index}') for index in range(600)
+        )
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('feed:async-post-list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 602)
+        self.assertLessEqual(len(queries), AsyncPostListView.query_budget)
+
+    def test_post_detail_matches_sync_view(self):
+        sync = self.client.get(reverse('feed:post-detail', args=[self.post.pk]))
+        response = self.client.get(reverse('feed:async-post-detail', args=[self.post.pk]))
+        self.assertEqual(response.json(), sync.json())
+
+        response = self.client.get(reverse('feed:async-post-detail', args=[0]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_notifications_match_sync_view(self):
+        sync = self.client.get(reverse('feed:notification'))
+        response = self.client.get(reverse('feed:async-notification'))
+        self.assertEqual(response.json(), sync.json())
+        self.assertEqual(len(response.json()), 2)
+
+    def test_notifications_require_authentication(self):
+        self.client.force_authenticate(None)
+        response = self.client.get(reverse('feed:async-notification'))
+        self.assertEqual(response.status_code, 401)
+
+    def test_batch_returns_posts_keyed_by_id(self):
+        reshare = Post.objects.get(parent_post=self.post)
+        sync = self.client.get(reverse('feed:post-detail', args=[self.post.pk]))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('feed:post-batch'), {'ids': f'{reshare.pk},{self.post.pk},0'})
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(list(response.json()), [str(reshare.pk), str(self.post.pk)])
+        self.assertEqual(response.json()[str(self.post.pk)], sync.json())
+
+    def test_batch_rejects_invalid_or_too_many_ids(self):
+        self.assertEqual(self.client.get(reverse('feed:post-batch'), {'ids': '1,x'}).status_code, 400)
+        ids = ','.join(str(pk) for pk in range(1, 102))
+        self.assertEqual(self.client.get(reverse('feed:post-batch'), {'ids': ids}).status_code, 400)
+
+
+class SparseFieldsetTests(APITestCase):
+    """Tests for ``?fields=`` and ``?omit=`` on the read views."""
+
+    def setUp(self):
+        user = CustomUser.objects.create_user(email='jane@example.com', password='secret', username='jane')
+        self.profile = UserProfile.objects.create(user=user)
+        self.post = Post.objects.create(post_owner=self.profile, text_body='Hello')
+        like = ReactionType.objects.create(type='like')
+        PostReaction.objects.create(post=self.post, reaction_by=self.profile, reaction_type=like)
+        self.client.force_authenticate(user)
+
+    def test_fields_limit_output_columns_and_prefetches(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('feed:post-list'), {'fields': 'id,text_body'})
+
+        self.assertEqual(response.json(), [{'id': self.post.pk, 'text_body': 'Hello'}])
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"media"', queries[0]['sql'])
+
+    def test_omit_drops_fields_and_their_prefetches(self):
+        full = self.client.get(reverse('feed:post-list'))
+        self.assertEqual(full.json()[0]['reacted_by'], [self.profile.pk])
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('feed:post-list'), {'omit': 'reacted_by,commented_by,number_of_reactions'}
+            )
+        self.assertEqual(len(queries), 1)
+        expected = {key: value for key, value in full.json()[0].items() if key not in response.json()[0]}
+        self.assertEqual(set(expected), {'reacted_by', 'commented_by', 'number_of_reactions'})
+
+    def test_unknown_fields_are_rejected(self):
+        response = self.client.get(reverse('feed:post-list'), {'fields': 'id,secret'})
+        self.assertEqual(response.status_code, 400)
+
+
+class CommentThreadTests(APITestCase):
+    """Tests for the comment thread endpoint."""
+
+    def setUp(self):
+        user = CustomUser.objects.create_user(
+            email='jane@example.com', password='secret', username='jane', first_name='Jane'
+        )
+        self.profile = UserProfile.objects.create(user=user, headline='Engineer')
+        self.post = Post.objects.create(post_owner=self.profile, text_body='Hello')
+        like = ReactionType.objects.create(type='like')
+        self.comments = [
+            Comment.objects.create(post=self.post, comment_owner=self.profile, text=f'Comment {index}')
+            for index in range(3)
+        ]
+        self.replies = [
+            CommentReply.objects.create(comment=self.comments[0], reply_owner=self.profile, text=f'Reply {index}')
+            for index in range(5)
+        ]
+        CommentReaction.objects.create(comment=self.comments[0], reaction_owner=self.profile, reaction_type=like)
+        ReplyReaction.objects.create(comment_reply=self.replies[0], reaction_owner=self.profile, reaction_type=like)
+        self.client.force_authenticate(user)
+
+    def test_thread_is_loaded_in_four_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('feed:comment-thread', args=[self.post.pk]), {'comments': 2, 'replies': 2}
+            )
+        self.assertEqual(len(queries), 4)
+
+        comments = response.json()['results']
+        self.assertEqual([comment['text'] for comment in comments], ['Comment 0', 'Comment 1'])
+        first = comments[0]
+        self.assertEqual(first['author']['username'], 'jane')
+        self.assertEqual(first['author']['headline'], 'Engineer')
+        self.assertEqual(first['reactions'], {'count': 1, 'types': {'like': 1}})
+        self.assertEqual(first['replies']['count'], 5)
+        self.assertEqual([reply['text'] for reply in first['replies']['results']], ['Reply 0', 'Reply 1'])
+        self.assertEqual(first['replies']['results'][0]['reactions']['count'], 1)
+        self.assertEqual(comments[1]['replies'], {'count': 0, 'results': [], 'next': None})
+
+        following = self.client.get(response.json()['next']).json()
+        self.assertEqual([comment['text'] for comment in following['results']], ['Comment 2'])
+        self.assertIsNone(following['next'])
+
+    def test_replies_are_paginated_with_a_cursor(self):
+        thread = self.client.get(reverse('feed:comment-thread', args=[self.post.pk]), {'replies': 2}).json()
+        texts = [reply['text'] for reply in thread['results'][0]['replies']['results']]
+        url = thread['results'][0]['replies']['next']
+        while url:
+            with CaptureQueriesContext(connection) as queries:
+                page = self.client.get(url).json()
+            self.assertLessEqual(len(queries), 2)
+            texts += [reply['text'] for reply in page['results']]
+            url = page['next']
+        self.assertEqual(texts, [reply.text for reply in self.replies])
+
+    def test_invalid_parameters_are_rejected(self):
+        url = reverse('feed:comment-thread', args=[self.post.pk])
+        self.assertEqual(self.client.get(url, {'cursor': 'nope'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'replies': 0}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'comments': 500}).status_code, 400)
+
+
+class CommentCountTests(APITestCase):
+    """Tests for the stored reply and reaction counts of comments and replies."""
+
+    def setUp(self):
+        user = CustomUser.objects.create_user(email='jane@example.com', password='secret', username='jane')
+        self.profile = UserProfile.objects.create(user=user)
+        post = Post.objects.create(post_owner=self.profile, text_body='Hello')
+        self.comment = Comment.objects.create(post=post, comment_owner=self.profile, text='Nice')
+        self.like = ReactionType.objects.create(type='like')
+        self.celebrate = ReactionType.objects.create(type='celebrate')
+        self.client.force_authenticate(user)
+
+    def test_counts_follow_replies_and_reactions(self):
+        self.client.post(reverse('feed:create_comment_reply'), {'comment': self.comment.pk, 'text': 'Thanks'})
+        reply = CommentReply.objects.get()
+        for reaction_type in (self.like, self.celebrate):
+            self.client.post(
+                reverse('feed:create-update-comment-reaction'),
+                {'comment': self.comment.pk, 'reaction_type': reaction_type.pk}
+            )
+        self.client.post(
+            reverse('feed:create-update-comment-reply-reaction'),
+            {'comment_reply': reply.pk, 'reaction_type': self.like.pk}
+        )
+        self.comment.refresh_from_db()
+        reply.refresh_from_db()
+        self.assertEqual((self.comment.reply_count, self.comment.reaction_count, reply.reaction_count), (1, 1, 1))
+
+        self.client.delete(reverse('feed:remove-comment-reaction', args=[CommentReaction.objects.get().pk]))
+        self.client.delete(reverse('feed:remove-comment-reply-reaction', args=[ReplyReaction.objects.get().pk]))
+        reply.refresh_from_db()
+        self.assertEqual(reply.reaction_count, 0)
+        self.client.delete(reverse('feed:remove-reply-comment', args=[reply.pk]))
+        self.comment.refresh_from_db()
+        self.assertEqual((self.comment.reply_count, self.comment.reaction_count), (0, 0))
+
+    def test_counts_follow_rows_written_outside_the_api(self):
+        other = UserProfile.objects.create(user=CustomUser.objects.create_user(
+            email='john@example.com', password='secret', username='john'
+        ))
+        reply = CommentReply.objects.create(comment=self.comment, reply_owner=self.profile, text='Thanks')
+        CommentReaction.objects.create(comment=self.comment, reaction_owner=other, reaction_type=self.like)
+        ReplyReaction.objects.create(comment_reply=reply, reaction_owner=other, reaction_type=self.like)
+        CommentReply.objects.create(comment=self.comment, reply_owner=other, text='Me too')
+        self.comment.refresh_from_db()
+        reply.refresh_from_db()
+        self.assertEqual((self.comment.reply_count, self.comment.reaction_count, reply.reaction_count), (2, 1, 1))
+
+        # Deleting the account of the other user cascades to its reply and reactions.
+        other.user.delete()
+        self.comment.refresh_from_db()
+        reply.refresh_from_db()
+        self.assertEqual((self.comment.reply_count, self.comment.reaction_count, reply.reaction_count), (1, 0, 0))
+
+        response = self.client.delete(reverse('feed:remove-reply-comment', args=[reply.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.reply_count, 0)
+
+    def test_counts_never_go_below_zero(self):
+        reply = CommentReply.objects.create(comment=self.comment, reply_owner=self.profile, text='Thanks')
+        Comment.objects.filter(pk=self.comment.pk).update(reply_count=0)
+
+        response = self.client.delete(reverse('feed:remove-reply-comment', args=[reply.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.comment.refresh_from_db()
+        self.assertEqual(self.comment.reply_count, 0)
+
+    def test_recount_command_repairs_counts(self):
+        reply = CommentReply.objects.create(comment=self.comment, reply_owner=self.profile, text='Thanks')
+        CommentReaction.objects.create(comment=self.comment, reaction_owner=self.profile, reaction_type=self.like)
+        ReplyReaction.objects.create(comment_reply=reply, reaction_owner=self.profile, reaction_type=self.like)
+        Comment.objects.update(reply_count=7, reaction_count=0)
+        CommentReply.objects.update(reaction_count=3)
+
+        call_command('recount_comment_counts', stdout=StringIO())
+
+        self.comment.refresh_from_db()
+        reply.refresh_from_db()
+        self.assertEqual((self.comment.reply_count, self.comment.reaction_count, reply.reaction_count), (1, 1, 1))
+
+    def test_comment_list_returns_counts_and_sample_reactors(self):
+        reactors = [self.profile] + [
+            UserProfile.objects.create(user=CustomUser.objects.create_user(
+                email=f'u{index}@example.com', password='secret', username=f'u{index}'
+            ))
+            for index in range(4)
+        ]
+        for profile in reactors:
+            CommentReaction.objects.create(comment=self.comment, reaction_owner=profile, reaction_type=self.like)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('feed:list-comments-for-post', args=[self.comment.post_id]))
+        self.assertEqual(len(queries), 2)
+        comment = response.json()[0]
+        self.assertEqual((comment['reply_count'], comment['reaction_count']), (0, 5))
+        self.assertEqual(comment['sample_reactors'], [profile.pk for profile in reversed(reactors)][:3])
+        self.assertNotIn('reacted_by', comment)
+
+
+class ReactionUpsertTests(APITestCase):
+    """Tests for the single statement reaction upserts."""
+
+    def setUp(self):
+        user = CustomUser.objects.create_user(email='jane@example.com', password='secret', username='jane')
+        self.profile = UserProfile.objects.create(user=user)
+        self.post = Post.objects.create(post_owner=self.profile, text_body='Hello')
+        self.like = ReactionType.objects.create(type='like')
+        self.celebrate = ReactionType.objects.create(type='celebrate')
+        self.client.force_authenticate(user)
+
+    def test_post_reaction_is_created_then_updated(self):
+        url = reverse('feed:create-update-reaction')
+        response = self.client.post(url, {'post': self.post.pk, 'reaction_type': self.like.pk})
+        self.assertEqual(response.json(), {'detail': 'Reaction created.'})
+        created = PostReaction.objects.get()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url, {'post': self.post.pk, 'reaction_type': self.celebrate.pk})
+        self.assertEqual(response.json(), {'detail': 'Reaction updated.'})
+        writes = [query['sql'] for query in queries if query['sql'].startswith(('INSERT', 'UPDATE', 'DELETE'))]
+        self.assertEqual(len(writes), 1)
+        self.assertIn('ON CONFLICT', writes[0])
+
+        reaction = PostReaction.objects.get()
+        self.assertEqual((reaction.pk, reaction.reaction_type_id), (created.pk, self.celebrate.pk))
+        self.assertEqual(reaction.created_at, created.created_at)
+        self.assertEqual(list(self.post.reacted_by.all()), [self.profile])
+
+    def test_duplicate_post_reactions_are_rejected(self):
+        PostReaction.objects.create(post=self.post, reaction_by=self.profile, reaction_type=self.like)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            PostReaction.objects.create(post=self.post, reaction_by=self.profile, reaction_type=self.celebrate)
+
+    def test_comment_and_reply_reactions_count_once(self):
+        comment = Comment.objects.create(post=self.post, comment_owner=self.profile, text='Nice')
+        reply = CommentReply.objects.create(comment=comment, reply_owner=self.profile, text='Thanks')
+        for reaction_type, outcome in ((self.like, 'created'), (self.celebrate, 'updated')):
+            self.client.post(
+                reverse('feed:create-update-comment-reaction'),
+                {'comment': comment.pk, 'reaction_type': reaction_type.pk}
+            )
+            response = self.client.post(
+                reverse('feed:create-update-comment-reply-reaction'),
+                {'comment_reply': reply.pk, 'reaction_type': reaction_type.pk}
+            )
+            self.assertEqual(response.json(), {'detail': f'Comment Reply Reaction {outcome}.'})
+        self.assertEqual(CommentReaction.objects.get().reaction_type, self.celebrate)
+        self.assertEqual(ReplyReaction.objects.get().reaction_type, self.celebrate)
+        comment.refresh_from_db()
+        reply.refresh_from_db()
+        self.assertEqual((comment.reaction_count, reply.reaction_count), (1, 1))
@@ -0,0 +1,146 @@
+import base64
+import binascii
+from collections import defaultdict
+from datetime import datetime
+
+from django.db.models import Count, F, Q, Window
+from django.db.models.functions import RowNumber
+from rest_framework.exceptions import ValidationError
+
+from .models import Comment, CommentReaction, CommentReply, ReplyReaction
+
+
+def parse_limit(value, name, default, maximum):
+    """Parse a page size query parameter.
+
+    :param value: value of the parameter, None when it is missing.
+    :param name: name of the parameter, used in the error.
+    :param default: page size used when the parameter is missing.
+    :param maximum: largest page size accepted.
+    :raises ValidationError: when the value is not a number between 1 and `maximum`.
+    """
+    if value is None:
+        return default
+    if not value.isdigit() or not 1 <= int(value) <= maximum:
+        raise ValidationError({name: f"{name} must be a number between 1 and {maximum}."})
+    return int(value)
+
+
+def encode_cursor(item):
+    """Opaque cursor pointing just after `item` in ``(created_at, id)`` order."""
+    return base64.urlsafe_b64encode(f"{item.created_at.isoformat()}|{item.pk}".encode()).decode()
+
+
+def decode_cursor(value):
+    """Return the ``(created_at, id)`` position encoded in a cursor.
+
+    :raises ValidationError: when the cursor was not made by `encode_cursor`.
+    """
+    try:
+        created_at, pk = base64.urlsafe_b64decode(value.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(pk)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValidationError({"cursor": "Invalid cursor."})
+
+
+def after_cursor(queryset, cursor):
+    """Restrict a queryset ordered by ``(created_at, id)`` to the rows after `cursor`, if any."""
+    if not cursor:
+        return queryset
+    created_at, pk = decode_cursor(cursor)
+    return queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+
+
+def reaction_summaries(model, key, ids):
+    """Count the reactions on each object by reaction type, in one query.
+
+    :param model: reaction model, `CommentReaction` or `ReplyReaction`.
+    :param key: name of the foreign key from the reaction to the object.
+    :param ids: ids of the objects.
+    :return: ``{id: {'count': total, 'types': {type: count}}}`` for every id.
+    """
+    summaries = {pk: {'count': 0, 'types': {}} for pk in ids}
+    if not ids:
+        return summaries
+    rows = model.objects.filter(**{f'{key}__in': ids}).values_list(key, 'reaction_type__type').annotate(
+        total=Count('id')
+    )
+    for pk, reaction_type, total in rows.order_by():
+        summaries[pk]['count'] += total
+        summaries[pk]['types'][reaction_type] = total
+    return summaries
+
+
+def get_replies_queryset():
+    """Replies with their author card loaded, in thread order."""
+    return CommentReply.objects.select_related('reply_owner__user').order_by('created_at', 'id')
+
+
+def first_replies(comment_ids, limit):
+    """Load the first `limit` replies of each comment in one query.
+
+    One extra reply per comment is read to tell whether more follow.
+
+    :return: the replies by comment id.
+    """
+    pages = defaultdict(list)
+    if not comment_ids:
+        return pages
+    replies = get_replies_queryset().filter(comment__in=comment_ids).annotate(
+        position=Window(RowNumber(), partition_by=F('comment'), order_by=[F('created_at'), F('id')]),
+    ).filter(position__lte=limit + 1)
+    for reply in replies:
+        pages[reply.comment_id].append(reply)
+    return pages
+
+
+def page(items, limit):
+    """Split the `limit` + 1 items read for a page into the page and the cursor of the next one."""
+    if len(items) > limit:
+        return items[:limit], encode_cursor(items[limit - 1])
+    return items, None
+
+
+def load_thread(post_id, comment_limit, reply_limit, cursor=None):
+    """Load a page of a post's comment thread in at most four queries.
+
+    Comments come in creation order with their author and a reaction summary,
+    each with its first `reply_limit` replies, which carry their author and
+    reaction summary too.
+
+    :param post_id: id of the post.
+    :param comment_limit: comments in the page.
+    :param reply_limit: replies loaded per comment.
+    :param cursor: cursor of the page, None for the first one.
+    :return: the comments and the cursor of the next page, or None on the last page.
+        Each comment has ``reactions``, ``replies`` and ``replies_cursor``
+        attributes set, and each reply ``reactions``.
+    """
+    comments = Comment.objects.filter(post=post_id).select_related('comment_owner__user').order_by('created_at', 'id')
+    comments, next_cursor = page(list(after_cursor(comments, cursor)[:comment_limit + 1]), comment_limit)
+
+    comment_ids = [comment.pk for comment in comments]
+    replies = first_replies(comment_ids, reply_limit)
+    reply_ids = [reply.pk for items in replies.values() for reply in items[:reply_limit]]
+    comment_reactions = reaction_summaries(CommentReaction, 'comment', comment_ids)
+    reply_reactions = reaction_summaries(ReplyReaction, 'comment_reply', reply_ids)
+
+    for comment in comments:
+        comment.replies, comment.replies_cursor = page(replies[comment.pk], reply_limit)
+        comment.reactions = comment_reactions[comment.pk]
+        for reply in comment.replies:
+            reply.reactions = reply_reactions[reply.pk]
+    return comments, next_cursor
+
+
+def load_replies(comment_id, limit, cursor=None):
+    """Load a page of a comment's replies with their reaction summaries, in two queries.
+
+    :return: the replies and the cursor of the next page, or None on the last page.
+    """
+    replies = after_cursor(get_replies_queryset().filter(comment=comment_id), cursor)
+    replies, next_cursor = page(list(replies[:limit + 1]), limit)
+    reactions = reaction_summaries(ReplyReaction, 'comment_reply', [reply.pk for reply in replies])
+    for reply in replies:
+        reply.reactions = reactions[reply.pk]
+    return replies, next_cursor
@@ -7,7 +7,8 @@ from .views import (
     ListCommentsForPostView, CreateCommentReactionView, RemoveCommentReactionView,
     ListCommentReactionView, CreateCommentReplyView, UpdateCommentReplyView,
     RemoveCommentReplyView, ListCommentRepliesView, CreateReplyReactionView,
-    RemoveReplyreactionview, ListReplyReactionView, NotificationList
+    RemoveReplyreactionview, ListReplyReactionView, NotificationList, AsyncPostListView, AsyncPostDetailView,
+    AsyncNotificationList, CommentThreadView, CommentThreadRepliesView
 )
 
 app_name = 'feed'
@@ -28,6 +29,11 @@ urlpatterns = [
     path('comments/update/<int:pk>/', UpdateCommentView.as_view(), name='update-comment'),
     path('comments/delete/<int:pk>/', RemoveCommentView.as_view(), name='remove-comment'),
     path('comments/list/<int:post_id>/', ListCommentsForPostView.as_view(), name='list-comments-for-post'),
+    path('comments/thread/<int:post_id>/', CommentThreadView.as_view(), name='comment-thread'),
+    path(
+        'comments/thread/replies/<int:comment_id>/', CommentThreadRepliesView.as_view(),
+        name='comment-thread-replies'
+    ),
 
     path('comments-reactions/create/', CreateCommentReactionView.as_view(), name='create-update-comment-reaction'),
     path('comments-reactions/remove/<int:pk>/', RemoveCommentReactionView.as_view(), name='remove-comment-reaction'),
@@ -52,4 +58,8 @@ urlpatterns = [
     ),
 
     path('notifications/', NotificationList.as_view(), name='notification'),
+
+    path('async/posts/', AsyncPostListView.as_view(), name='async-post-list'),
+    path('async/posts/<int:pk>/', AsyncPostDetailView.as_view(), name='async-post-detail'),
+    path('async/notifications/', AsyncNotificationList.as_view(), name='async-notification'),
 ]
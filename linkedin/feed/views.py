@@ -1,29 +1,46 @@
+from django.db import transaction
+from django.db.models import Count
 from rest_framework import viewsets, generics
 from rest_framework.permissions import IsAuthenticatedOrReadOnly, IsAuthenticated
 from rest_framework import status
 from rest_framework.response import Response
-
+from rest_framework.utils.urls import replace_query_param
+
+from core.async_views import AsyncListAPIView, AsyncRetrieveAPIView
+from core.batch import BatchRetrieveMixin
+from core.projection import ProjectionListMixin
+from core.sparse import SparseFieldsetMixin
+from core.instrumentation import SerializerTimingMixin
+from core.db.utils import retry_on_busy
 from core.permissions import IsPostOwner, IsAdminUser, IsAdminUserOrIsPostOwner
 from .models import (
-    Post, ReactionType, PostReaction, Comment, CommentReaction, CommentReply, ReplyReaction, Notification
+    Post, ReactionType, PostReaction, Comment, CommentReaction, CommentReply, ReplyReaction, Notification,
+    upsert_reaction
 )
 from .serializers import (
     GetPostSerializer, UpdatePostSerializer, CreatePostSerializer, ReactionTypeSerializer,
     CreateReactionTypeSerializer, PostReactionSerializer, GetPostReactionSerializer, CommentSerializer,
     GetCommentSerializer, GetCommentReactionSerializer, CommenReactionSerializer, CommentReplySerializer,
     GetCommentReplySerializer, UpdateCommentReplySerializer, ReplyReactionSerializer, GetReplyReactionSerializer,
-    NotificationSerializer
+    NotificationSerializer, ThreadCommentSerializer, ThreadReplySerializer, sample_reactions
 )
+from .threads import parse_limit, load_thread, load_replies
 
 
-class PostViewSet(viewsets.ModelViewSet):
+class PostViewSet(SerializerTimingMixin, BatchRetrieveMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     A viewset that provides default `create()`, `retrieve()`, `update()`,
-    `partial_update()`, `destroy()` and `list()` actions.
+    `partial_update()`, `destroy()` and `list()` actions, and `batch()` to retrieve many posts.
     """
 
     queryset = Post.objects.all()
     permission_classes = [IsAuthenticatedOrReadOnly, IsPostOwner]
+    query_budget = {'batch': 3}
+    field_prefetches = {
+        'reacted_by': ['reacted_by'], 'commented_by': ['commented_by'], 'number_of_reactions': ['reacted_by'],
+    }
+    field_annotations = {'number_of_comments': {'comment_count': Count('comment', distinct=True)}}
+    field_columns = {'number_of_reactions': [], 'number_of_comments': [], 'time_difference': ['created_at']}
 
     def get_serializer_class(self):
         """Serializer class on specific action method."""
@@ -56,7 +73,7 @@ class PostViewSet(viewsets.ModelViewSet):
         serializer.save(post_owner=self.request.user.user_profile, edited=True)
 
 
-class ReactionTypeViewSet(viewsets.ModelViewSet):
+class ReactionTypeViewSet(SerializerTimingMixin, viewsets.ModelViewSet):
     """
     A viewset that provides default `create()`, `retrieve()`, `update()`,
     `partial_update()`, `destroy()` and `list()` actions for reaction types.
@@ -109,12 +126,13 @@ class ReactionTypeViewSet(viewsets.ModelViewSet):
         return Response("partial Updation of reaction types is not allowed")
 
 
-class CreatePostReactionView(generics.CreateAPIView):
+class CreatePostReactionView(SerializerTimingMixin, generics.CreateAPIView):
     """To react on post."""
 
     serializer_class = PostReactionSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    @retry_on_busy
     def create(self, request, *args, **kwargs):
         """To create reaction for post.
 
@@ -125,27 +143,17 @@ class CreatePostReactionView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        post_id = request.data.get('post')
-        user_profile = request.user.user_profile
-
-        existing_reaction = PostReaction.objects.filter(post_id=post_id, reaction_by=user_profile).first()
-
-        if existing_reaction:
-            existing_reaction.reaction_type = serializer.validated_data['reaction_type']
-            existing_reaction.save()
-            response_message = "Reaction updated."
-        else:
-            serializer.save(reaction_by=user_profile)
-            response_message = "Reaction created."
-
-        post = Post.objects.get(pk=post_id)
-        post.reacted_by.add(user_profile)
+        _, created = upsert_reaction(
+            PostReaction, serializer.validated_data['reaction_type'].pk,
+            post_id=serializer.validated_data['post'].pk, reaction_by_id=request.user.user_profile.pk,
+        )
+        response_message = "Reaction created." if created else "Reaction updated."
 
         headers = self.get_success_headers(serializer.data)
         return Response({"detail": response_message}, status=status.HTTP_201_CREATED, headers=headers)
 
 
-class RemovePostReactionView(generics.DestroyAPIView):
+class RemovePostReactionView(SerializerTimingMixin, generics.DestroyAPIView):
     """To remove reactions on posts."""
 
     serializer_class = PostReactionSerializer
@@ -161,8 +169,6 @@ class RemovePostReactionView(generics.DestroyAPIView):
         user_profile = self.request.user.user_profile
 
         if reaction.reaction_by == user_profile:
-            post = instance.post
-            post.reacted_by.remove(user_profile)
             instance.delete()
             response_message = "Reaction removed successfully"
             status_code = status.HTTP_204_NO_CONTENT
@@ -183,7 +189,7 @@ class RemovePostReactionView(generics.DestroyAPIView):
         return Response({"detail": response_message}, status=status_code)
 
 
-class ListPostReactionsView(generics.ListAPIView):
+class ListPostReactionsView(SerializerTimingMixin, ProjectionListMixin, SparseFieldsetMixin, generics.ListAPIView):
     """Yo list reactions on post."""
     serializer_class = GetPostReactionSerializer
 
@@ -193,12 +199,13 @@ class ListPostReactionsView(generics.ListAPIView):
         return PostReaction.objects.filter(post=post_id)
 
 
-class CreateCommentView(generics.CreateAPIView):
+class CreateCommentView(SerializerTimingMixin, generics.CreateAPIView):
     """To create comment for a post."""
 
     serializer_class = CommentSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    @retry_on_busy
     def create(self, request, *args, **kwargs):
         """To create comment for post.
 
@@ -222,7 +229,7 @@ class CreateCommentView(generics.CreateAPIView):
         return Response({"detail": response_message}, status=status.HTTP_201_CREATED, headers=headers)
 
 
-class UpdateCommentView(generics.UpdateAPIView):
+class UpdateCommentView(SerializerTimingMixin, generics.UpdateAPIView):
     """To update comment on a post."""
 
     queryset = Comment.objects.all()
@@ -258,7 +265,7 @@ class UpdateCommentView(generics.UpdateAPIView):
         return Response({"detail": response_message}, status=status_code)
 
 
-class RemoveCommentView(generics.DestroyAPIView):
+class RemoveCommentView(SerializerTimingMixin, generics.DestroyAPIView):
     """To remove comment on a post."""
 
     serializer_class = PostReactionSerializer
@@ -293,23 +300,26 @@ class RemoveCommentView(generics.DestroyAPIView):
         return Response({"detail": response_message}, status=status_code)
 
 
-class ListCommentsForPostView(generics.ListAPIView):
+class ListCommentsForPostView(SerializerTimingMixin, SparseFieldsetMixin, generics.ListAPIView):
     """To List comments for post."""
 
     serializer_class = GetCommentSerializer
+    field_prefetches = {'sample_reactors': [sample_reactions('commentreaction_set', CommentReaction)]}
+    field_columns = {'time_difference': ['created_at'], 'sample_reactors': []}
 
     def get_queryset(self):
         """return comments for specific post."""
         post_id = self.kwargs['post_id']
-        return Comment.objects.filter(post=post_id)
+        return Comment.objects.filter(post=post_id).order_by('created_at')
 
 
-class CreateCommentReactionView(generics.CreateAPIView):
+class CreateCommentReactionView(SerializerTimingMixin, generics.CreateAPIView):
     """To react on comment."""
 
     serializer_class = CommenReactionSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    @retry_on_busy
     def create(self, request, *args, **kwargs):
         """To create comment reaction on post.
 
@@ -320,27 +330,20 @@ class CreateCommentReactionView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        comment_id = request.data.get('comment')
-        user_profile = request.user.user_profile
-
-        existing_reaction = CommentReaction.objects.filter(comment=comment_id, reaction_owner=user_profile).first()
-
-        if existing_reaction:
-            existing_reaction.reaction_type = serializer.validated_data['reaction_type']
-            existing_reaction.save()
-            response_message = "Comment Reaction updated."
-        else:
-            serializer.save(reaction_owner=user_profile)
-            response_message = "Comment Reaction created."
+        comment_id = serializer.validated_data['comment'].pk
 
-        post = Comment.objects.get(pk=comment_id)
-        post.reacted_by.add(user_profile)
+        with transaction.atomic():
+            _, created = upsert_reaction(
+                CommentReaction, serializer.validated_data['reaction_type'].pk,
+                comment_id=comment_id, reaction_owner_id=request.user.user_profile.pk,
+            )
+        response_message = "Comment Reaction created." if created else "Comment Reaction updated."
 
         headers = self.get_success_headers(serializer.data)
         return Response({"detail": response_message}, status=status.HTTP_201_CREATED, headers=headers)
 
 
-class RemoveCommentReactionView(generics.DestroyAPIView):
+class RemoveCommentReactionView(SerializerTimingMixin, generics.DestroyAPIView):
     """To remove comment reaction."""
 
     serializer_class = CommenReactionSerializer
@@ -356,8 +359,6 @@ class RemoveCommentReactionView(generics.DestroyAPIView):
         user_profile = self.request.user.user_profile
 
         if reaction.reaction_owner == user_profile:
-            comment = instance.comment
-            comment.reacted_by.remove(user_profile)
             instance.delete()
             response_message = "Comment Reaction removed successfully"
             status_code = status.HTTP_204_NO_CONTENT
@@ -378,7 +379,7 @@ class RemoveCommentReactionView(generics.DestroyAPIView):
         return Response({"detail": response_message}, status=status_code)
 
 
-class ListCommentReactionView(generics.ListAPIView):
+class ListCommentReactionView(SerializerTimingMixin, SparseFieldsetMixin, generics.ListAPIView):
     """List comment reaction on a comment."""
 
     serializer_class = GetCommentReactionSerializer
@@ -389,12 +390,13 @@ class ListCommentReactionView(generics.ListAPIView):
         return CommentReaction.objects.filter(comment=comment_id)
 
 
-class CreateCommentReplyView(generics.CreateAPIView):
+class CreateCommentReplyView(SerializerTimingMixin, generics.CreateAPIView):
     """To create comment reply for a comment."""
 
     serializer_class = CommentReplySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    @retry_on_busy
     def create(self, request, *args, **kwargs):
         """To create comment reply on comment.
 
@@ -405,21 +407,17 @@ class CreateCommentReplyView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        comment_id = request.data.get('comment')
         user_profile = request.user.user_profile
 
-        serializer.save(reply_owner=user_profile)
+        with transaction.atomic():
+            serializer.save(reply_owner=user_profile)
         response_message = "Comment Replied."
 
-        comment = Comment.objects.get(pk=comment_id)
-        print(comment)
-        comment.replied_by.add(user_profile)
-
         headers = self.get_success_headers(serializer.data)
         return Response({"detail": response_message}, status=status.HTTP_201_CREATED, headers=headers)
 
 
-class UpdateCommentReplyView(generics.UpdateAPIView):
+class UpdateCommentReplyView(SerializerTimingMixin, generics.UpdateAPIView):
     """Update comment reply on a comment."""
 
     queryset = CommentReply.objects.all()
@@ -455,7 +453,7 @@ class UpdateCommentReplyView(generics.UpdateAPIView):
         return Response({"detail": response_message}, status=status_code)
 
 
-class RemoveCommentReplyView(generics.DestroyAPIView):
+class RemoveCommentReplyView(SerializerTimingMixin, generics.DestroyAPIView):
     """To delete comment reply on comment."""
 
     serializer_class = CommentReplySerializer
@@ -490,23 +488,26 @@ class RemoveCommentReplyView(generics.DestroyAPIView):
         return Response({"detail": response_message}, status=status_code)
 
 
-class ListCommentRepliesView(generics.ListAPIView):
+class ListCommentRepliesView(SerializerTimingMixin, SparseFieldsetMixin, generics.ListAPIView):
     """To list comment replies on comment."""
 
     serializer_class = GetCommentReplySerializer
+    field_prefetches = {'sample_reactors': [sample_reactions('replyreaction_set', ReplyReaction)]}
+    field_columns = {'sample_reactors': []}
 
     def get_queryset(self):
         """return replies for specific comment."""
         comment_id = self.kwargs['comment_id']
-        return CommentReply.objects.filter(comment=comment_id)
+        return CommentReply.objects.filter(comment=comment_id).order_by('created_at')
 
 
-class CreateReplyReactionView(generics.CreateAPIView):
+class CreateReplyReactionView(SerializerTimingMixin, generics.CreateAPIView):
     """To react on replies on a comment."""
 
     serializer_class = ReplyReactionSerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
 
+    @retry_on_busy
     def create(self, request, *args, **kwargs):
         """To create reaction on comment replies.
 
@@ -517,27 +518,20 @@ class CreateReplyReactionView(generics.CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        comment_id = request.data.get('comment_reply')
-        user_profile = request.user.user_profile
+        reply_id = serializer.validated_data['comment_reply'].pk
 
-        existing_reaction = ReplyReaction.objects.filter(comment_reply=comment_id, reaction_owner=user_profile).first()
-
-        if existing_reaction:
-            existing_reaction.reaction_type = serializer.validated_data['reaction_type']
-            existing_reaction.save()
-            response_message = "Comment Reply Reaction updated."
-        else:
-            serializer.save(reaction_owner=user_profile)
-            response_message = "Comment Reaction created."
-
-        comment = CommentReply.objects.get(pk=comment_id)
-        comment.reacted_by.add(user_profile)
+        with transaction.atomic():
+            _, created = upsert_reaction(
+                ReplyReaction, serializer.validated_data['reaction_type'].pk,
+                comment_reply_id=reply_id, reaction_owner_id=request.user.user_profile.pk,
+            )
+        response_message = "Comment Reply Reaction created." if created else "Comment Reply Reaction updated."
 
         headers = self.get_success_headers(serializer.data)
         return Response({"detail": response_message}, status=status.HTTP_201_CREATED, headers=headers)
 
 
-class RemoveReplyreactionview(generics.DestroyAPIView):
+class RemoveReplyreactionview(SerializerTimingMixin, generics.DestroyAPIView):
     """To remove reaction comment replies."""
 
     serializer_class = ReplyReactionSerializer
@@ -553,8 +547,6 @@ class RemoveReplyreactionview(generics.DestroyAPIView):
         user_profile = self.request.user.user_profile
 
         if reaction.reaction_owner == user_profile:
-            comment = instance.comment_reply
-            comment.reacted_by.remove(user_profile)
             instance.delete()
             response_message = "Comment reply Reaction removed successfully"
             status_code = status.HTTP_204_NO_CONTENT
@@ -575,7 +567,7 @@ class RemoveReplyreactionview(generics.DestroyAPIView):
         return Response({"detail": response_message}, status=status_code)
 
 
-class ListReplyReactionView(generics.ListAPIView):
+class ListReplyReactionView(SerializerTimingMixin, SparseFieldsetMixin, generics.ListAPIView):
     """List reaction on a specic reply."""
     serializer_class = GetReplyReactionSerializer
 
@@ -585,9 +577,108 @@ class ListReplyReactionView(generics.ListAPIView):
         return ReplyReaction.objects.filter(comment_reply=comment_id)
 
 
-class NotificationList(generics.ListAPIView):
+class CommentThreadView(SerializerTimingMixin, generics.ListAPIView):
+    """To list a page of a post's comments with their first replies, reaction summaries and authors.
+
+    ``?comments=`` sets the comments per page and ``?replies=`` the replies loaded
+    per comment. The next page of comments is linked in ``next``, and the next
+    replies of each comment in its ``replies.next``.
+    """
+
+    serializer_class = ThreadCommentSerializer
+    query_budget = 4
+    max_comments = 50
+    max_replies = 20
+
+    def get_serializer_context(self):
+        """Add the number of replies loaded per comment, used in the reply links."""
+        context = super().get_serializer_context()
+        context['reply_limit'] = parse_limit(self.request.query_params.get('replies'), 'replies', 3, self.max_replies)
+        return context
+
+    def list(self, request, *args, **kwargs):
+        """return a page of the comment thread of a post.
+
+        :param request:
+        :param *args:
+        :param **kwargs:
+        """
+        context = self.get_serializer_context()
+        comment_limit = parse_limit(request.query_params.get('comments'), 'comments', 10, self.max_comments)
+        comments, cursor = load_thread(
+            self.kwargs['post_id'], comment_limit, context['reply_limit'], request.query_params.get('cursor')
+        )
+        return Response({
+            'next': replace_query_param(request.build_absolute_uri(), 'cursor', cursor) if cursor else None,
+            'results': self.get_serializer(comments, many=True, context=context).data,
+        })
+
+
+class CommentThreadRepliesView(SerializerTimingMixin, generics.ListAPIView):
+    """To list a page of a comment's replies with their reaction summaries and authors, after ``?cursor=``."""
+
+    serializer_class = ThreadReplySerializer
+    query_budget = 2
+    max_replies = 50
+
+    def list(self, request, *args, **kwargs):
+        """return a page of replies on a comment.
+
+        :param request:
+        :param *args:
+        :param **kwargs:
+        """
+        limit = parse_limit(request.query_params.get('limit'), 'limit', 10, self.max_replies)
+        replies, cursor = load_replies(self.kwargs['comment_id'], limit, request.query_params.get('cursor'))
+        return Response({
+            'next': replace_query_param(request.build_absolute_uri(), 'cursor', cursor) if cursor else None,
+            'results': self.get_serializer(replies, many=True).data,
+        })
+
+
+class NotificationList(SerializerTimingMixin, SparseFieldsetMixin, generics.ListAPIView):
     """To list notifications."""
 
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated]
+
+
+def get_post_read_queryset():
+    """Posts with everything `GetPostSerializer` reads prefetched or annotated."""
+    return Post.objects.prefetch_related('reacted_by', 'commented_by').annotate(
+        comment_count=Count('comment', distinct=True)
+    )
+
+
+class AsyncPostListView(AsyncListAPIView):
+    """Async version of the post list."""
+
+    serializer_class = GetPostSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = 4
+
+    def get_queryset(self):
+        """return posts with serializer relations prefetched."""
+        return get_post_read_queryset()
+
+
+class AsyncPostDetailView(AsyncRetrieveAPIView):
+    """Async version of the post detail."""
+
+    serializer_class = GetPostSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = 4
+
+    def get_queryset(self):
+        """return posts with serializer relations prefetched."""
+        return get_post_read_queryset()
+
+
+class AsyncNotificationList(AsyncListAPIView):
+    """Async version of the notification list."""
+
+    queryset = Notification.objects.all()
+    serializer_class = NotificationSerializer
+    permission_classes = [IsAuthenticated]
+    query_budget = 2
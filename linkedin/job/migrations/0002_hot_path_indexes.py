@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-19 13:29
+
+from django.db import migrations, models
+
+from core.db.operations import AddIndexConcurrently
+
+
+class Migration(migrations.Migration):
+
+    # Indexes are built concurrently on Postgres, which cannot run in a transaction.
+    atomic = False
+
+    dependencies = [
+        ('core', '0003_hot_path_indexes'),
+        ('job', '0001_initial'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='jobapplication',
+            index=models.Index(fields=['job', '-applied_at'], name='application_job_applied_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='jobapplication',
+            index=models.Index(fields=['-applied_at'], name='application_applied_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='jobpost',
+            index=models.Index(fields=['-created_at'], name='jobpost_created_idx'),
+        ),
+    ]
@@ -18,6 +18,9 @@ class JobPost(TimeStampMixin):
         verbose_name = 'Job Post'
         verbose_name_plural = 'Job Posts'
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='jobpost_created_idx'),
+        ]
 
     def __str__(self):
         """String represntation of the object instance."""
@@ -55,6 +58,10 @@ class JobApplication(TimeStampMixin):
         verbose_name = 'Job Application'
         verbose_name_plural = 'Job Applications'
         ordering = ['-applied_at']
+        indexes = [
+            models.Index(fields=['job', '-applied_at'], name='application_job_applied_idx'),
+            models.Index(fields=['-applied_at'], name='application_applied_idx'),
+        ]
 
     def __str__(self):
         """String represntation of the object instance."""
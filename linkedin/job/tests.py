@@ -1,3 +1,47 @@
-from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APITestCase
 
-# Create your tests here.
+from core.models import CustomUser, UserProfile
+from .models import JobPost, Tag, JobApplication
+
+
+class AsyncJobPostListTests(APITestCase):
+    """Tests for the async job post list."""
+
+    def test_job_list_matches_sync_view(self):
+        recruiter = UserProfile.objects.create(
+            user=CustomUser.objects.create_user(email='r@example.com', password='secret', username='r')
+        )
+        applicant = UserProfile.objects.create(
+            user=CustomUser.objects.create_user(email='a@example.com', password='secret', username='a')
+        )
+        job = JobPost.objects.create(title='Engineer', description='Build things', recruiter=recruiter)
+        job.tags.add(Tag.objects.create(name='python'))
+        JobApplication.objects.create(job=job, applicant=applicant)
+
+        sync = self.client.get(reverse('job:jobpost-list'))
+        response = self.client.get(reverse('job:async-job-list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), sync.json())
+
+
+class JobPostBatchTests(APITestCase):
+    """Tests for retrieving many job posts at once."""
+
+    def test_batch_matches_detail_view(self):
+        recruiter = UserProfile.objects.create(
+            user=CustomUser.objects.create_user(email='r@example.com', password='secret', username='r')
+        )
+        jobs = [
+            JobPost.objects.create(title=title, description='Build things', recruiter=recruiter)
+            for title in ('Engineer', 'Designer')
+        ]
+        jobs[0].tags.add(Tag.objects.create(name='python'))
+
+        response = self.client.get(reverse('job:jobpost-batch'), {'ids': f'{jobs[1].pk},{jobs[0].pk}'})
+
+        self.assertEqual(list(response.json()), [str(jobs[1].pk), str(jobs[0].pk)])
+        for job in jobs:
+            detail = self.client.get(reverse('job:jobpost-detail', args=[job.pk]))
+            self.assertEqual(response.json()[str(job.pk)], detail.json())
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 
-from .views import JobPostViewSet, JobApplicationViewSet
+from .views import JobPostViewSet, JobApplicationViewSet, AsyncJobPostListView
 
 
 app_name = "job"
@@ -13,4 +13,6 @@ router.register(r'applications', JobApplicationViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
+
+    path('async/jobs/', AsyncJobPostListView.as_view(), name='async-job-list'),
 ]
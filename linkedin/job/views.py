@@ -1,6 +1,10 @@
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 
+from core.async_views import AsyncListAPIView
+from core.batch import BatchRetrieveMixin
+from core.sparse import SparseFieldsetMixin
+from core.instrumentation import SerializerTimingMixin
 from core.permissions import IsRecruiter, IsJobPostOwnerOrAdmin, IsApplicant, IsApplicantOrAdmin
 from .models import JobPost, JobApplication
 from .serializers import (
@@ -9,13 +13,15 @@ from .serializers import (
 )
 
 
-class JobPostViewSet(viewsets.ModelViewSet):
+class JobPostViewSet(SerializerTimingMixin, BatchRetrieveMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     A viewset that provides default `create()`, `retrieve()`, `update()`,
-    `partial_update()`, `destroy()` and `list()` actions.
+    `partial_update()`, `destroy()` and `list()` actions, and `batch()` to retrieve many job posts.
     """
 
     queryset = JobPost.objects.all()
+    query_budget = {'batch': 3}
+    field_prefetches = {'tags': ['tags'], 'applicants': ['applicants']}
 
     def get_serializer_class(self):
         """Serializer class on specific action method."""
@@ -46,7 +52,7 @@ class JobPostViewSet(viewsets.ModelViewSet):
         serializer.save(recruiter=self.request.user.user_profile)
 
 
-class JobApplicationViewSet(viewsets.ModelViewSet):
+class JobApplicationViewSet(SerializerTimingMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """A viewset that provides default `create()`, `retrieve()`, `update()`,
     `partial_update()`, `destroy()` and `list()` actions.
     """
@@ -82,3 +88,12 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
         :param serializer:
         """
         serializer.save(applicant=self.request.user.user_profile)
+
+
+class AsyncJobPostListView(AsyncListAPIView):
+    """Async version of the job post list."""
+
+    queryset = JobPost.objects.prefetch_related('tags', 'applicants')
+    serializer_class = GetJobPostSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    query_budget = 4
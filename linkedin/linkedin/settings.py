@@ -1,5 +1,7 @@
+import os
+import tempfile
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 from datetime import timedelta
 
 
@@ -37,7 +39,12 @@ INSTALLED_APPS = [
     "drf_spectacular",
 ]
 
+# ProfilingMiddleware comes first so the profile it stores is not counted in the query budget
+# and metrics recorded by QueryInstrumentationMiddleware.
 MIDDLEWARE = [
+    "core.middleware.ProfilingMiddleware",
+    "core.middleware.QueryInstrumentationMiddleware",
+    "core.middleware.CompressionMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -45,6 +52,7 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
+    "core.middleware.ReplicaRoutingMiddleware",
 ]
 
 ROOT_URLCONF = "linkedin.urls"
@@ -69,12 +77,131 @@ WSGI_APPLICATION = "linkedin.wsgi.application"
 
 
 # Database
+# DATABASE_PROFILE=postgres switches to the production profile, configured from DATABASE_* variables.
+# Setting DATABASE_REPLICA_HOST adds a read replica that serves safe list and retrieve requests.
+
+DATABASE_PROFILE = config('DATABASE_PROFILE', default='sqlite')
+
+# DATABASE_PROFILE=sqlite-wal tunes SQLite for concurrent access: WAL mode with relaxed syncing,
+# a memory map, a larger page cache and a busy timeout. Transactions start with BEGIN IMMEDIATE
+# so writers queue on the busy timeout up front instead of failing with "database is locked"
+# when a read transaction is upgraded to a write.
+SQLITE_WAL_OPTIONS = {
+    "transaction_mode": "IMMEDIATE",
+    "init_command": (
+        "PRAGMA journal_mode = WAL; PRAGMA synchronous = NORMAL; PRAGMA busy_timeout = 5000; "
+        "PRAGMA mmap_size = 268435456; PRAGMA cache_size = -65536; PRAGMA temp_store = MEMORY"
+    ),
+}
 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+if DATABASE_PROFILE == 'postgres':
+    DATABASE_POOL = config('DATABASE_POOL', default=True, cast=bool)
+
+    def postgres_database(prefix):
+        """Settings of one Postgres server, read from `<prefix>_*` variables."""
+        database = {
+            "ENGINE": "django.db.backends.postgresql",
+            "NAME": config('DATABASE_NAME', default='linkedin'),
+            "USER": config('DATABASE_USER', default='linkedin'),
+            "PASSWORD": config('DATABASE_PASSWORD', default=''),
+            "HOST": config(f'{prefix}_HOST', default='localhost'),
+            "PORT": config(f'{prefix}_PORT', default='5432'),
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {},
+        }
+        if DATABASE_POOL:
+            # Pooled connections are returned to the pool instead of being kept per thread.
+            database["CONN_MAX_AGE"] = 0
+            database["OPTIONS"]["pool"] = {
+                "min_size": config('DATABASE_POOL_MIN_SIZE', default=2, cast=int),
+                "max_size": config('DATABASE_POOL_MAX_SIZE', default=20, cast=int),
+                "timeout": config('DATABASE_POOL_TIMEOUT', default=10, cast=int),
+            }
+        else:
+            database["CONN_MAX_AGE"] = config('DATABASE_CONN_MAX_AGE', default=600, cast=int)
+        return database
+
+    DATABASES = {"default": postgres_database('DATABASE')}
+
+    if config('DATABASE_REPLICA_HOST', default=''):
+        DATABASES["replica"] = postgres_database('DATABASE_REPLICA')
+        # Tests read the replica through the primary's test database unless a second local
+        # instance is set up to act as the replica with DATABASE_REPLICA_TEST_MIRROR=False.
+        if config('DATABASE_REPLICA_TEST_MIRROR', default=True, cast=bool):
+            DATABASES["replica"]["TEST"] = {"MIRROR": "default"}
+else:
+    DATABASES = {
+        "default": {
+            "ENGINE": "django.db.backends.sqlite3",
+            "NAME": config('SQLITE_PATH', default=str(BASE_DIR / "db.sqlite3")),
+        }
     }
+    if DATABASE_PROFILE == 'sqlite-wal':
+        DATABASES["default"]["OPTIONS"] = SQLITE_WAL_OPTIONS
+
+DATABASE_ROUTERS = ['core.db_routers.PrimaryReplicaRouter']
+
+# Auth state, replica pins and profile caches must be seen by every worker process, so the
+# production profile requires a shared cache: CACHE_BACKEND=database (run createcachetable
+# once) or redis with CACHE_LOCATION=redis://host:6379. locmem is per process and only fits
+# a single process, as in development and tests.
+CACHE_BACKEND = config('CACHE_BACKEND', default='database' if DATABASE_PROFILE == 'postgres' else 'locmem')
+CACHES = {
+    "default": {
+        "locmem": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "database": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "core_cache"},
+        "redis": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": config('CACHE_LOCATION', default='redis://localhost:6379'),
+        },
+    }[CACHE_BACKEND],
+}
+
+# Attempts of a write transaction wrapped with core.db.utils.retry_on_busy.
+DATABASE_BUSY_RETRIES = config('DATABASE_BUSY_RETRIES', default=5, cast=int)
+
+# Seconds a user's reads stay on the primary after they write, so they read their own writes.
+REPLICA_STICKY_SECONDS = config('REPLICA_STICKY_SECONDS', default=5, cast=int)
+
+# Raise instead of logging when a view goes over its query_budget, always on under the test runner.
+QUERY_BUDGET_STRICT = config('QUERY_BUDGET_STRICT', default=False, cast=bool)
+
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# Sampling profiler: fraction of requests profiled, token of the X-Profile-Token header
+# that profiles a request on demand (empty disables it) and seconds between stack samples.
+PROFILING_SAMPLE_RATE = config('PROFILING_SAMPLE_RATE', default=0.0, cast=float)
+PROFILING_TOKEN = config('PROFILING_TOKEN', default='')
+PROFILING_INTERVAL = config('PROFILING_INTERVAL', default=0.005, cast=float)
+
+# Directory of the per process metric files summed by /metrics, to be emptied when the server
+# is restarted, and bearer token required to read them (empty disables the endpoint). The
+# server's worker exit hook should call core.metrics.mark_process_dead(worker.pid).
+METRICS_DIR = config('METRICS_DIR', default=os.path.join(tempfile.gettempdir(), 'linkedin-metrics'))
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Queries slower than this are logged and stored with their plan, 0 disables the slow query log.
+SLOW_QUERY_THRESHOLD_MS = config('SLOW_QUERY_THRESHOLD_MS', default=200, cast=float)
+
+# Response compression: encodings in order of preference (br and zstd need their packages),
+# smallest body compressed in bytes and level of each encoding, see benchmarks/compression.py.
+COMPRESSION_ENCODINGS = config('COMPRESSION_ENCODINGS', default='zstd,br,gzip', cast=Csv())
+COMPRESSION_MIN_SIZE = config('COMPRESSION_MIN_SIZE', default=1024, cast=int)
+COMPRESSION_LEVELS = {
+    'gzip': config('COMPRESSION_GZIP_LEVEL', default=6, cast=int),
+    'br': config('COMPRESSION_BROTLI_LEVEL', default=4, cast=int),
+    'zstd': config('COMPRESSION_ZSTD_LEVEL', default=3, cast=int),
+}
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "core": {"handlers": ["console"], "level": config('CORE_LOG_LEVEL', default='INFO')},
+    },
 }
 
 
@@ -95,6 +222,17 @@ AUTH_PASSWORD_VALIDATORS = [
     # },
 ]
 
+AUTHENTICATION_BACKENDS = [
+    'core.backends.PooledModelBackend',
+]
+
+# Processes used to hash and verify passwords off the request workers, 0 hashes inline.
+# Every web worker process starts its own pool, so keep workers x pool size near the CPU count.
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=2, cast=int)
+
+# Rows validated, hashed and inserted together by the bulk user import.
+BULK_IMPORT_BATCH_SIZE = config('BULK_IMPORT_BATCH_SIZE', default=500, cast=int)
+
 
 # Internationalization
 
@@ -117,18 +255,44 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 AUTH_USER_MODEL = "core.CustomUser"
 
+# Stateless mode builds request.user from token claims, revocation is checked
+# against a cached auth state that lives for AUTH_STATE_CACHE_TTL seconds. Saving a user
+# drops it from the shared cache, see core.authentication.StatelessJWTAuthentication.
+STATELESS_JWT_AUTH = config('STATELESS_JWT_AUTH', default=True, cast=bool)
+AUTH_STATE_CACHE_TTL = config('AUTH_STATE_CACHE_TTL', default=60, cast=int)
+
+# Stored profile documents are rebuilt this many seconds after a change, merging bursts of edits.
+PROFILE_DOCUMENT_DEBOUNCE = config('PROFILE_DOCUMENT_DEBOUNCE', default=2.0, cast=float)
+
+# In-process Bloom filter in front of the refresh token blacklist, reloaded when the
+# blacklist generation kept in the shared cache changes.
+TOKEN_BLACKLIST_FILTER_CAPACITY = config('TOKEN_BLACKLIST_FILTER_CAPACITY', default=100000, cast=int)
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = config('TOKEN_BLACKLIST_FILTER_ERROR_RATE', default=0.001, cast=float)
+# Seconds of rows reloaded again on each refresh, covering rows committed out of primary key order.
+TOKEN_BLACKLIST_FILTER_OVERLAP = config('TOKEN_BLACKLIST_FILTER_OVERLAP', default=300, cast=int)
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.StatelessJWTAuthentication' if STATELESS_JWT_AUTH
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': (
+        'core.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
 }
 
+# Encoder of API responses, 'orjson' or 'json'. orjson falls back to json when it is not installed.
+JSON_ENCODER = config('JSON_ENCODER', default='orjson')
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(hours=1),
     'ROTATE_REFRESH_TOKENS': False,
-    'BLACKLIST_AFTER_ROTATION': False
+    'BLACKLIST_AFTER_ROTATION': False,
+    'TOKEN_OBTAIN_SERIALIZER': 'core.serializers.CustomTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'core.serializers.CustomTokenRefreshSerializer',
 }
 
 SPECTACULAR_SETTINGS = {
@@ -1,10 +1,13 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from core.views import MetricsView
+
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('core-app/', include('core.urls')),
     path('feeds-app/', include('feed.urls')),
     path('jobs-app/', include('job.urls')),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]